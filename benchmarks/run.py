@@ -0,0 +1,69 @@
+"""Command-line entry point for the benchmark suite.
+
+    python benchmarks/run.py                          # run everything, print a table
+    python benchmarks/run.py -k 'topic01.*' -o results.json
+    python benchmarks/run.py -o baseline.json         # store a baseline...
+    python benchmarks/run.py --baseline baseline.json # ...and compare a later run to it
+    python benchmarks/run.py --compare baseline.json results.json
+
+When comparing, the exit status is 1 if any benchmark got significantly
+slower, so the command can gate a CI job.
+
+No baseline is committed: timings only compare on the same machine and
+Python, so make the baseline where the comparison runs (e.g. on the main
+branch, before the change under test).
+"""
+import argparse
+import sys
+
+import scenarios  # noqa: F401 - registers the benchmarks
+import suite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the repo's benchmarks.")
+    parser.add_argument('-k', '--filter', action='append',
+                        help="glob pattern of benchmark names to run (repeatable)")
+    parser.add_argument('-o', '--output', help="write results JSON to this path")
+    parser.add_argument('--baseline', help="compare this run against a stored results JSON")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="compare two stored results files without running anything")
+    parser.add_argument('--repeat', type=int, help="override every benchmark's repeat count")
+    parser.add_argument('--warmup', type=int, help="override every benchmark's warmup count")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--alpha', type=float, default=0.05, help="significance level")
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help="smallest relative change worth reporting (0.05 = 5%%)")
+    parser.add_argument('--list', action='store_true', help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for bench in suite.select(args.filter):
+            print(f"{bench.name:<32} {bench.group or ''}")
+        return 0
+
+    if args.compare:
+        baseline = suite.load_results(args.compare[0])
+        current = suite.load_results(args.compare[1])
+    else:
+        benchmarks = suite.select(args.filter)
+        if not benchmarks:
+            print("No benchmarks match", file=sys.stderr)
+            return 2
+        current = suite.run_all(benchmarks, args.repeat, args.warmup,
+                                measure_memory=not args.no_memory)
+        if args.output:
+            suite.save_results(current, args.output)
+            print(f"\nResults written to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = suite.load_results(args.baseline)
+
+    rows = suite.compare(baseline, current, args.alpha, args.threshold)
+    print()
+    print(suite.format_comparison(rows))
+    return 1 if any(row['verdict'] == 'slower' for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
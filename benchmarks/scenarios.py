@@ -0,0 +1,129 @@
+"""The repo's performance claims, registered as named benchmarks.
+
+Topic folders aren't importable packages (their names contain dashes), so
+load_script() imports an example file by path. Only scripts whose demo code
+sits behind `if __name__ == "__main__":` can be loaded this way. Scenarios
+load their script in setup, so the import is never part of a timed sample.
+"""
+import concurrent.futures
+import gc
+import importlib.util
+import pathlib
+import sys
+from collections import deque
+
+from suite import benchmark
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def load_script(relative_path):
+    """Import a topic script by path, with its folder on sys.path for sibling imports."""
+    path = REPO_ROOT / relative_path
+    name = path.stem.replace('-', '_')
+    if name in sys.modules:
+        return sys.modules[name]
+    folder = str(path.parent)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered before exec so worker processes can unpickle its functions
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# topic-01: list vs deque on the left end
+
+@benchmark('topic01.list_insert_left', group='topic-01', repeat=20, items=1000,
+           setup=lambda: list(range(1000)))
+def list_insert_left(regular_list):
+    for _ in range(1000):
+        regular_list.insert(0, 'new')
+
+
+@benchmark('topic01.deque_appendleft', group='topic-01', repeat=20, items=1000,
+           setup=lambda: deque(range(1000)))
+def deque_appendleft(efficient_deque):
+    for _ in range(1000):
+        efficient_deque.appendleft('new')
+
+
+@benchmark('topic01.squares_list', group='topic-01', repeat=10, items=100_000)
+def squares_list():
+    return sum([x**2 for x in range(100_000)])
+
+
+@benchmark('topic01.squares_generator', group='topic-01', repeat=10, items=100_000)
+def squares_generator():
+    return sum(x**2 for x in range(100_000))
+
+
+# topic-01: bulk allocation with and without the cyclic collector (gc_quiet.py)
+
+def _gc_quiet():
+    return load_script('topic-01-python-internals-memory-management/gc_quiet.py')
+
+
+@benchmark('topic01.build_points', group='topic-01', repeat=5, items=200_000, setup=_gc_quiet)
+def build_points(gc_quiet):
+    points = gc_quiet.build_points(200_000)
+    gc.collect()
+    return points
+
+
+@benchmark('topic01.build_points_gc_quiet', group='topic-01', repeat=5, items=200_000,
+           setup=_gc_quiet)
+def build_points_gc_quiet(gc_quiet):
+    with gc_quiet.gc_quiet():
+        points = gc_quiet.build_points(200_000)
+    gc.collect()
+    return points
+
+
+# topic-07: compare_sequential_vs_multiprocess, at a size that runs in seconds
+
+CPU_CHUNKS = [100_000] * 4
+
+
+def _cpu_bound():
+    return load_script('topic-07-concurrency/cpu_bound.py')
+
+
+# warmup=0: with the import in setup, the first sample times only the work
+@benchmark('topic07.cpu_bound_sequential', group='topic-07', warmup=0, repeat=3,
+           items=sum(CPU_CHUNKS), setup=_cpu_bound)
+def cpu_bound_sequential(cpu_bound):
+    return [cpu_bound.heavy_computation(size) for size in CPU_CHUNKS]
+
+
+@benchmark('topic07.cpu_bound_process_pool', group='topic-07', warmup=0, repeat=3,
+           items=sum(CPU_CHUNKS), setup=_cpu_bound)
+def cpu_bound_process_pool(cpu_bound):
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        return list(executor.map(cpu_bound.heavy_computation, CPU_CHUNKS))
+
+
+# topic-07: small_task_demonstration. Its tiny_computation is a nested
+# function, which a process pool can't pickle, so it is repeated here.
+
+SMALL_TASKS = [1000] * 10
+
+
+def tiny_computation(n):
+    """Very small computation - overhead will dominate."""
+    return sum(range(n))
+
+
+@benchmark('topic07.small_tasks_sequential', group='topic-07', repeat=20,
+           items=len(SMALL_TASKS))
+def small_tasks_sequential():
+    return [tiny_computation(n) for n in SMALL_TASKS]
+
+
+@benchmark('topic07.small_tasks_process_pool', group='topic-07', warmup=0, repeat=5,
+           items=len(SMALL_TASKS))
+def small_tasks_process_pool():
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        return list(executor.map(tiny_computation, SMALL_TASKS))
@@ -0,0 +1,277 @@
+"""Benchmark registry, runner and baseline comparison.
+
+Scenarios register themselves with the @benchmark decorator (see
+scenarios.py). Each one is run with warmup and repetition using
+perf_counter_ns / process_time_ns, plus one extra untimed run under
+tracemalloc for peak memory, and the results are saved as JSON. Two result
+files can then be compared with Welch's t-test, so a change is only called
+faster or slower when the difference is statistically significant. Both
+files must come from the same machine; results don't carry across hosts.
+"""
+import contextlib
+import datetime
+import fnmatch
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+REGISTRY = {}
+
+
+class Benchmark:
+    """One registered scenario."""
+
+    def __init__(self, func, name, group, warmup, repeat, number, items, setup):
+        self.func = func
+        self.name = name
+        self.group = group
+        self.warmup = warmup
+        self.repeat = repeat
+        self.number = number
+        self.items = items
+        self.setup = setup
+
+    def call(self):
+        """Run setup (untimed) and return a zero-argument callable to time."""
+        if self.setup is None:
+            return self.func
+        state = self.setup()
+        return lambda: self.func(state)
+
+
+def benchmark(name=None, group=None, warmup=1, repeat=5, number=1, items=None, setup=None):
+    """Register a function as a named benchmark.
+
+    number is how many times the function runs per timed sample and items
+    how many units of work one call processes (used for throughput). If
+    setup is given, it is called before every sample and its return value is
+    passed to the function, outside the timed region.
+    """
+    def decorator(func):
+        bench_name = name or func.__name__
+        if bench_name in REGISTRY:
+            raise ValueError(f"Benchmark {bench_name!r} is already registered")
+        REGISTRY[bench_name] = Benchmark(func, bench_name, group, warmup, repeat,
+                                         number, items, setup)
+        return func
+    return decorator
+
+
+def select(patterns=None):
+    """Return registered benchmarks whose name matches any glob pattern."""
+    if not patterns:
+        return list(REGISTRY.values())
+    return [bench for name, bench in REGISTRY.items()
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+
+
+def run_benchmark(bench, repeat=None, warmup=None, measure_memory=True, quiet=True):
+    """Run one benchmark and return its result dict.
+
+    CPU time is process_time_ns of this process only - work done in child
+    processes (e.g. a ProcessPoolExecutor) shows up in wall time, not CPU time.
+    """
+    repeat = repeat or bench.repeat
+    warmup = bench.warmup if warmup is None else warmup
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+
+    wall_ns = []
+    cpu_ns = []
+    peak_bytes = None
+    with output:
+        for _ in range(warmup):
+            bench.call()()
+
+        for _ in range(repeat):
+            func = bench.call()
+            wall_start = time.perf_counter_ns()
+            cpu_start = time.process_time_ns()
+            for _ in range(bench.number):
+                func()
+            cpu_ns.append((time.process_time_ns() - cpu_start) / bench.number)
+            wall_ns.append((time.perf_counter_ns() - wall_start) / bench.number)
+
+        if measure_memory:
+            # tracemalloc slows allocation down, so memory gets its own run
+            func = bench.call()
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            peak_bytes = peak - baseline
+
+    median_s = statistics.median(wall_ns) / 1e9
+    return {
+        'name': bench.name,
+        'group': bench.group,
+        'repeat': repeat,
+        'number': bench.number,
+        'wall_ns': wall_ns,
+        'cpu_ns': cpu_ns,
+        'wall_median_s': median_s,
+        'wall_mean_s': statistics.fmean(wall_ns) / 1e9,
+        'wall_stdev_s': statistics.stdev(wall_ns) / 1e9 if repeat > 1 else 0.0,
+        'cpu_median_s': statistics.median(cpu_ns) / 1e9,
+        'peak_memory_bytes': peak_bytes,
+        'throughput_per_s': bench.items / median_s if bench.items and median_s else None,
+    }
+
+
+def run_all(benchmarks, repeat=None, warmup=None, measure_memory=True, quiet=True,
+            progress=print):
+    """Run several benchmarks and return a results document ready for JSON."""
+    results = {}
+    for bench in benchmarks:
+        result = run_benchmark(bench, repeat, warmup, measure_memory, quiet)
+        results[bench.name] = result
+        if progress:
+            progress(format_result(result))
+    return {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'benchmarks': results,
+    }
+
+
+def format_result(result):
+    line = (f"{result['name']:<32} {result['wall_median_s'] * 1000:>10.3f} ms "
+            f"(+/- {result['wall_stdev_s'] * 1000:.3f}) cpu {result['cpu_median_s'] * 1000:.3f} ms")
+    if result['peak_memory_bytes'] is not None:
+        line += f"  peak {result['peak_memory_bytes'] / 1024:.1f} KiB"
+    if result['throughput_per_s']:
+        line += f"  {result['throughput_per_s']:,.0f} items/s"
+    return line
+
+
+def save_results(document, path):
+    with open(path, 'w') as file:
+        json.dump(document, file, indent=2)
+
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+# Welch's t-test. The Student t tail comes from the regularized incomplete
+# beta function, so no SciPy is needed.
+
+def _beta_continued_fraction(a, b, x):
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 200):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _incomplete_beta(a, b, x):
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _beta_continued_fraction(a, b, x) / a
+    return 1.0 - front * _beta_continued_fraction(b, a, 1.0 - x) / b
+
+
+def welch_t_test(old, new):
+    """Return (t, two-sided p-value) for the difference in means of two samples."""
+    n_old, n_new = len(old), len(new)
+    if n_old < 2 or n_new < 2:
+        raise ValueError("Welch's t-test needs at least two samples on each side")
+    var_old = statistics.variance(old) / n_old
+    var_new = statistics.variance(new) / n_new
+    diff = statistics.fmean(new) - statistics.fmean(old)
+    if var_old + var_new == 0:
+        return (0.0, 1.0) if diff == 0 else (math.copysign(math.inf, diff), 0.0)
+    t = diff / math.sqrt(var_old + var_new)
+    df = (var_old + var_new) ** 2 / (var_old ** 2 / (n_old - 1) + var_new ** 2 / (n_new - 1))
+    p = _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return t, p
+
+
+def compare(baseline, current, alpha=0.05, threshold=0.05):
+    """Compare two results documents benchmark by benchmark.
+
+    A benchmark is 'slower' or 'faster' only if the wall-time difference is
+    significant at alpha AND the medians differ by more than threshold (5%
+    by default); everything else is 'same'.
+    """
+    rows = []
+    old_results = baseline['benchmarks']
+    for name, new in current['benchmarks'].items():
+        old = old_results.get(name)
+        if old is None:
+            rows.append({'name': name, 'verdict': 'new'})
+            continue
+        ratio = new['wall_median_s'] / old['wall_median_s'] if old['wall_median_s'] else math.inf
+        try:
+            _, p = welch_t_test(old['wall_ns'], new['wall_ns'])
+        except ValueError:
+            p = None
+        verdict = 'same'
+        if p is not None and p < alpha:
+            if ratio > 1 + threshold:
+                verdict = 'slower'
+            elif ratio < 1 - threshold:
+                verdict = 'faster'
+        rows.append({
+            'name': name,
+            'verdict': verdict,
+            'ratio': ratio,
+            'p_value': p,
+            'old_median_s': old['wall_median_s'],
+            'new_median_s': new['wall_median_s'],
+            'old_peak_bytes': old.get('peak_memory_bytes'),
+            'new_peak_bytes': new.get('peak_memory_bytes'),
+        })
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'benchmark':<32} {'baseline':>12} {'current':>12} {'ratio':>7} {'p':>8}  verdict"]
+    for row in rows:
+        if row['verdict'] == 'new':
+            lines.append(f"{row['name']:<32} {'-':>12} {'-':>12} {'-':>7} {'-':>8}  new")
+            continue
+        p = f"{row['p_value']:.4f}" if row['p_value'] is not None else '-'
+        lines.append(f"{row['name']:<32} {row['old_median_s'] * 1000:>9.3f} ms "
+                     f"{row['new_median_s'] * 1000:>9.3f} ms {row['ratio']:>6.2f}x {p:>8}  "
+                     f"{row['verdict']}")
+    return "\n".join(lines)
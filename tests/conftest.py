@@ -0,0 +1,9 @@
+"""The topic folders aren't packages (their names have dashes), so put each
+one on sys.path and import its modules by name, the way their scripts do."""
+import pathlib
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+for folder in sorted(ROOT.glob('topic-*')) + [ROOT / 'benchmarks']:
+    if str(folder) not in sys.path:
+        sys.path.insert(0, str(folder))
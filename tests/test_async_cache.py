@@ -0,0 +1,187 @@
+import asyncio
+import traceback
+
+import pytest
+
+from async_cache import AsyncCache, SingleFlight, cached
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BackendError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_single_flight_shares_one_call():
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do('k', load) for _ in range(10)))
+        return results, flight
+
+    results, flight = run(main())
+    assert results == ['value'] * 10
+    assert calls == 1
+    assert flight.coalesced == 9
+
+
+def test_single_flight_cancelled_caller_does_not_cancel_the_others():
+    async def load():
+        await asyncio.sleep(0.02)
+        return 1
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do('k', load))
+        second = asyncio.ensure_future(flight.do('k', load))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert run(main()) == 1
+
+
+def test_hits_misses_and_ttl():
+    clock = Clock()
+    calls = []
+
+    async def main():
+        cache = AsyncCache(ttl=10, clock=clock)
+
+        async def load():
+            calls.append(clock.now)
+            return len(calls)
+
+        assert await cache.get('k', load) == 1
+        assert await cache.get('k', load) == 1
+        clock.now = 11
+        assert await cache.get('k', load) == 2
+        return cache.stats
+
+    stats = run(main())
+    assert (stats.hits, stats.misses, stats.loads) == (1, 2, 2)
+
+
+def test_stale_while_revalidate_returns_old_value_and_refreshes_once():
+    clock = Clock()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main():
+        cache = AsyncCache(ttl=1, stale_ttl=10, clock=clock)
+        await cache.get('k', load)
+        clock.now = 2
+        stale = await asyncio.gather(*(cache.get('k', load) for _ in range(5)))
+        await asyncio.sleep(0.05)
+        return stale, await cache.get('k', load), cache.stats
+
+    stale, fresh, stats = run(main())
+    assert stale == [1] * 5
+    assert fresh == 2
+    assert stats.refreshes == 1 and calls == 2
+
+
+def test_lru_eviction():
+    async def main():
+        cache = AsyncCache(maxsize=2)
+        for key in 'abc':
+            await cache.get(key, lambda key=key: asyncio.sleep(0, key))
+        return cache
+
+    cache = run(main())
+    assert len(cache) == 2 and cache.stats.evictions == 1
+
+
+def test_negative_caching_keeps_the_loaders_exception():
+    calls = 0
+
+    @cached(error_ttl=60)
+    async def fetch(x):
+        nonlocal calls
+        calls += 1
+        raise BackendError(503, 'down')
+
+    async def main():
+        errors = []
+        for _ in range(200):
+            with pytest.raises(BackendError) as info:
+                await fetch(1)
+            errors.append(info.value)
+        return errors
+
+    errors = run(main())
+    assert calls == 1
+    assert errors[-1].status == 503
+    assert fetch.cache.stats.negative_hits == 199
+    # Re-raising must not pile every caller's frames onto one traceback
+    assert len(traceback.extract_tb(errors[-1].__traceback__)) < 10
+
+
+def test_failed_refresh_keeps_serving_stale_value():
+    clock = Clock()
+    fail = False
+
+    async def load():
+        if fail:
+            raise BackendError(500, 'boom')
+        return 'good'
+
+    async def main():
+        nonlocal fail
+        cache = AsyncCache(ttl=1, stale_ttl=10, clock=clock)
+        await cache.get('k', load)
+        clock.now = 2
+        fail = True
+        assert await cache.get('k', load) == 'good'
+        await asyncio.sleep(0.01)
+        return await cache.get('k', load)
+
+    assert run(main()) == 'good'
+
+
+def test_default_key_separates_args_from_kwargs():
+    @cached()
+    async def f(*args, **kwargs):
+        return (args, kwargs)
+
+    async def main():
+        return await f((1,), (('a', 1),)), await f((1,), a=1)
+
+    positional, keyword = run(main())
+    assert positional == (((1,), (('a', 1),)), {})
+    assert keyword == (((1,),), {'a': 1})
+
+
+def test_custom_key_ignores_session_argument():
+    @cached(key=lambda session, url: url)
+    async def fetch(session, url):
+        return session
+
+    async def main():
+        return await fetch('first', 'u'), await fetch('second', 'u')
+
+    assert run(main()) == ('first', 'first')
@@ -0,0 +1,94 @@
+import asyncio
+import functools
+
+import pytest
+
+from async_pipeline import amap, compose, csv_reader, data_filter, data_transformer, prefetch
+
+
+@pytest.fixture
+def csv_files(tmp_path):
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"orders_{i}.csv"
+        path.write_text('name,price,date\n' +
+                        ''.join(f"{i}-{j},{j},2023-01-{j % 28 + 1:02}\n" for j in range(30)))
+        paths.append(str(path))
+    return paths
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+def test_csv_reader_keeps_file_and_row_order(csv_files):
+    rows = asyncio.run(collect(csv_reader(*csv_files, prefetch_files=2, chunk_rows=7)))
+    assert [row['name'] for row in rows] == [f"{i}-{j}" for i in range(5) for j in range(30)]
+
+
+def test_ragged_csv_rows_come_through_like_dictreader(tmp_path):
+    path = tmp_path / 'ragged.csv'
+    path.write_text('name,price\na,1\nb\nc,3,extra\n')
+    rows = asyncio.run(collect(csv_reader(str(path))))
+    assert rows == [{'name': 'a', 'price': '1'}, {'name': 'b', 'price': None},
+                    {'name': 'c', 'price': '3', None: ['extra']}]
+
+
+@pytest.mark.parametrize('buffer', [0, 5])
+@pytest.mark.parametrize('concurrency', [None, 3])
+def test_whole_pipeline(csv_files, buffer, concurrency):
+    pipeline = compose(csv_reader(*csv_files, chunk_rows=4),
+                       functools.partial(data_transformer, concurrency=concurrency),
+                       functools.partial(data_filter, min_price=25), buffer=buffer)
+    records = asyncio.run(collect(pipeline))
+    assert [r['name'] for r in records] == [f"{i}-{j}" for i in range(5) for j in range(25, 30)]
+    assert records[0]['price'] == 25.0 and records[0]['processed_date'] == 'parsed_2023-01-26'
+
+
+async def numbers(n):
+    for i in range(n):
+        yield i
+
+
+def test_amap_bounds_concurrency():
+    running = peak = 0
+
+    async def slow_double(x):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001 * (5 - x % 5))
+        running -= 1
+        return x * 2
+
+    ordered = asyncio.run(collect(amap(slow_double, numbers(20), concurrency=4)))
+    assert ordered == [x * 2 for x in range(20)] and peak <= 4
+    unordered = asyncio.run(collect(amap(slow_double, numbers(20), concurrency=4, ordered=False)))
+    assert sorted(unordered) == ordered
+
+
+def test_errors_reach_the_consumer():
+    async def failing():
+        yield 1
+        raise ValueError('bad row')
+
+    async def main():
+        seen = []
+        with pytest.raises(ValueError):
+            async for item in prefetch(failing(), 2):
+                seen.append(item)
+        return seen
+
+    assert asyncio.run(main()) == [1]
+
+
+def test_stopping_early_leaves_no_tasks_behind(csv_files):
+    async def main():
+        stream = compose(csv_reader(*csv_files, chunk_rows=2), data_transformer, buffer=3)
+        async for _ in stream:
+            break
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(main()) == []
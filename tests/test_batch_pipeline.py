@@ -0,0 +1,58 @@
+import csv
+
+from batch_pipeline import (ColumnBatch, batch_filter, batch_transformer, csv_batch_reader,
+                            csv_reader, data_filter, data_transformer, rows_to_batches)
+
+
+def write(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_matches_the_row_pipeline(tmp_path):
+    path = write(tmp_path / 'data.csv',
+                 'name,price,date\nitem1,10.50,2023-01-01\nitem2,5.00,2023-01-02\n'
+                 'item3,25.75,2023-01-03\n')
+    rows = list(data_filter(data_transformer(csv_reader(path, batch_size=2)), min_price=10.0))
+    assert [(r['name'], r['price'], r['processed_date']) for r in rows] == [
+        ('item1', 10.5, 'parsed_2023-01-01'), ('item3', 25.75, 'parsed_2023-01-03')]
+
+
+def test_ragged_csv_reads_like_dictreader(tmp_path):
+    path = write(tmp_path / 'ragged.csv', 'a,b\n1,2,3\n\n1\n1,2\n')
+    with open(path, newline='') as file:
+        expected = list(csv.DictReader(file))
+    assert list(csv_reader(path, batch_size=2)) == expected
+
+
+def test_none_values_are_kept():
+    records = [{'name': 'a', 'note': None}, {'name': 'b', 'note': 'x'}]
+    assert list(data_transformer(records)) == records
+
+
+def test_missing_fields_become_none():
+    rows = list(data_transformer([{'name': 'a'}, {'name': 'b', 'price': '2'}]))
+    assert rows == [{'name': 'a', 'price': None}, {'name': 'b', 'price': 2.0}]
+
+
+def test_missing_price_counts_as_zero():
+    batches = rows_to_batches([{'price': None}, {'price': '5'}, {'price': '-1'}])
+    kept = [row['price'] for batch in batch_filter(batch_transformer(batches), 0)
+            for row in batch.rows()]
+    assert kept == [None, 5.0]
+
+
+def test_repr_with_the_extra_fields_column(tmp_path):
+    path = write(tmp_path / 'ragged.csv', 'a,b\n1,2,3\n')
+    batch, = csv_batch_reader(path)
+    assert repr(batch) == "ColumnBatch(1 rows: 'a', 'b', None)"
+
+
+def test_empty_file(tmp_path):
+    assert list(csv_batch_reader(write(tmp_path / 'empty.csv', ''))) == []
+
+
+def test_batch_size_bounds_each_batch():
+    batches = list(rows_to_batches(({'i': i} for i in range(5)), batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert isinstance(batches[0], ColumnBatch)
@@ -0,0 +1,92 @@
+import sqlite3
+import time
+
+import pytest
+
+from batched_writer import FLUSH, database_writer, transaction
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    conn.execute("CREATE TABLE records (data TEXT NOT NULL)")
+    yield conn
+    conn.close()
+
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+
+def test_writes_in_batches_and_flushes_the_rest_on_close(conn):
+    writer = database_writer(conn, batch_size=10, max_delay=60)
+    stats = next(writer)
+    for i in range(25):
+        writer.send(f"message-{i}")
+    assert count(conn) == 20 and stats.flushes == 2
+    writer.close()
+    assert count(conn) == 25 and stats.rows_written == 25
+
+
+def test_flush_marker_and_max_delay(conn):
+    writer = database_writer(conn, batch_size=100, max_delay=0.01)
+    next(writer)
+    writer.send('a')
+    writer.send(FLUSH)
+    assert count(conn) == 1
+    writer.send('b')
+    time.sleep(0.02)
+    writer.send('c')  # the delay is checked on send()
+    assert count(conn) == 3
+    writer.send(None)  # ignored
+    writer.close()
+    assert count(conn) == 3
+
+
+def test_a_failed_batch_is_rolled_back_and_not_retried(conn):
+    writer = database_writer(conn, batch_size=3, to_row=lambda record: (record or None,))
+    next(writer)
+    writer.send('a')
+    writer.send('b')
+    with pytest.raises(sqlite3.IntegrityError):
+        writer.send('')  # NULL in a NOT NULL column fails the whole batch
+    assert count(conn) == 0 and not conn.in_transaction
+    writer.close()  # the generator already finished; nothing is flushed twice
+    assert count(conn) == 0
+
+
+def test_to_row_and_columns(conn):
+    conn.execute("CREATE TABLE orders (name TEXT, price REAL)")
+    writer = database_writer(conn, table='orders', columns=('name', 'price'),
+                             to_row=lambda order: (order['name'], order['price']))
+    next(writer)
+    writer.send({'name': 'x', 'price': 1.5})
+    writer.close()
+    assert conn.execute("SELECT name, price FROM orders").fetchall() == [('x', 1.5)]
+
+
+def test_a_path_is_opened_and_closed_by_the_writer(tmp_path):
+    path = str(tmp_path / 'orders.db')
+    with sqlite3.connect(path) as setup:
+        setup.execute("CREATE TABLE records (data TEXT)")
+    setup.close()
+    writer = database_writer(path, batch_size=2)
+    next(writer)
+    for i in range(3):
+        writer.send(str(i))
+    writer.close()
+    check = sqlite3.connect(path)
+    assert check.execute("SELECT COUNT(*) FROM records").fetchone()[0] == 3
+    check.close()
+
+
+def test_transaction_nests_in_a_savepoint(conn):
+    conn.execute("BEGIN")
+    with pytest.raises(sqlite3.IntegrityError):
+        with transaction(conn):
+            conn.execute("INSERT INTO records VALUES ('kept?')")
+            conn.execute("INSERT INTO records VALUES (NULL)")
+    assert conn.in_transaction  # the caller's transaction is still open
+    conn.execute("INSERT INTO records VALUES ('outer')")
+    conn.execute("COMMIT")
+    assert conn.execute("SELECT data FROM records").fetchall() == [('outer',)]
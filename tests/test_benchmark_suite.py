@@ -0,0 +1,68 @@
+import json
+import time
+
+import pytest
+
+import run
+import scenarios
+import suite
+
+
+def fake(name, samples):
+    samples = [s * 1e6 for s in samples]
+    return {'name': name, 'wall_ns': samples,
+            'wall_median_s': sorted(samples)[len(samples) // 2] / 1e9}
+
+
+def document(**benchmarks):
+    return {'benchmarks': {name: fake(name, samples) for name, samples in benchmarks.items()}}
+
+
+def test_welch_t_test():
+    t, p = suite.welch_t_test([10, 11, 9, 10, 10], [20, 21, 19, 20, 20])
+    assert t > 0 and p < 1e-6
+    t, p = suite.welch_t_test([10, 11, 9, 10], [10, 9, 11, 10])
+    assert p > 0.5
+    assert suite.welch_t_test([1, 1], [1, 1]) == (0.0, 1.0)
+    with pytest.raises(ValueError):
+        suite.welch_t_test([1], [1, 2])
+
+
+def test_compare_verdicts():
+    baseline = document(a=[10, 10.1, 9.9, 10], b=[10, 10.1, 9.9, 10], c=[10, 12, 8, 10])
+    current = document(a=[20, 20.1, 19.9, 20], b=[5, 5.1, 4.9, 5], c=[10.5, 12, 8.5, 10],
+                       d=[1, 1])
+    verdicts = {row['name']: row['verdict'] for row in suite.compare(baseline, current)}
+    assert verdicts == {'a': 'slower', 'b': 'faster', 'c': 'same', 'd': 'new'}
+    assert 'slower' in suite.format_comparison(suite.compare(baseline, current))
+
+
+def test_setup_is_not_timed():
+    calls = []
+    bench = suite.Benchmark(lambda state: calls.append(state), 'x', None, warmup=1, repeat=3,
+                            number=1, items=10, setup=lambda: time.sleep(0.05) or 'state')
+    result = suite.run_benchmark(bench, measure_memory=False)
+    assert calls == ['state'] * 4
+    assert result['wall_median_s'] < 0.01
+    assert result['throughput_per_s'] > 0
+
+
+def test_scripts_load_in_setup():
+    for name in ('topic01.build_points', 'topic07.cpu_bound_sequential',
+                 'topic07.cpu_bound_process_pool'):
+        bench = suite.REGISTRY[name]
+        assert bench.setup is not None
+        assert bench.setup().__name__ in ('gc_quiet', 'cpu_bound')
+    assert scenarios.load_script('topic-07-concurrency/cpu_bound.py') is \
+        scenarios.load_script('topic-07-concurrency/cpu_bound.py')
+
+
+def test_cli_gates_on_a_slowdown(tmp_path, capsys):
+    baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+    baseline.write_text(json.dumps(document(a=[10, 10.1, 9.9, 10])))
+    current.write_text(json.dumps(document(a=[20, 20.1, 19.9, 20])))
+    assert run.main(['--compare', str(baseline), str(current)]) == 1
+    assert run.main(['--compare', str(baseline), str(baseline)]) == 0
+    assert run.main(['-k', 'no-such-benchmark']) == 2
+    assert run.main(['--list', '-k', 'topic01.*']) == 0
+    assert 'topic01.squares_list' in capsys.readouterr().out
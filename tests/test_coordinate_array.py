@@ -0,0 +1,85 @@
+import pytest
+
+from coordinate_array import Coordinate, CoordinateArray
+
+POINTS = [(51.5, -0.1, 11.0), (48.9, 2.4, 35.0), (40.7, -74.0, 10.0), (-33.9, 151.2, 3.0)]
+
+
+@pytest.fixture(params=['array', 'numpy'])
+def backend(request):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    return request.param
+
+
+def make(backend):
+    return CoordinateArray(POINTS, backend=backend)
+
+
+def test_rows_read_and_write_through_to_the_columns(backend):
+    points = make(backend)
+    assert len(points) == 4 and points.backend == backend
+    assert points[1] == Coordinate(48.9, 2.4, 35.0)
+    points[1].altitude = 40.0
+    assert list(points.column('altitude')) == [11.0, 40.0, 10.0, 3.0]
+    assert points[-1].to_coordinate().latitude == -33.9
+
+
+def test_accepts_coordinates_and_tuples_without_altitude(backend):
+    points = CoordinateArray([Coordinate(1.0, 2.0, 3.0), (4.0, 5.0)], backend=backend)
+    assert [(p.latitude, p.longitude, p.altitude) for p in points] == [(1, 2, 3), (4, 5, 0)]
+
+
+def test_from_columns_and_ragged_columns(backend):
+    points = CoordinateArray.from_columns([1.0, 2.0], [3.0, 4.0], backend=backend)
+    assert list(points.column('altitude')) == [0.0, 0.0]
+    with pytest.raises(ValueError):
+        points.extend([1.0, 2.0], [3.0])
+
+
+def test_growing_past_the_initial_capacity(backend):
+    points = CoordinateArray(backend=backend)
+    for i in range(100):
+        points.append(i, -i)
+    assert len(points) == 100 and points[99].longitude == -99
+
+
+def test_slices_are_views_that_share_the_columns(backend):
+    points = make(backend)
+    view = points[::2]
+    assert view.is_view and len(view) == 2
+    view[1].latitude = 0.0
+    assert points[2].latitude == 0.0
+    with pytest.raises(TypeError):
+        view.append(1.0, 2.0)
+
+
+def test_reversed_and_empty_views(backend):
+    points = make(backend)
+    assert list(points[::-1].column('latitude')) == [-33.9, 40.7, 48.9, 51.5]
+    assert list(points[:0].column('latitude')) == []
+    assert list(points[0:0:-1].column('latitude')) == []
+    with pytest.raises(ValueError):
+        points[:0].bounding_box()
+
+
+def test_bulk_queries(backend):
+    points = make(backend)
+    assert points.bounding_box() == (-33.9, -74.0, 51.5, 151.2)
+    assert list(points.within_bbox(40, -10, 60, 10)) == [0, 1]
+    assert list(points[1:].within_bbox(40, -10, 60, 10)) == [0]  # positions within the view
+    london_paris = points.distances_from(51.5, -0.1)[1]
+    assert 330 < london_paris < 350
+    assert list(points.within_radius(51.5, -0.1, 500)) == [0, 1]
+
+
+def test_the_array_can_grow_after_a_query():
+    points = make('array')
+    points.bounding_box()  # releases its memoryviews
+    points.append(0.0, 0.0)
+    assert len(points) == 5
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        CoordinateArray(backend='list')
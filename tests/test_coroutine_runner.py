@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from coroutine_runner import CoroutinePipeline, Stage, StageError, logger, validator
+
+
+def collector(results, lock=None):
+    lock = lock or threading.Lock()
+    while True:
+        item = yield
+        with lock:
+            results.append(item)
+
+
+def broken(target=None):
+    raise ConnectionError("database is down")
+    yield  # makes this a generator function
+
+
+def fails_on(bad, target=None):
+    while True:
+        item = yield
+        if item == bad:
+            raise ValueError(item)
+        target.send(item)
+
+
+def test_items_flow_through_every_stage():
+    results = []
+    with CoroutinePipeline([Stage(logger), Stage(validator, maxsize=5),
+                            Stage(collector, results, replicas=3, maxsize=5)]) as pipeline:
+        for i in range(200):
+            pipeline.send(f"message-{i}")
+        pipeline.send("hi")  # too short: validator drops it
+    assert sorted(results) == sorted(f"message-{i}" for i in range(200))
+    assert [s['processed'] for s in pipeline.stats()] == [201, 201, 200]
+
+
+def test_a_failing_item_restarts_the_coroutine():
+    results = []
+    with CoroutinePipeline([Stage(fails_on, 'bad'), Stage(collector, results)]) as pipeline:
+        for item in ['a', 'bad', 'b']:
+            pipeline.send(item)
+    assert results == ['a', 'b']
+    assert pipeline.stats()[0]['errors'] == 1
+
+
+def test_a_stage_that_cannot_start_fails_send_fast():
+    pipeline = CoroutinePipeline([Stage(logger, maxsize=2), Stage(broken, maxsize=2)]).start()
+    deadline = time.monotonic() + 5
+    with pytest.raises(StageError) as info:
+        while time.monotonic() < deadline:  # the queues are tiny: this would block forever
+            pipeline.send('item')
+    assert "ConnectionError: database is down" in str(info.value)
+    assert info.value.worker == 'broken-0' and 'Traceback' in info.value.details
+    pipeline.close(check=False)  # drained, so close() doesn't hang either
+
+
+def test_close_reports_the_failure():
+    with pytest.raises(StageError):
+        with CoroutinePipeline([Stage(broken)]):
+            pass
+
+
+def test_close_does_not_mask_the_block_exception():
+    with pytest.raises(KeyError):
+        with CoroutinePipeline([Stage(broken)]):
+            raise KeyError('mine')
+
+
+def test_send_after_close():
+    pipeline = CoroutinePipeline([Stage(logger)]).start()
+    pipeline.close()
+    with pytest.raises(RuntimeError):
+        pipeline.send('late')
+
+
+def test_stage_validates_mode():
+    with pytest.raises(ValueError):
+        Stage(logger, mode='fiber')
+
+
+def test_process_stage_failure_is_reported():
+    with pytest.raises(StageError, match="database is down"):
+        with CoroutinePipeline([Stage(logger), Stage(broken, mode='process')]) as pipeline:
+            pipeline.send('item')
@@ -0,0 +1,64 @@
+import sys
+
+from deep_sizeof import deep_sizeof, format_report, iter_graph, object_graph_report
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class SlottedPoint:
+    __slots__ = ['x', 'y']
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def test_counts_the_contents_not_just_the_container():
+    numbers = [1000 + i for i in range(100)]
+    assert deep_sizeof(numbers) == sys.getsizeof(numbers) + sum(map(sys.getsizeof, numbers))
+
+
+def test_shared_objects_are_counted_once():
+    item = 'x' * 1000
+    assert deep_sizeof([item, item]) == sys.getsizeof([item, item]) + sys.getsizeof(item)
+
+
+def test_instance_dicts_and_their_keys_are_included():
+    point = Point(1.5, 2.5)
+    kinds = {type(obj) for obj, _ in iter_graph([point])}
+    assert {Point, dict, float, str} <= kinds
+    assert deep_sizeof(point) > deep_sizeof(SlottedPoint(1.5, 2.5))
+
+
+def test_classes_and_functions_are_not_walked():
+    assert deep_sizeof([Point, len]) == sys.getsizeof([Point, len])
+
+
+def test_cycles_and_deep_chains():
+    cycle = []
+    cycle.append(cycle)
+    assert deep_sizeof(cycle) == sys.getsizeof(cycle)
+    chain = None
+    for _ in range(100_000):  # deeper than the recursion limit
+        chain = [chain]
+    assert sum(1 for _ in iter_graph([chain])) == 100_001  # the lists and None
+
+
+def test_report_by_type_and_shared_bytes():
+    shared = 'y' * 500
+    report = object_graph_report({'a': [shared], 'b': [shared]}, per_root=True)
+    assert report['object_count'] == 3
+    assert report['by_type'][0]['type'] == 'str'
+    assert report['shared_bytes'] == sys.getsizeof(shared)
+    text = format_report(report)
+    assert 'Shared between roots' in text and 'a:' in text
+
+
+def test_report_top_and_list_roots():
+    report = object_graph_report([[1.5], ('z',)], top=1)
+    assert len(report['by_type']) == 1
+    assert 'per_root' not in report
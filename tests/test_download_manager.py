@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+
+from download_manager import DownloadManager  # noqa: E402
+from local_server import payload, run_server  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def download(jobs, **options):
+    manager = DownloadManager(progress_interval=0, **options)
+    return [event async for event in manager.run(jobs)]
+
+
+def kinds(events):
+    return [event.kind for event in events if event.kind != 'progress']
+
+
+def test_download_then_skip(tmp_path):
+    path = str(tmp_path / 'f.bin')
+
+    async def main():
+        async with run_server(latency=0) as (base_urls, _):
+            url = f"{base_urls[0]}/files/f?size=300000"
+            return await download([(url, path)]), await download([(url, path)])
+
+    first, second = run(main())
+    assert kinds(first) == ['started', 'completed']
+    assert kinds(second) == ['skipped']
+    assert open(path, 'rb').read() == payload(300000)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['f.bin']
+
+
+def test_resume_sends_if_range(tmp_path):
+    path = str(tmp_path / 'f.bin')
+    (tmp_path / 'f.bin.part').write_bytes(payload(1000))
+    (tmp_path / 'f.bin.part.validator').write_text('"f-5000-0"')
+
+    async def main():
+        async with run_server(latency=0) as (base_urls, stats):
+            events = await download([(f"{base_urls[0]}/files/f?size=5000", path)])
+            return events, stats
+
+    events, stats = run(main())
+    assert kinds(events) == ['resumed', 'completed']
+    assert stats.bytes_sent == 4000
+    assert open(path, 'rb').read() == payload(5000)
+
+
+def test_changed_file_is_downloaded_again(tmp_path):
+    path = str(tmp_path / 'f.bin')
+    (tmp_path / 'f.bin.part').write_bytes(b'x' * 1000)  # an older version of the file
+    (tmp_path / 'f.bin.part.validator').write_text('"f-5000-0"')
+
+    async def main():
+        async with run_server(latency=0) as (base_urls, _):
+            return await download([(f"{base_urls[0]}/files/f?size=5000&version=1", path)])
+
+    assert kinds(run(main())) == ['started', 'completed']
+    assert open(path, 'rb').read() == payload(5000)
+
+
+def test_416_completes_only_a_part_of_the_right_length(tmp_path):
+    whole, long = str(tmp_path / 'whole.bin'), str(tmp_path / 'long.bin')
+    (tmp_path / 'whole.bin.part').write_bytes(payload(5000))
+    (tmp_path / 'long.bin.part').write_bytes(b'x' * 6000)
+
+    async def main():
+        async with run_server(latency=0) as (base_urls, _):
+            return (await download([(f"{base_urls[0]}/files/w?size=5000", whole)]),
+                    await download([(f"{base_urls[0]}/files/l?size=5000", long)]))
+
+    whole_events, long_events = run(main())
+    assert kinds(whole_events) == ['completed']
+    assert kinds(long_events) == ['started', 'completed']
+    assert open(whole, 'rb').read() == open(long, 'rb').read() == payload(5000)
+
+
+def test_unknown_total_length(tmp_path):
+    path = str(tmp_path / 'f.bin')
+    (tmp_path / 'f.bin.part').write_bytes(b'01234')
+
+    async def handler(request):
+        assert request.headers['Range'] == 'bytes=5-'
+        return web.Response(status=206, body=b'56789', headers={'Content-Range': 'bytes 5-9/*'})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/f', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            return await download([(f"http://127.0.0.1:{port}/f", path)])
+        finally:
+            await runner.cleanup()
+
+    events = run(main())
+    assert kinds(events) == ['resumed', 'completed']
+    assert events[-1].total is None
+    assert open(path, 'rb').read() == b'0123456789'
+
+
+def test_concurrent_runs_are_rejected(tmp_path):
+    async def main():
+        async with run_server(latency=0.1) as (base_urls, _):
+            manager = DownloadManager()
+            first = manager.run([(f"{base_urls[0]}/files/a?size=10", str(tmp_path / 'a'))])
+            await first.__anext__()
+            with pytest.raises(RuntimeError):
+                await manager.run([]).__anext__()
+            async for _ in first:
+                pass
+            return [event.kind async for event in manager.run([])]
+
+    assert run(main()) == []
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from fetch_engine import FetchEngine, host_key, latency_summary  # noqa: E402
+from local_server import run_server  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_host_key():
+    assert host_key("http://example.com/a?b=1") == "http://example.com:80"
+    assert host_key("https://example.com:8443/") == "https://example.com:8443"
+
+
+def test_fetch_all_in_order():
+    async def main():
+        async with run_server(latency=0.01, jitter=0.02, payload_bytes=100) as (base_urls, _):
+            urls = [f"{base_urls[0]}/data/{i}" for i in range(30)]
+            async with FetchEngine(concurrency=5, per_host=5) as engine:
+                results = [r async for r in engine.fetch_all(urls, window=4)]
+                return urls, results, engine
+
+    urls, results, engine = run(main())
+    assert [r.url for r in results] == urls
+    assert all(r.ok and r.nbytes == 100 and len(r.body) == 100 for r in results)
+    assert engine._host_slots == {}  # no semaphore left behind for idle hosts
+    assert latency_summary(results, 1.0)['ok'] == 30
+
+
+def test_a_busy_host_does_not_hold_global_slots():
+    async def main():
+        async with run_server(latency=0.1, ports=(0, 0)) as (base_urls, _):
+            slow, other = base_urls
+            async with FetchEngine(concurrency=2, per_host=1) as engine:
+                urls = [f"{slow}/data/{i}" for i in range(4)] + [f"{other}/data/0"]
+                return await asyncio.gather(*(engine.fetch(url) for url in urls))
+
+    results = run(main())
+    assert all(r.ok for r in results)
+    # Three requests wait for the busy host's single slot, not for a global one
+    assert results[-1].queued < 0.05
+
+
+def test_errors_come_back_as_results():
+    async def main():
+        async with run_server(latency=0.2) as (base_urls, _):
+            async with FetchEngine(keep_body=False) as engine:
+                slow = await engine.fetch(f"{base_urls[0]}/data/0", timeout=0.02)
+                failed = await engine.fetch(f"{base_urls[0]}/data/0?status=503&latency=0")
+                refused = await engine.fetch("http://127.0.0.1:9/")
+                return slow, failed, refused
+
+    slow, failed, refused = run(main())
+    assert slow.error == 'timeout'
+    assert failed.status == 503 and not failed.ok and failed.body is None
+    assert refused.error and refused.error.startswith('Client')
@@ -0,0 +1,88 @@
+import gc
+
+import pytest
+
+from gc_quiet import GCMonitor, compare_collection_cost, gc_quiet
+
+
+class Node:
+    def __init__(self, value):
+        self.value = value
+
+
+def build(n=20_000):
+    return [Node(i) for i in range(n)]
+
+
+def test_disables_the_collector_and_restores_it():
+    assert gc.isenabled()
+    with gc_quiet() as quiet:
+        assert not gc.isenabled()
+        data = build()
+    assert gc.isenabled()
+    assert quiet.stats['collections'] == [0, 0, 0]
+    assert quiet.stats['tracked_allocations'] >= 20_000
+    assert sum(quiet.stats['estimated_collections_avoided']) > 0
+    del data
+
+
+def test_retunes_the_thresholds_and_restores_them():
+    before = gc.get_threshold()
+    with gc_quiet(threshold=(50_000, 20, 100)):
+        assert gc.isenabled() and gc.get_threshold()[0] == 50_000
+    assert gc.get_threshold() == before
+
+
+def test_state_is_restored_when_the_block_raises():
+    quiet = gc_quiet(freeze=True)
+    frozen = gc.get_freeze_count()
+    with pytest.raises(KeyError):
+        with quiet:
+            raise KeyError('boom')
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == frozen and quiet.stats['frozen_objects'] == 0
+
+
+def test_nested_blocks_leave_the_collector_as_they_found_it():
+    with gc_quiet():
+        with gc_quiet(threshold=(10_000, 10, 10)):
+            assert not gc.isenabled()  # retuning doesn't undo the outer pause
+            assert gc.get_threshold()[0] == 10_000
+        assert not gc.isenabled() and gc.get_threshold()[0] != 10_000
+    assert gc.isenabled()
+
+
+def test_freeze_moves_the_survivors_to_the_permanent_generation():
+    try:
+        with gc_quiet(freeze=True) as quiet:
+            data = build(1000)
+        assert quiet.stats['frozen_objects'] >= 1000
+        assert gc.get_freeze_count() >= 1000
+        del data
+    finally:
+        gc.unfreeze()
+
+
+def test_decorator_keeps_the_last_stats():
+    @gc_quiet()
+    def load(n):
+        assert not gc.isenabled()
+        return build(n)
+
+    assert load.last_stats is None
+    assert len(load(100)) == 100
+    assert load.last_stats['collections'] == [0, 0, 0]
+    assert load.__name__ == 'load'
+
+
+def test_monitor_sees_collections():
+    with GCMonitor() as monitor:
+        gc.collect()
+    assert monitor.collections[2] >= 1
+    assert gc.callbacks.count(monitor._callback) == 0
+
+
+def test_compare_collection_cost():
+    result = compare_collection_cost(build, 5000)
+    assert sum(result['quiet_collections']) <= sum(result['normal_collections'])
+    assert result['time_saved_s'] == result['normal_s'] - result['quiet_s']
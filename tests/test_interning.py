@@ -0,0 +1,72 @@
+import csv
+import io
+
+from interning import DictionaryColumn, InternTable, encode_columns, intern_rows, interned_csv_reader
+
+
+def test_equal_values_share_one_object():
+    table = InternTable()
+    a = table.intern(''.join(['Ger', 'many']))
+    b = table.intern(''.join(['Germ', 'any']))
+    assert a is b
+    assert table.hits == 1 and table.misses == 1
+
+
+def test_values_of_different_types_stay_apart():
+    table = InternTable()
+    assert type(table.intern(1)) is int
+    assert type(table.intern(1.0)) is float
+    assert table.intern(True) is True
+    assert len(table) == 3
+
+
+def test_lru_eviction():
+    table = InternTable(max_size=2)
+    table.intern('a')
+    table.intern('b')
+    table.intern('a')  # 'a' is now the most recently used
+    table.intern('c')
+    assert 'a' in table and 'c' in table and 'b' not in table
+    assert table.evictions == 1
+
+
+def test_unhashable_values_pass_through():
+    table = InternTable()
+    value = ['3']
+    assert table.intern(value) is value
+    assert len(table) == 0 and table.misses == 0
+
+
+def test_ragged_csv(tmp_path):
+    path = tmp_path / 'ragged.csv'
+    path.write_text('a,b\n1,2,3\n1,2\n')
+    rows = list(interned_csv_reader(path))
+    assert rows == [{'a': '1', 'b': '2', None: ['3']}, {'a': '1', 'b': '2'}]
+    assert rows[0]['a'] is rows[1]['a']
+
+
+def test_intern_rows_only_named_fields():
+    rows = [{'id': str(i * 1000), 'country': ''.join(['Fr', 'ance'])} for i in range(2)]
+    out = list(intern_rows(rows, fields=['country']))
+    assert out[0]['country'] is out[1]['country']
+
+
+def test_dictionary_column_widens_codes():
+    column = DictionaryColumn(range(300))
+    assert column.codes.typecode == 'H'
+    assert list(column) == list(range(300))
+    assert column.code(299) == 299 and column.code('missing') is None
+
+
+def test_encode_columns_union_of_keys():
+    rows = [{'a': 'x'}, {'a': 'x', 'b': 'y'}, {'b': None}]
+    columns = encode_columns(rows, dictionary_fields=('a',))
+    assert list(columns['a']) == ['x', 'x', None]
+    assert columns['b'] == [None, 'y', None]
+
+
+def test_encode_columns_ragged_csv():
+    columns = encode_columns(csv.DictReader(io.StringIO('a,b\n1,2,3\n1,2\n')),
+                             dictionary_fields=('a',))
+    assert list(columns['a']) == ['1', '1']
+    assert columns[None] == [['3'], None]
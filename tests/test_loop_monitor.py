@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from loop_monitor import Histogram, LoopMonitor
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram('h', start=1.0, factor=2.0, buckets=3)  # 1, 2, 4, +Inf
+    for seconds in [0.5, 1.0, 1.5, 3.0, 10.0]:
+        histogram.observe(seconds)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.export()['buckets'] == {1.0: 2, 2.0: 3, 4.0: 4, float('inf'): 5}
+    assert histogram.quantile(0.4) == 1.0
+    assert histogram.quantile(1.0) == 10.0  # the +Inf bucket reports the max
+    assert Histogram('empty').quantile(0.5) == 0.0
+    assert 'p99' in histogram.render() and 'no observations' in Histogram('e').render()
+
+
+def test_records_tasks_and_blocking_with_the_stack():
+    def parse_everything():
+        time.sleep(0.2)  # blocks the loop
+
+    async def main():
+        async with LoopMonitor(threshold=0.05, interval=0.01) as monitor:
+            await asyncio.gather(*(asyncio.sleep(0.01) for _ in range(5)))
+            parse_everything()
+            await asyncio.sleep(0.05)
+        return monitor
+
+    monitor = asyncio.run(main())
+    assert monitor.scheduling_delay.count == 5 and monitor.task_lifetime.count == 5
+    assert monitor.loop_lag.count > 0
+    episode = max(monitor.episodes, key=lambda e: e.duration)
+    assert episode.duration >= 0.15
+    assert any('parse_everything' in frame for frame in episode.stack)
+    assert 'blocking episodes over 50 ms' in monitor.report()
+
+
+def test_uninstall_restores_the_previous_task_factory():
+    created = []
+
+    def factory(loop, coro, **kwargs):
+        created.append(coro.__name__)
+        return asyncio.Task(coro, loop=loop, **kwargs)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_task_factory(factory)
+        async with LoopMonitor() as monitor:
+            await asyncio.create_task(asyncio.sleep(0))
+        assert loop.get_task_factory() is factory
+        return monitor
+
+    monitor = asyncio.run(main())
+    assert created[0] == 'sleep' and monitor.task_lifetime.count == 1
+    assert not monitor._watchdog.is_alive()
+
+
+def test_prometheus_text():
+    monitor = LoopMonitor()
+    monitor.loop_lag.observe(0.001)
+    text = monitor.prometheus_text()
+    assert '# TYPE asyncio_loop_lag_seconds histogram' in text
+    assert 'asyncio_loop_lag_seconds_bucket{le="+Inf"} 1' in text
+    assert 'asyncio_task_scheduling_delay_seconds_count 0' in text
+    assert monitor.export()['histograms']['loop lag (heartbeat lateness)']['count'] == 1
@@ -0,0 +1,86 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from memory_profile import MemoryBudgetExceeded, memory_profile
+
+
+@pytest.fixture(autouse=True)
+def no_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_report_sees_the_block_allocations():
+    with memory_profile("block", top=3) as prof:
+        data = [bytes(1000) for _ in range(1000)]
+    assert not tracemalloc.is_tracing()
+    assert prof.report['peak_mb'] > 0.9
+    assert prof.report['top'] and len(prof.report['top']) <= 3
+    assert "block: peak" in prof.summary()
+    del data
+
+
+def test_overlapping_profilers_keep_tracing_until_the_last_exits():
+    outer, inner = memory_profile("outer"), memory_profile("inner")
+    outer.__enter__()
+    inner.__enter__()
+    outer.__exit__(None, None, None)  # not LIFO: the starter exits first
+    assert tracemalloc.is_tracing()
+    data = bytes(2_000_000)
+    inner.__exit__(None, None, None)
+    assert not tracemalloc.is_tracing()
+    assert inner.report['peak_mb'] > 1.9
+    del data
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    with memory_profile():
+        pass
+    assert tracemalloc.is_tracing()
+
+
+def test_tracing_stopped_inside_the_block():
+    with pytest.warns(RuntimeWarning, match="stopped"):
+        with memory_profile("stopped") as prof:
+            tracemalloc.stop()
+    assert prof.report['top'] == []
+
+
+def test_inner_peak_is_folded_into_the_outer_profiler():
+    with memory_profile() as outer:
+        with memory_profile():
+            data = bytes(3_000_000)
+            del data
+    assert outer.report['peak_mb'] > 2.8
+
+
+def test_budget_raises_after_the_report_is_written():
+    output = io.StringIO()
+
+    @memory_profile(budget_mb=0.5, output=output)
+    def allocate():
+        return bytes(1_000_000)
+
+    with pytest.raises(MemoryBudgetExceeded) as info:
+        allocate()
+    assert info.value.report is allocate.last_report
+    assert json.loads(output.getvalue())['over_budget'] is True
+
+
+def test_budget_does_not_mask_the_block_exception():
+    with pytest.raises(KeyError):
+        with memory_profile(budget_mb=0.001):
+            data = bytes(1_000_000)
+            raise KeyError(len(data))
+
+
+def test_group_by_is_validated():
+    with pytest.raises(ValueError):
+        memory_profile(group_by='function')
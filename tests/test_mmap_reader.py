@@ -0,0 +1,59 @@
+import concurrent.futures
+
+from mmap_reader import (process_large_file, process_large_file_parallel, process_range,
+                         split_ranges, windowed_results)
+
+TEXT = ''.join(f"línea {i} ünïcode\n" for i in range(200)) + "no newline at the end"
+
+
+def write(tmp_path, text=TEXT):
+    path = tmp_path / 'data.txt'
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_ranges_cover_the_file_and_end_on_newlines(tmp_path):
+    path = write(tmp_path)
+    data = open(path, 'rb').read()
+    ranges = split_ranges(path, 100)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+
+
+def test_a_range_never_splits_a_character(tmp_path):
+    path = write(tmp_path)
+    lines = [line for start, end in split_ranges(path, 7)
+             for line in process_range(path, start, end)]
+    assert lines == list(process_large_file(path))
+
+
+def test_parallel_matches_the_sequential_generator(tmp_path):
+    path = write(tmp_path)
+    expected = list(process_large_file(path))
+    assert list(process_large_file_parallel(path, workers=2, chunk_bytes=256)) == expected
+    unordered = process_large_file_parallel(path, workers=2, chunk_bytes=256, ordered=False)
+    assert sorted(unordered) == sorted(expected)
+    counts = process_large_file_parallel(path, workers=2, chunk_bytes=256, per_range=len)
+    assert sum(counts) == len(expected)
+
+
+def test_empty_file(tmp_path):
+    path = write(tmp_path, '')
+    assert split_ranges(path) == []
+    assert list(process_large_file_parallel(path)) == []
+
+
+def test_windowed_results_keeps_at_most_window_in_flight():
+    submitted = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        def submit(start, end):
+            submitted.append(start)
+            return executor.submit(lambda: start)
+
+        results = windowed_results(submit, [(i, i + 1) for i in range(10)], window=3)
+        assert next(results) == 0
+        assert len(submitted) == 4  # three primed, one refilled after the first result
+        assert [0, *results] == list(range(10))
+        unordered = windowed_results(submit, [(i, i + 1) for i in range(10)], 3, ordered=False)
+        assert sorted(unordered) == list(range(10))
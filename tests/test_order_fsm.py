@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from order_fsm import ORDER_ACTIONS, ORDER_FSM, CompiledFSM, OrderStates, state_machine
+
+
+def legacy_state_machine():
+    """examples.py's if/elif version, for reference."""
+    state = 'pending'
+    while True:
+        action = yield state
+        if state == 'pending':
+            if action == 'pay':
+                state = 'paid'
+            elif action == 'cancel':
+                state = 'cancelled'
+        elif state == 'paid':
+            if action == 'ship':
+                state = 'shipped'
+            elif action == 'refund':
+                state = 'refunded'
+        elif state == 'shipped':
+            if action == 'deliver':
+                state = 'delivered'
+
+
+def random_events(orders, count, seed=11):
+    random.seed(seed)
+    names = ORDER_ACTIONS + ('unknown',)
+    return ([random.randrange(orders) for _ in range(count)],
+            [random.choice(names) for _ in range(count)])
+
+
+def legacy_states(orders, order_ids, actions):
+    machines = [legacy_state_machine() for _ in range(orders)]
+    states = [next(machine) for machine in machines]
+    for order_id, action in zip(order_ids, actions):
+        states[order_id] = machines[order_id].send(action)
+    return states
+
+
+def test_compatibility_wrapper_matches_examples():
+    order, legacy = state_machine(), legacy_state_machine()
+    assert next(order) == next(legacy) == 'pending'
+    for action in ['ship', 'pay', 'bogus', 'ship', 'refund', 'deliver', 'cancel']:
+        assert order.send(action) == legacy.send(action)
+
+
+def test_send_and_apply_match_one_generator_per_order():
+    order_ids, actions = random_events(50, 2000)  # many events per order in one batch
+    expected = legacy_states(50, order_ids, actions)
+
+    one_by_one = OrderStates(count=50)
+    for order_id, action in zip(order_ids, actions):
+        one_by_one.send(order_id, action)
+    batched = OrderStates(count=50)
+    changed = batched.apply(order_ids, actions)
+    by_id = OrderStates(count=50)
+    by_id.apply(order_ids, ORDER_FSM.encode_actions(actions))
+
+    for states in (one_by_one, batched, by_id):
+        assert [states.state(i) for i in range(50)] == expected
+    assert 0 < changed <= 150  # at most three transitions per order
+
+
+def test_out_of_range_action_ids():
+    states = OrderStates(count=2)
+    with pytest.raises(ValueError):
+        states.apply([0], [ORDER_FSM.n_actions])
+    with pytest.raises(ValueError):
+        ORDER_FSM.encode_actions([-1])
+
+
+def test_apply_range_and_counts():
+    states = OrderStates()
+    assert states.add_orders(10) == range(0, 10)
+    states.apply_range(0, 6, 'pay')
+    states.apply_range(4, 10, 'ship')  # only 4 and 5 are paid
+    assert states.counts() == {'pending': 4, 'paid': 4, 'shipped': 2, 'delivered': 0,
+                               'cancelled': 0, 'refunded': 0}
+    assert states.nbytes() >= 10
+
+
+def test_compiled_machine():
+    assert ORDER_FSM.states[0] == 'pending'
+    assert ORDER_FSM.terminal == {'delivered', 'cancelled', 'refunded'}
+    fsm = CompiledFSM(['off', 'on'], ['toggle'],
+                      {('off', 'toggle'): 'on', ('on', 'toggle'): 'off'}, initial='on')
+    assert fsm.states == ('on', 'off') and not fsm.terminal
+    assert fsm.step(fsm.step(0, 'toggle'), 'toggle') == 0
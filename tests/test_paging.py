@@ -0,0 +1,74 @@
+import array
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from paging import PagedData, PrefetchingPageIterator
+from prefetch import Handoff
+
+
+def test_copy_mode_matches_page_iterator():
+    assert list(PagedData(list(range(10)), page_size=3)) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+
+
+def test_view_mode_shares_memory():
+    data = bytearray(b'abcdefgh')
+    paged = PagedData(data, page_size=3)
+    assert paged.mode == 'view'
+    pages = list(paged)
+    data[0:1] = b'X'
+    assert bytes(pages[0]) == b'Xbc' and [bytes(p) for p in pages[1:]] == [b'def', b'gh']
+
+
+def test_view_mode_on_an_array_pages_elements():
+    pages = list(PagedData(array.array('i', range(5)), page_size=2))
+    assert [p.tolist() for p in pages] == [[0, 1], [2, 3], [4]]
+
+
+def test_lazy_mode_never_calls_len():
+    paged = PagedData((i for i in range(5)), page_size=2)
+    assert paged.mode == 'lazy'
+    assert list(paged) == [[0, 1], [2, 3], [4]]
+
+
+def test_prefetch_gives_the_same_pages():
+    assert list(PagedData(iter(range(10)), page_size=4, prefetch=2)) == [
+        [0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_prefetch_reraises_the_source_error():
+    def source():
+        yield 1
+        raise KeyError('boom')
+
+    pages = PagedData(source(), page_size=1, prefetch=1)
+    with pytest.raises(KeyError):
+        list(pages)
+
+
+def test_prefetch_thread_stops_when_the_loop_ends_early():
+    iterator = PrefetchingPageIterator(iter([[i] for i in range(1000)]), depth=1)
+    with iterator:
+        assert next(iterator) == [0]
+    iterator._thread.join(timeout=2)
+    assert not iterator._thread.is_alive()
+    with pytest.raises(StopIteration):
+        next(iterator)
+
+
+def test_prefetch_rejects_a_sqlite3_cursor():
+    cursor = sqlite3.connect(':memory:').execute('select 1')
+    with pytest.raises(ValueError, match='prefetch'):
+        PagedData(cursor, prefetch=1)
+    assert list(PagedData(cursor, page_size=5)) == [[(1,)]]
+
+
+def test_handoff_put_gives_up_once_stopped():
+    handoff = Handoff(maxsize=1)
+    assert handoff.put(1)
+    threading.Timer(0.05, handoff.stop.set).start()
+    start = time.perf_counter()
+    assert handoff.put(2) is False
+    assert time.perf_counter() - start < 1
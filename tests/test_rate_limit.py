@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from rate_limit import AIMDLimiter, FixedLimiter, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_token_bucket_paces_after_the_burst():
+    async def main():
+        bucket = TokenBucket(rate=100, burst=5)
+        start = time.perf_counter()
+        await asyncio.gather(*(bucket.acquire() for _ in range(15)))
+        return time.perf_counter() - start, bucket
+
+    elapsed, bucket = run(main())
+    assert 0.08 <= elapsed < 0.5  # 10 tokens beyond the burst at 100/s
+    assert bucket.stats.acquired == 15 and bucket.stats.waited >= 9
+
+
+def test_token_bucket_rejects_impossible_requests():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        run(TokenBucket(rate=10, burst=2).acquire(3))
+
+
+def test_aimd_caps_in_flight_and_queues_the_rest():
+    peak = 0
+
+    async def main():
+        limiter = AIMDLimiter(initial=3, maximum=3)
+
+        @limiter
+        async def call():
+            nonlocal peak
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(12)))
+        return limiter
+
+    limiter = run(main())
+    assert peak == 3 and limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_aimd_cuts_on_errors_once_per_episode():
+    clock = Clock()
+
+    async def main():
+        limiter = AIMDLimiter(initial=8, clock=clock)
+        for _ in range(3):
+            await limiter.acquire()
+        clock.now = 1.0
+        for _ in range(3):  # all three started before the first cut
+            limiter.release(ConnectionError())
+        return limiter
+
+    limiter = run(main())
+    assert limiter.limit == 4 and limiter.cuts == 1
+
+
+def test_aimd_grows_when_saturated():
+    clock = Clock()
+
+    async def main():
+        limiter = AIMDLimiter(initial=2, maximum=10, latency_target=1.0, clock=clock)
+        for _ in range(20):
+            await limiter.acquire()
+            await limiter.acquire()
+            clock.now += 0.1
+            limiter.release()
+            limiter.release()
+        return limiter
+
+    assert run(main()).limit > 2
+
+
+def test_nested_acquires_in_one_task_keep_their_own_start_times():
+    clock = Clock()
+
+    async def main():
+        limiter = AIMDLimiter(initial=8, latency_target=5.0, clock=clock)
+        async with limiter:
+            clock.now = 1.0
+            async with limiter:
+                clock.now = 2.0  # the inner call took 1 s: fine
+            clock.now = 10.0  # the outer one took 10 s: over the target
+        return limiter
+
+    limiter = run(main())
+    assert limiter.cuts == 1 and limiter.limit == 4
+    assert len(limiter._started) == 0
+
+
+def test_release_from_another_task_frees_the_slot():
+    async def release(limiter):
+        limiter.release()
+
+    async def main():
+        limiter = AIMDLimiter(initial=1)
+        await limiter.acquire()
+        await asyncio.create_task(release(limiter))
+        await asyncio.wait_for(limiter.acquire(), 1)
+        return limiter
+
+    limiter = run(main())
+    assert limiter.in_flight == 1 and limiter.cuts == 0
+
+
+def test_fixed_limiter():
+    async def main():
+        limiter = FixedLimiter(2)
+        async with limiter:
+            async with limiter:
+                assert limiter._semaphore.locked()
+        return limiter
+
+    assert run(main()).stats.acquired == 2
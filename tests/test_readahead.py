@@ -0,0 +1,88 @@
+import asyncio
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+import async_pipeline
+from readahead import read_files
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"part_{i}.csv"
+        path.write_text(''.join(f"{i},{j}\n" for j in range(50)))
+        paths.append(str(path))
+    return paths
+
+
+def expected_lines(paths):
+    lines = []
+    for path in paths:
+        with open(path) as file:
+            lines.extend(file)
+    return lines
+
+
+@pytest.mark.parametrize('prefetch', [1, 3, 10])
+def test_lines_in_filename_order(files, prefetch):
+    assert list(read_files(*files, prefetch=prefetch, chunk_size=64)) == expected_lines(files)
+
+
+@pytest.mark.parametrize('opener', [gzip.open, bz2.open, lzma.open])
+def test_compressed_files(tmp_path, opener):
+    suffix = {gzip.open: '.gz', bz2.open: '.bz2', lzma.open: '.xz'}[opener]
+    path = str(tmp_path / f"big.csv{suffix}")
+    with opener(path, 'wt') as file:
+        file.writelines(f"{i}\n" for i in range(10000))
+    assert list(read_files(path)) == [f"{i}\n" for i in range(10000)]
+    assert b''.join(read_files(path, mode='bytes', chunk_size=1000)) == \
+        ''.join(f"{i}\n" for i in range(10000)).encode()
+
+
+def test_missing_warn_prints(files, capsys):
+    lines = list(read_files(files[0], 'nope.csv', files[1]))
+    assert lines == expected_lines(files[:2])
+    assert capsys.readouterr().out == "Warning: nope.csv not found\n"
+
+
+def test_missing_skip_raise_and_callable(files, capsys):
+    assert list(read_files('nope.csv', files[0], missing='skip')) == expected_lines(files[:1])
+    with pytest.raises(FileNotFoundError):
+        list(read_files(files[0], 'nope.csv', missing='raise'))
+    seen = []
+    list(read_files('nope.csv', missing=lambda name, error: seen.append((name, type(error)))))
+    assert seen == [('nope.csv', FileNotFoundError)]
+    assert capsys.readouterr().out == ''
+    with pytest.raises(ValueError):
+        list(read_files(files[0], missing='ignore'))
+
+
+def test_async_pipeline_uses_the_same_missing_policy(files, capsys):
+    async def lines(missing):
+        return [line async for line in async_pipeline.read_files(files[0], 'nope.csv',
+                                                                 missing=missing)]
+
+    assert asyncio.run(lines('warn')) == expected_lines(files[:1])
+    assert capsys.readouterr().out == "Warning: nope.csv not found\n"
+    seen = []
+    asyncio.run(lines(lambda name, error: seen.append(name)))
+    assert seen == ['nope.csv']
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(lines('raise'))
+
+
+def test_other_errors_are_raised(tmp_path):
+    path = tmp_path / 'bad.txt'
+    path.write_bytes(b'\xff\xfe\n')
+    with pytest.raises(UnicodeDecodeError):
+        list(read_files(str(path)))
+
+
+def test_stopping_early(files):
+    reader = read_files(*files, prefetch=4, chunk_size=16)
+    assert next(reader) == "0,0\n"
+    reader.close()
@@ -0,0 +1,81 @@
+import array
+import random
+from collections import deque
+
+import pytest
+
+from ring_buffer import RingBuffer
+
+
+def test_matches_a_bounded_deque():
+    random.seed(7)
+    ring, reference = RingBuffer(5, 'i'), deque(maxlen=5)
+    for _ in range(500):
+        op = random.choice(['append', 'appendleft', 'pop', 'popleft', 'extend'])
+        if op in ('pop', 'popleft'):
+            if reference:
+                assert getattr(ring, op)() == getattr(reference, op)()
+            continue
+        if op == 'extend':
+            values = [random.randrange(100) for _ in range(random.randrange(8))]
+            ring.extend(values)
+            reference.extend(values)
+        else:
+            value = random.randrange(100)
+            getattr(ring, op)(value)
+            getattr(reference, op)(value)
+        assert list(ring) == list(reference)
+    assert [ring[i] for i in range(-len(ring), len(ring))] == list(reference) * 2
+
+
+def test_overwrite_false_raises_when_full():
+    ring = RingBuffer(2, overwrite=False)
+    ring.extend([1.0, 2.0])
+    with pytest.raises(IndexError):
+        ring.append(3.0)
+    with pytest.raises(IndexError):
+        ring.extend([3.0])
+    assert list(ring) == [1.0, 2.0]
+
+
+def test_empty_buffer():
+    ring = RingBuffer(3)
+    with pytest.raises(IndexError):
+        ring.pop()
+    with pytest.raises(IndexError):
+        ring[0]
+    with pytest.raises(ValueError):
+        ring.min()
+    assert ring.sum() == 0 and ring.mean() == 0.0
+    assert [len(s) for s in ring.segments()] == [0]
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+def test_segments_are_live_zero_copy_views():
+    ring = RingBuffer(4, 'i')
+    for value in range(6):
+        ring.append(value)  # wraps: 2, 3 | 4, 5
+    first, second = ring.segments()
+    assert first.tolist() + second.tolist() == [2, 3, 4, 5]
+    assert [s.tolist() for s in ring.segments(last=1)] == [[5]]
+    ring.append(6)
+    assert 6 in first.tolist() + second.tolist()
+
+
+def test_extend_from_buffers_of_another_type():
+    ring = RingBuffer(4, 'd')
+    ring.extend(array.array('d', [1.5, 2.5]))
+    ring.extend(array.array('i', [3, 4]))
+    assert ring.to_array() == array.array('d', [1.5, 2.5, 3.0, 4.0])
+    ring.extend(range(10))
+    assert list(ring) == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_window_statistics():
+    ring = RingBuffer(4, 'i')
+    ring.extend([5, 1, 9, 3, 7])  # keeps 1, 9, 3, 7
+    assert ring.sum() == 20 and ring.mean() == 5.0
+    assert ring.sum(last=2) == 10 and ring.mean(last=2) == 5.0
+    assert ring.min() == 1 and ring.max(last=2) == 7
+    assert ring.sum(last=0) == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from scheduler import CANCELLED, FAILED, OK, TIMED_OUT, Scheduler, TaskSpec
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Backend:
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def fetch(self, value='v'):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return value
+
+
+async def fails():
+    raise ConnectionError('reset')
+
+
+def test_fixed_hedge_wins_against_a_slow_primary():
+    backend = Backend(0.5, 0.01)
+    outcome = run(Scheduler().execute(TaskSpec(backend.fetch, hedge=0.02)))
+    assert outcome.ok and outcome.hedged and outcome.hedge_won
+    assert backend.calls == 2 and outcome.elapsed < 0.2
+
+
+def test_no_hedge_without_a_hedge_delay(monkeypatch):
+    real_wait = asyncio.wait
+    early = []
+
+    async def wakes_early(tasks, timeout=None, **kwargs):
+        if not early:  # return once before the timeout, as a loop clock can
+            early.append(timeout)
+            return set(), set(tasks)
+        return await real_wait(tasks, timeout=timeout, **kwargs)
+
+    monkeypatch.setattr(asyncio, 'wait', wakes_early)
+    backend = Backend(0.01)
+    outcome = run(Scheduler().execute(TaskSpec(backend.fetch, timeout=1.0)))
+    assert early and outcome.ok and not outcome.hedged and backend.calls == 1
+
+
+def test_timeouts_are_recorded_at_the_timeout():
+    scheduler = Scheduler()
+    outcome = run(scheduler.execute(TaskSpec(Backend(1.0).fetch, timeout=0.02, key='k')))
+    assert outcome.status == TIMED_OUT
+    assert list(scheduler._latencies['k']) == [0.02]
+
+
+def test_learned_hedge_delay_needs_enough_samples():
+    scheduler = Scheduler(hedge_min_samples=3)
+    spec = TaskSpec(Backend(0.01).fetch, hedge=True, key='k')
+    assert scheduler.hedge_delay(spec) is None
+    for seconds in (0.01, 0.02, 0.03, 0.5):
+        scheduler.record_latency('k', seconds)
+    assert scheduler.hedge_delay(spec) == 0.5
+    assert Scheduler().hedge_delay(TaskSpec(Backend(0).fetch)) is None
+
+
+def test_failure_is_an_outcome():
+    outcome, = run(Scheduler().run([TaskSpec(fails)]))
+    assert outcome.status == FAILED and isinstance(outcome.error, ConnectionError)
+
+
+def test_quorum_cancels_the_stragglers():
+    specs = [TaskSpec(Backend(0.01).fetch, i) for i in range(3)] + [TaskSpec(Backend(5).fetch)]
+    outcomes = run(Scheduler().run(specs, quorum=3))
+    assert [o.status for o in outcomes] == [OK, OK, OK, CANCELLED]
+
+
+def test_deadline_times_out_running_tasks_and_cancels_queued_ones():
+    specs = [TaskSpec(Backend(5).fetch, name='slow'), TaskSpec(Backend(0).fetch, name='queued')]
+    outcomes = run(Scheduler(concurrency=1).run(specs, deadline=0.05))
+    assert [o.status for o in outcomes] == [TIMED_OUT, CANCELLED]
+
+
+def test_priority_sets_the_start_order():
+    started = []
+
+    async def task(name):
+        started.append(name)
+        await asyncio.sleep(0)
+        return name
+
+    specs = [TaskSpec(task, 'low'), TaskSpec(task, 'high', priority=5),
+             TaskSpec(task, 'mid', priority=1)]
+    outcomes = run(Scheduler(concurrency=1).run(specs))
+    assert started == ['high', 'mid', 'low']
+    assert [o.value for o in outcomes] == ['low', 'high', 'mid']
+
+
+@pytest.mark.parametrize('hedge', [None, False])
+def test_hedge_off(hedge):
+    assert Scheduler().hedge_delay(TaskSpec(fails, hedge=hedge)) is None
@@ -0,0 +1,70 @@
+import pytest
+
+from schema_csv import ORDER_SCHEMA, Field, ParseStats, Prefixed, Schema, split_ranges
+
+SCHEMA = Schema(Field('name'), Field('price', float, default=0.0),
+                Field('processed_date', Prefixed('parsed_'), source='date'))
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_read_converts_by_position(tmp_path):
+    path = write(tmp_path / 'a.csv', 'date,name,price\n2023-01-01,a,1.5\n2023-01-02,b,\n')
+    assert list(SCHEMA.read(path)) == [('a', 1.5, 'parsed_2023-01-01'),
+                                       ('b', 0.0, 'parsed_2023-01-02')]
+
+
+def test_bad_rows_are_rejected_not_fatal(tmp_path):
+    path = write(tmp_path / 'a.csv', 'name,price,date\na,1,d\nb,N/A,d\n\nc,2\nd,3,d\n')
+    rejects = []
+    stats = ParseStats()
+    rows = list(SCHEMA.read(path, on_reject=lambda line, row, error: rejects.append(line),
+                            stats=stats))
+    assert [row[0] for row in rows] == ['a', 'd']
+    assert rejects == [3, 5]
+    assert (stats.rows, stats.rejected) == (2, 2)
+
+
+def test_records(tmp_path):
+    path = write(tmp_path / 'a.csv', 'name,price,date\na,1,2023-01-01\n')
+    record, = ORDER_SCHEMA.read(path)
+    assert record.astuple() == ('a', 1.0, '2023-01-01', 'parsed_2023-01-01')
+    assert repr(record).startswith('Order(name=')
+
+
+def test_missing_columns_are_listed_once(tmp_path):
+    path = write(tmp_path / 'a.csv', 'name,price\na,1\n')
+    with pytest.raises(ValueError) as info:
+        list(ORDER_SCHEMA.read(path))
+    assert "['date']" in str(info.value)
+
+
+def test_empty_file(tmp_path):
+    path = write(tmp_path / 'empty.csv', '')
+    assert list(SCHEMA.read(path)) == []
+    assert list(SCHEMA.read_parallel(path, workers=1)) == []
+
+
+def test_header_only(tmp_path):
+    path = write(tmp_path / 'header.csv', 'name,price,date\n')
+    assert split_ranges(path, 16, offset=16) == []
+    assert list(SCHEMA.read_parallel(path, workers=1)) == []
+
+
+def test_read_parallel_matches_read(tmp_path):
+    lines = ['name,price,date']
+    for i in range(2000):
+        lines.append(f"item{i},{'N/A' if i % 97 == 0 else i / 4},2023-01-{i % 28 + 1:02d}")
+    path = write(tmp_path / 'big.csv', '\n'.join(lines) + '\n')
+    sequential, parallel = [], []
+    rows = list(ORDER_SCHEMA.read(path, on_reject=lambda line, *_: sequential.append(line)))
+    stats = ParseStats()
+    parallel_rows = list(ORDER_SCHEMA.read_parallel(
+        path, workers=2, chunk_bytes=4096, stats=stats,
+        on_reject=lambda line, *_: parallel.append(line)))
+    assert [r.astuple() for r in parallel_rows] == [r.astuple() for r in rows]
+    assert parallel == sequential
+    assert stats.rows == len(rows) and stats.rejected == len(sequential)
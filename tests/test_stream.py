@@ -0,0 +1,71 @@
+import pytest
+
+from stream import Stream, divisible_by
+
+
+def square(x):
+    return x * x
+
+
+def plain(source, modulus):
+    return [x for x in source if x % modulus == 0]
+
+
+@pytest.mark.parametrize('source', [range(10), range(3, 100, 7), range(50, -20, -3), range(0)])
+@pytest.mark.parametrize('modulus', [1, 3, 4, 1000])
+def test_pushdown_matches_a_plain_filter(source, modulus):
+    stream = Stream(source).filter(divisible_by(modulus))
+    assert isinstance(stream.source, range) and not stream.stages
+    assert stream.to_list() == plain(source, modulus)
+
+
+def test_remainder():
+    assert Stream(range(20)).filter(divisible_by(5, remainder=2)).to_list() == [2, 7, 12, 17]
+
+
+def test_negative_modulus_is_not_pushed_down():
+    stream = Stream(range(10)).filter(divisible_by(-3))
+    assert stream.stages
+    assert stream.to_list() == [0, 3, 6, 9]
+
+
+def test_float_modulus_is_not_pushed_down():
+    assert Stream(range(10)).filter(divisible_by(2.5)).to_list() == [0, 5]
+
+
+def test_take_and_skip_on_a_range_become_slices():
+    stream = Stream(range(100)).skip(90).take(3)
+    assert stream.source == range(90, 93) and not stream.stages
+    assert Stream(range(5)).take(-1).to_list() == []
+
+
+def test_fused_stages_match_nested_generators():
+    data = list(range(50))
+    expected = [square(x) for x in (x + 1 for x in data[4:]) if x % 3][:7]
+    stream = Stream(data).skip(4).map(lambda x: x + 1).filter(lambda x: x % 3).map(square).take(7)
+    assert stream.to_list() == expected
+    assert stream.to_list() == expected  # a Stream can be iterated again
+
+
+def test_take_stops_pulling_from_the_source():
+    pulled = []
+
+    def source():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    assert Stream(source()).map(square).take(3).to_list() == [0, 1, 4]
+    assert pulled == [0, 1, 2]
+
+
+def test_chunk():
+    assert Stream(range(7)).chunk(3).to_list() == [[0, 1, 2], [3, 4, 5], [6]]
+    assert Stream(range(7)).chunk(3).map(len).take(2).to_list() == [3, 3]
+    with pytest.raises(ValueError):
+        Stream(range(7)).chunk(0)
+
+
+def test_reduce():
+    assert Stream(range(5)).reduce(lambda a, b: a + b) == 10
+    assert Stream([]).reduce(lambda a, b: a + b, 0) == 0
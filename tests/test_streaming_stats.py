@@ -0,0 +1,78 @@
+import math
+import random
+import statistics
+
+import pytest
+
+from streaming_stats import EWMA, Moments, SlidingWindow, StreamStats, TDigest, running_stats
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(5)
+    return [rng.lognormvariate(3, 0.6) for _ in range(20000)]
+
+
+def test_moments_match_statistics(values):
+    one_by_one = Moments()
+    for value in values:
+        one_by_one.add(value)
+    batched = Moments().update(values[:7000]).merge(Moments().update(values[7000:]))
+    for moments in (one_by_one, batched):
+        assert moments.count == len(values)
+        assert moments.mean == pytest.approx(statistics.fmean(values))
+        assert moments.variance == pytest.approx(statistics.variance(values))
+        assert (moments.min, moments.max) == (min(values), max(values))
+
+
+def test_ewma_merge_is_exact_for_consecutive_chunks(values):
+    whole = EWMA(alpha=0.05).update(values)
+    merged = EWMA(alpha=0.05).update(values[:123]).merge(EWMA(alpha=0.05).update(values[123:]))
+    assert merged.value == pytest.approx(whole.value)
+    with pytest.raises(ValueError):
+        EWMA()
+
+
+def test_tdigest_quantiles(values):
+    digest = TDigest().update(values)
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[int(q * (len(values) - 1))]
+        assert digest.quantile(q) == pytest.approx(exact, rel=0.02)
+    assert digest.quantile(0) == ordered[0] and digest.quantile(1) == ordered[-1]
+    assert len(digest) <= 200
+    with pytest.raises(ValueError):
+        TDigest().quantile(0.5)
+
+
+def test_sliding_window_drops_old_values():
+    window = SlidingWindow(window=10, buckets=10)
+    for second in range(30):
+        window.update([second] * 10, now=second)
+    stats = window.stats(now=29)
+    assert (stats.count, stats.min, stats.max) == (100, 20, 29)
+    window.add(5, now=5)  # too late: its slot now holds newer values
+    assert window.dropped == 1 and window.stats(now=29).count == 100
+
+
+def test_running_stats_send_is_cheap_and_quantiles_lazy():
+    stats = running_stats()
+    first = next(stats)
+    assert first['count'] == 0 and 'p50' not in first
+    assert stats.send(10)['mean'] == 10.0
+    assert stats.send(20)['mean'] == 15.0
+    summary = stats.send([30, 40])
+    assert summary['mean'] == 25.0
+    assert summary._stats is not None  # nothing has asked for a quantile yet
+    assert summary['p50'] == pytest.approx(25.0, abs=10)
+    assert set(summary) == {'count', 'mean', 'stdev', 'min', 'max', 'ewma', 'p50', 'p90', 'p99'}
+
+
+def test_running_stats_summary_matches_streamstats(values):
+    stats = running_stats()
+    next(stats)
+    summary = dict(stats.send(values[:5000]))
+    reference = StreamStats().update(values[:5000]).summary()
+    assert summary.keys() == reference.keys()
+    for key, value in reference.items():
+        assert summary[key] == pytest.approx(value) or math.isnan(value)
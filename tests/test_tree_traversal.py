@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from tree_traversal import ORDERS, BinaryNode, CompactTree, TreeNode, flatten, traverse
+
+
+def binary_tree():
+    return BinaryNode(1,
+                      BinaryNode(2, BinaryNode(4), BinaryNode(5)),
+                      BinaryNode(3, None, BinaryNode(7)))
+
+
+def random_tree(size, seed=5):
+    random.seed(seed)
+    nodes = [TreeNode(0)]
+    for i in range(1, size):
+        child = TreeNode(i)
+        random.choice(nodes).children.append(child)
+        nodes.append(child)
+    return nodes[0]
+
+
+def recursive(node, order):
+    """The yield-from traversal from examples.py, for reference."""
+    kids = node.children
+    if order == 'preorder':
+        yield node.value
+    for i, child in enumerate(kids):
+        if order == 'inorder' and i == 1:
+            yield node.value
+        yield from recursive(child, order)
+    if order == 'postorder' or (order == 'inorder' and len(kids) < 2):
+        yield node.value
+
+
+def test_binary_orders():
+    root = binary_tree()
+    assert list(root.traverse('preorder')) == [1, 2, 4, 5, 3, 7]
+    assert list(root.traverse('postorder')) == [4, 5, 2, 7, 3, 1]
+    assert list(root.traverse('inorder')) == [4, 2, 5, 1, 3, 7]
+    assert list(root.traverse('bfs')) == [1, 2, 3, 4, 5, 7]
+    assert list(root.traverse('levels')) == [[1], [2, 3], [4, 5, 7]]
+    assert list(root) == [1, 2, 4, 5, 3, 7]
+
+
+@pytest.mark.parametrize('order', ['preorder', 'postorder', 'inorder'])
+def test_nary_orders_match_the_recursive_version(order):
+    root = random_tree(300)
+    assert list(root.traverse(order)) == list(recursive(root, order))
+
+
+def test_deeper_than_the_recursion_limit():
+    root = node = TreeNode(0)
+    for i in range(1, 50_000):
+        child = TreeNode(i)
+        node.children.append(child)
+        node = child
+    assert list(traverse(root, 'postorder'))[:2] == [49_999, 49_998]
+    assert sum(1 for _ in CompactTree.from_nodes(root).traverse()) == 50_000
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_compact_tree_matches_the_node_tree(order):
+    root = random_tree(500)
+    compact = CompactTree.from_nodes(root)
+    assert len(compact) == 500
+    assert list(compact.traverse(order)) == list(root.traverse(order))
+
+
+def test_empty_and_unknown():
+    assert list(traverse(None)) == []
+    assert list(CompactTree([], [0]).traverse()) == []
+    with pytest.raises(ValueError):
+        traverse(binary_tree(), 'zigzag')
+
+
+def test_flatten():
+    assert list(flatten([1, [2, [3, []], 4], [[5]], 6])) == [1, 2, 3, 4, 5, 6]
+    deep = [0]
+    for i in range(1, 10_000):
+        deep = [deep, i]
+    assert list(flatten(deep)) == list(range(10_000))
@@ -0,0 +1,341 @@
+"""Struct-of-arrays storage for millions of coordinates.
+
+A list of slotted Coordinate objects still pays one object header per point
+plus three boxed floats. CoordinateArray keeps latitude, longitude and
+altitude in three contiguous columns of C doubles (array('d'), or NumPy
+arrays when NumPy is installed) and only builds a small proxy object when
+you index a single element.
+"""
+import array
+import math
+import sys
+from contextlib import ExitStack, contextmanager
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - array('d') columns work everywhere
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class Coordinate:
+    __slots__ = ['latitude', 'longitude', 'altitude']
+
+    def __init__(self, lat, lon, alt=0):
+        self.latitude = lat
+        self.longitude = lon
+        self.altitude = alt
+
+    def __repr__(self):
+        return f"Coordinate({self.latitude}, {self.longitude}, {self.altitude})"
+
+
+class CoordinateProxy:
+    """Lazy view of one row - reads and writes go straight to the columns."""
+    __slots__ = ['_store', '_index']
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def latitude(self):
+        return float(self._store.columns[0][self._index])
+
+    @latitude.setter
+    def latitude(self, value):
+        self._store.columns[0][self._index] = value
+
+    @property
+    def longitude(self):
+        return float(self._store.columns[1][self._index])
+
+    @longitude.setter
+    def longitude(self, value):
+        self._store.columns[1][self._index] = value
+
+    @property
+    def altitude(self):
+        return float(self._store.columns[2][self._index])
+
+    @altitude.setter
+    def altitude(self, value):
+        self._store.columns[2][self._index] = value
+
+    def to_coordinate(self):
+        """Materialize a standalone Coordinate (copies the three values)."""
+        return Coordinate(self.latitude, self.longitude, self.altitude)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Coordinate, CoordinateProxy)):
+            return NotImplemented
+        return (self.latitude, self.longitude, self.altitude) == \
+               (other.latitude, other.longitude, other.altitude)
+
+    def __repr__(self):
+        return f"Coordinate({self.latitude}, {self.longitude}, {self.altitude})"
+
+
+class _ColumnStore:
+    """The three growable columns shared by an array and all of its views."""
+    __slots__ = ['columns', 'size', 'numpy']
+
+    def __init__(self, use_numpy):
+        self.numpy = use_numpy
+        self.size = 0
+        if use_numpy:
+            self.columns = [np.empty(16, dtype=np.float64) for _ in range(3)]
+        else:
+            self.columns = [array.array('d') for _ in range(3)]
+
+    def _reserve(self, needed):
+        # NumPy arrays can't grow in place, so keep spare capacity and double
+        # it when full - that keeps append amortized O(1) like array.append
+        capacity = len(self.columns[0])
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for i, old in enumerate(self.columns):
+            grown = np.empty(new_capacity, dtype=np.float64)
+            grown[:self.size] = old[:self.size]
+            self.columns[i] = grown
+
+    def append(self, lat, lon, alt):
+        if self.numpy:
+            self._reserve(self.size + 1)
+            lats, lons, alts = self.columns
+            lats[self.size] = lat
+            lons[self.size] = lon
+            alts[self.size] = alt
+        else:
+            lats, lons, alts = self.columns
+            lats.append(lat)
+            lons.append(lon)
+            alts.append(alt)
+        self.size += 1
+
+    def extend(self, lats, lons, alts):
+        count = len(lats)
+        if self.numpy:
+            self._reserve(self.size + count)
+            end = self.size + count
+            for col, values in zip(self.columns, (lats, lons, alts)):
+                col[self.size:end] = values
+        else:
+            for col, values in zip(self.columns, (lats, lons, alts)):
+                col.extend(values)
+        self.size += count
+
+
+class CoordinateArray:
+    """Columnar container of coordinates with bulk queries.
+
+    Slicing returns a view that shares the parent's columns, so ``points[::10]``
+    costs a few dozen bytes no matter how many rows it covers.
+    """
+    __slots__ = ['_store', '_rows']
+
+    def __init__(self, coordinates=(), backend=None):
+        if backend is None:
+            backend = 'numpy' if np is not None else 'array'
+        if backend not in ('array', 'numpy'):
+            raise ValueError(f"Unknown backend: {backend!r}")
+        if backend == 'numpy' and np is None:
+            raise ImportError("backend='numpy' requires NumPy to be installed")
+        self._store = _ColumnStore(backend == 'numpy')
+        self._rows = None  # None means "every row"; views hold a range
+        for coord in coordinates:
+            self.append(*_unpack(coord))
+
+    @classmethod
+    def from_columns(cls, latitudes, longitudes, altitudes=None, backend=None):
+        """Build from whole columns in one bulk copy."""
+        result = cls(backend=backend)
+        result.extend(latitudes, longitudes, altitudes)
+        return result
+
+    @property
+    def backend(self):
+        return 'numpy' if self._store.numpy else 'array'
+
+    @property
+    def is_view(self):
+        return self._rows is not None
+
+    def _row_range(self):
+        return range(self._store.size) if self._rows is None else self._rows
+
+    def _check_writable(self):
+        if self._rows is not None:
+            raise TypeError("Cannot grow a slice view; append to the parent array")
+
+    def append(self, lat, lon, alt=0):
+        """Add one point - amortized O(1), no per-point objects."""
+        self._check_writable()
+        self._store.append(lat, lon, alt)
+
+    def extend(self, latitudes, longitudes, altitudes=None):
+        """Add whole columns at once."""
+        self._check_writable()
+        if altitudes is None:
+            altitudes = [0.0] * len(latitudes)
+        if not len(latitudes) == len(longitudes) == len(altitudes):
+            raise ValueError("Columns must all have the same length")
+        self._store.extend(latitudes, longitudes, altitudes)
+
+    def __len__(self):
+        return len(self._row_range())
+
+    def __getitem__(self, key):
+        rows = self._row_range()
+        if isinstance(key, slice):
+            view = CoordinateArray.__new__(CoordinateArray)
+            view._store = self._store
+            view._rows = rows[key]
+            return view
+        return CoordinateProxy(self._store, rows[key])
+
+    def __iter__(self):
+        store = self._store
+        for index in self._row_range():
+            yield CoordinateProxy(store, index)
+
+    def __repr__(self):
+        kind = "view" if self.is_view else "array"
+        return f"<CoordinateArray {kind} of {len(self):,} points ({self.backend})>"
+
+    @contextmanager
+    def _columns(self):
+        """Yield (lats, lons, alts) for just these rows, without copying.
+
+        array('d') columns are exposed as memoryview slices, which must be
+        released before the array can be resized - hence the context manager.
+        """
+        rows = self._row_range()
+        if not rows:
+            # An empty reversed range like range(-1, -1, -1) would otherwise
+            # become slice(-1, None, -1): every row, backwards
+            window = slice(0, 0)
+        else:
+            # A reversed view ends at -1, which a slice would read as "last row"
+            window = slice(rows.start, rows.stop if rows.stop >= 0 else None, rows.step)
+        if self._store.numpy:
+            size = self._store.size
+            yield tuple(col[:size][window] for col in self._store.columns)
+            return
+        with ExitStack() as stack:
+            views = []
+            for col in self._store.columns:
+                whole = stack.enter_context(memoryview(col))
+                views.append(stack.enter_context(whole[window]))
+            yield tuple(views)
+
+    def column(self, name):
+        """Return a copy of one column as array('d') (or a NumPy array)."""
+        index = ('latitude', 'longitude', 'altitude').index(name)
+        with self._columns() as columns:
+            values = columns[index]
+            if self._store.numpy:
+                return values.copy()
+            return array.array('d', values)
+
+    def bounding_box(self):
+        """Return (min_lat, min_lon, max_lat, max_lon) without creating Coordinates."""
+        if not len(self):
+            raise ValueError("bounding_box() of an empty CoordinateArray")
+        with self._columns() as (lats, lons, _):
+            if self._store.numpy:
+                return (float(lats.min()), float(lons.min()),
+                        float(lats.max()), float(lons.max()))
+            return (min(lats), min(lons), max(lats), max(lons))
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Return positions (relative to this array/view) inside the box."""
+        with self._columns() as (lats, lons, _):
+            if self._store.numpy:
+                mask = (lats >= min_lat) & (lats <= max_lat) & \
+                       (lons >= min_lon) & (lons <= max_lon)
+                return np.flatnonzero(mask)
+            return array.array('q', (
+                i for i, (lat, lon) in enumerate(zip(lats, lons))
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+            ))
+
+    def distances_from(self, lat, lon):
+        """Great-circle (haversine) distance in km from (lat, lon) to every point."""
+        rlat = math.radians(lat)
+        rlon = math.radians(lon)
+        cos_rlat = math.cos(rlat)
+        with self._columns() as (lats, lons, _):
+            if self._store.numpy:
+                plat = np.radians(lats)
+                plon = np.radians(lons)
+                a = np.sin((plat - rlat) / 2) ** 2 + \
+                    cos_rlat * np.cos(plat) * np.sin((plon - rlon) / 2) ** 2
+                return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+            radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+            result = array.array('d', bytes(8 * len(lats)))
+            for i, (plat, plon) in enumerate(zip(lats, lons)):
+                plat = radians(plat)
+                a = sin((plat - rlat) / 2) ** 2 + \
+                    cos_rlat * cos(plat) * sin((radians(plon) - rlon) / 2) ** 2
+                result[i] = 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+            return result
+
+    def within_radius(self, lat, lon, radius_km):
+        """Return positions of points within radius_km of (lat, lon)."""
+        distances = self.distances_from(lat, lon)
+        if self._store.numpy:
+            return np.flatnonzero(distances <= radius_km)
+        return array.array('q', (i for i, d in enumerate(distances) if d <= radius_km))
+
+    @property
+    def nbytes(self):
+        """Bytes held by the underlying columns (shared with any views)."""
+        if self._store.numpy:
+            return sum(col.nbytes for col in self._store.columns)
+        return sum(sys.getsizeof(col) for col in self._store.columns)
+
+
+def _unpack(coord):
+    if isinstance(coord, (Coordinate, CoordinateProxy)):
+        return coord.latitude, coord.longitude, coord.altitude
+    return tuple(coord)
+
+
+if __name__ == "__main__":
+    import random
+    import tracemalloc
+
+    n = 200_000
+    random.seed(42)
+    fixes = [(random.uniform(-90, 90), random.uniform(-180, 180), random.uniform(0, 3000))
+             for _ in range(n)]
+
+    tracemalloc.start()
+    objects = [Coordinate(lat, lon, alt) for lat, lon, alt in fixes]
+    objects_mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    columns = CoordinateArray(backend='array')
+    for lat, lon, alt in fixes:
+        columns.append(lat, lon, alt)
+    columns_mem, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{n:,} Coordinate objects: {objects_mem / 1024 / 1024:.2f} MB")
+    print(f"{n:,} points in CoordinateArray: {columns_mem / 1024 / 1024:.2f} MB")
+    print(f"Column bytes: {columns.nbytes:,}")
+
+    print(f"\nFirst point (lazy proxy): {columns[0]}")
+    every_tenth = columns[::10]
+    print(f"Slice view: {every_tenth}")
+
+    print(f"Bounding box: {columns.bounding_box()}")
+    in_europe = columns.within_bbox(35, -10, 70, 40)
+    print(f"Points in a Europe-sized box: {len(in_europe):,}")
+
+    near_london = columns.within_radius(51.5074, -0.1278, 1000)
+    print(f"Points within 1000 km of London: {len(near_london):,}")
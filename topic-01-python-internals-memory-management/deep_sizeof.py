@@ -0,0 +1,169 @@
+"""Deep memory accounting for object graphs.
+
+sys.getsizeof is shallow: a list of 1000 ints reports only the list's pointer
+array, and RegularPoint has to add its __dict__ by hand. deep_sizeof walks the
+whole graph with gc.get_referents, counting every object exactly once even
+when it is shared, and object_graph_report breaks the total down by type.
+
+The walk uses an explicit stack, so graphs with millions of nodes (or very
+deep linked structures) never hit the recursion limit.
+"""
+import gc
+import sys
+import types
+
+# Classes, modules and functions are shared program infrastructure, not part
+# of the data a cache holds, so the walk stops at them by default.
+SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+)
+
+
+def _instance_dict(obj):
+    """Return obj's __dict__ if it has a real one, else None.
+
+    Since Python 3.11 CPython may keep instance attributes inline and report
+    the values (not the dict) as referents. Asking for __dict__ materializes
+    it, which is what examples.py's "point + __dict__" accounting measures.
+    """
+    if isinstance(obj, type):
+        return None
+    try:
+        attrs = object.__getattribute__(obj, '__dict__')
+    except (AttributeError, TypeError):
+        return None
+    return attrs if type(attrs) is dict else None
+
+
+def iter_graph(roots, exclude=SHARED_TYPES, seen=None):
+    """Yield (obj, shallow_size) for every object reachable from roots, once each."""
+    if seen is None:
+        seen = set()
+    stack = list(roots)
+    getsizeof = sys.getsizeof
+    get_referents = gc.get_referents
+    while stack:
+        obj = stack.pop()
+        obj_id = id(obj)
+        if obj_id in seen or isinstance(obj, exclude):
+            continue
+        seen.add(obj_id)
+        yield obj, getsizeof(obj)
+
+        stack.extend(get_referents(obj))
+        if isinstance(obj, dict):
+            # dicts with only str keys don't report those keys to the GC
+            stack.extend(obj.keys())
+        attrs = _instance_dict(obj)
+        if attrs is not None:
+            stack.append(attrs)
+
+
+def deep_sizeof(obj, exclude=SHARED_TYPES):
+    """Total bytes of obj and everything it references, shared objects counted once."""
+    return sum(size for _, size in iter_graph([obj], exclude))
+
+
+def object_graph_report(roots, exclude=SHARED_TYPES, top=10, per_root=False):
+    """Size a set of roots together and break the total down by type.
+
+    roots may be a list of objects or a dict of {name: object}. With
+    per_root=True each root is also sized on its own; the difference between
+    the sum of those and the combined total is memory the roots share.
+    """
+    named = roots if isinstance(roots, dict) else {
+        f"root[{i}]": root for i, root in enumerate(roots)
+    }
+
+    by_type = {}
+    total_bytes = 0
+    object_count = 0
+    for obj, size in iter_graph(named.values(), exclude):
+        name = type(obj).__qualname__
+        entry = by_type.get(name)
+        if entry is None:
+            entry = by_type[name] = [0, 0]
+        entry[0] += 1
+        entry[1] += size
+        total_bytes += size
+        object_count += 1
+
+    ranked = sorted(by_type.items(), key=lambda item: item[1][1], reverse=True)
+    report = {
+        'total_bytes': total_bytes,
+        'object_count': object_count,
+        'by_type': [
+            {'type': name, 'count': count, 'bytes': size}
+            for name, (count, size) in ranked[:top]
+        ],
+    }
+    if per_root:
+        sizes = {name: deep_sizeof(root, exclude) for name, root in named.items()}
+        report['per_root'] = sizes
+        report['shared_bytes'] = sum(sizes.values()) - total_bytes
+    return report
+
+
+def format_report(report):
+    """Render an object_graph_report as the kind of table examples.py prints."""
+    lines = [f"Total: {report['total_bytes']:,} bytes in {report['object_count']:,} objects"]
+    for entry in report['by_type']:
+        lines.append(f"  {entry['type']:<20} {entry['count']:>10,} objects "
+                     f"{entry['bytes']:>14,} bytes")
+    if 'per_root' in report:
+        for name, size in report['per_root'].items():
+            lines.append(f"  {name}: {size:,} bytes on its own")
+        lines.append(f"  Shared between roots: {report['shared_bytes']:,} bytes")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import array
+
+    numbers_list = [i for i in range(1000)]
+    numbers_tuple = tuple(numbers_list)
+    numbers_set = set(numbers_list)
+
+    print("Shallow vs deep:")
+    for label, obj in [("List", numbers_list), ("Tuple", numbers_tuple), ("Set", numbers_set)]:
+        print(f"  {label}: {sys.getsizeof(obj):,} shallow, {deep_sizeof(obj):,} deep bytes")
+
+    class RegularPoint:
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+
+    class SlottedPoint:
+        __slots__ = ['x', 'y']
+
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+
+    regular_points = [RegularPoint(i, i*2) for i in range(1000)]
+    slotted_points = [SlottedPoint(i, i*2) for i in range(1000)]
+    numbers_array = array.array('i', range(1000))
+
+    print(f"\n1000 regular points: {deep_sizeof(regular_points):,} bytes")
+    print(f"1000 slotted points: {deep_sizeof(slotted_points):,} bytes")
+    print(f"Array of 1000 integers: {deep_sizeof(numbers_array):,} bytes")
+
+    # Two caches holding the same values: shared objects are counted once
+    values = [f"value-{i}" for i in range(10000)]
+    cache_a = {i: values[i] for i in range(10000)}
+    cache_b = {f"key-{i}": values[i] for i in range(0, 10000, 2)}
+    print()
+    print(format_report(object_graph_report({'cache_a': cache_a, 'cache_b': cache_b},
+                                            top=5, per_root=True)))
+
+    # A linked chain far deeper than the recursion limit
+    head = None
+    for i in range(200_000):
+        head = (i, head)
+    print(f"\n200,000-deep linked tuple chain: {deep_sizeof(head):,} bytes")
@@ -184,3 +184,13 @@ deque_time = timeit.timeit(lambda: efficient_deque.appendleft('new'), number=100
 print(f"List insert(0): {list_time:.6f} seconds")
 print(f"Deque appendleft: {deque_time:.6f} seconds")
 
+
+# RingBuffer (ring_buffer.py) keeps unboxed numbers in one preallocated array
+from ring_buffer import RingBuffer
+
+efficient_ring = RingBuffer(2000, 'd')
+efficient_ring.extend(range(1000))
+ring_time = timeit.timeit(lambda: efficient_ring.appendleft(1.0), number=1000)
+
+print(f"RingBuffer appendleft: {ring_time:.6f} seconds")
+# python ring_buffer.py 8  -> the same comparison at 10^6 to 10^8 elements
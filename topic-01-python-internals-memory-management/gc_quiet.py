@@ -0,0 +1,221 @@
+"""Keep the cyclic garbage collector out of bulk allocation phases.
+
+Reference counting frees most objects immediately, but every container
+object (lists, dicts, class instances...) also counts towards the cyclic
+collector's gen-0 threshold. Building 100k objects in a loop therefore
+triggers dozens of collections that scan the very objects being loaded -
+none of which are garbage. gc_quiet pauses (or retunes) the collector for
+such a phase, can gc.freeze() the loaded objects afterwards so later
+full collections skip them, and reports what it saved via gc.callbacks.
+
+Note that str, int and float objects are not tracked by the collector, so a
+loop like data.append(f"Item {i}") never triggers it in the first place.
+"""
+import functools
+import gc
+import time
+
+
+class GCMonitor:
+    """Context manager that records every collection through gc.callbacks."""
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.pause_ns = [0, 0, 0]
+        self.collected = 0
+        # gen-0 allocation counts that triggered each collection, used to
+        # estimate how many collections the default thresholds would need
+        self.triggering_allocations = 0
+        self._started = None
+
+    def _callback(self, phase, info):
+        if phase == 'start':
+            self._started = time.perf_counter_ns()
+            self.triggering_allocations += gc.get_count()[0]
+        elif self._started is not None:
+            generation = info['generation']
+            self.collections[generation] += 1
+            self.pause_ns[generation] += time.perf_counter_ns() - self._started
+            self.collected += info['collected']
+            self._started = None
+
+    def __enter__(self):
+        gc.callbacks.append(self._callback)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        gc.callbacks.remove(self._callback)
+        return False
+
+    @property
+    def pause_s(self):
+        return sum(self.pause_ns) / 1e9
+
+
+class gc_quiet:
+    """Pause or retune the cyclic GC for a block; usable as a decorator too.
+
+    threshold=None disables the collector for the block; a tuple such as
+    (50_000, 20, 100) instead raises the thresholds so it runs rarely.
+    freeze=True runs one collection and then gc.freeze()s everything still
+    alive, so long-lived loaded data is never scanned again.
+    """
+
+    def __init__(self, threshold=None, freeze=False):
+        self.threshold = threshold
+        self.freeze = freeze
+        self.stats = None
+
+    def __enter__(self):
+        self._was_enabled = gc.isenabled()
+        self._old_threshold = gc.get_threshold()
+        self._count_before = gc.get_count()[0]
+        self._monitor = GCMonitor().__enter__()
+        if self.threshold is None:
+            gc.disable()
+        else:
+            gc.set_threshold(*self.threshold)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self._start
+        count_after = gc.get_count()[0]
+        # Stop monitoring first: re-enabling usually triggers one catch-up
+        # collection right away, and that belongs to the code after the block
+        self._monitor.__exit__(None, None, None)
+        gc.set_threshold(*self._old_threshold)
+        if self._was_enabled:
+            gc.enable()
+
+        frozen = 0
+        if self.freeze and exc_type is None:
+            # Collect first so garbage made while loading isn't frozen forever
+            gc.collect()
+            before = gc.get_freeze_count()
+            gc.freeze()
+            frozen = gc.get_freeze_count() - before
+
+        self.stats = self._build_stats(elapsed, count_after, frozen)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            quiet = gc_quiet(self.threshold, self.freeze)
+            try:
+                with quiet:
+                    return func(*args, **kwargs)
+            finally:
+                wrapper.last_stats = quiet.stats
+        wrapper.last_stats = None
+        return wrapper
+
+    def _build_stats(self, elapsed, count_after, frozen):
+        monitor = self._monitor
+        # Net tracked allocations in the block, whether or not the GC ran: the
+        # count before the block was already part of the first collection's trigger
+        allocations = monitor.triggering_allocations + count_after - self._count_before
+        t0, t1, t2 = self._old_threshold
+        expected = [allocations // t0 if t0 else 0]
+        expected.append(expected[0] // t1 if t1 else 0)
+        expected.append(expected[1] // t2 if t2 else 0)
+        # A collection of generation N also counts as one for every younger one
+        expected = [expected[0] - expected[1], expected[1] - expected[2], expected[2]]
+        avoided = [max(0, e - c) for e, c in zip(expected, monitor.collections)]
+        return {
+            'elapsed_s': elapsed,
+            'tracked_allocations': max(0, allocations),
+            'collections': list(monitor.collections),
+            'pause_s': monitor.pause_s,
+            'estimated_collections_avoided': avoided,
+            'frozen_objects': frozen,
+        }
+
+
+def compare_collection_cost(func, *args, threshold=None, **kwargs):
+    """Run func once normally and once under gc_quiet; return both measurements.
+
+    This is how the time saved is actually measured. Both runs end with a
+    full collection (inside the timing) so the deferred scan of everything
+    gc_quiet let pile up in gen 0 is paid for, not hidden.
+    """
+    gc.collect()
+    with GCMonitor() as monitor:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        gc.collect()
+        normal_s = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    with GCMonitor() as settle:
+        start = time.perf_counter()
+        with gc_quiet(threshold) as quiet:
+            result = func(*args, **kwargs)
+        gc.collect()
+        quiet_s = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    return {
+        'normal_s': normal_s,
+        'normal_collections': monitor.collections,
+        'normal_pause_s': monitor.pause_s,
+        'quiet_s': quiet_s,
+        'quiet_collections': settle.collections,
+        'quiet_pause_s': settle.pause_s,
+        'time_saved_s': normal_s - quiet_s,
+    }
+
+
+class RegularPoint:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def build_items(n):
+    """The examples.py loop: strings only, so the collector never fires."""
+    data = []
+    for i in range(n):
+        data.append(f"Item {i}")
+    return data
+
+
+def build_points(n):
+    """The examples.py point lists, scaled up: every instance is GC-tracked."""
+    return [RegularPoint(i, i*2) for i in range(n)]
+
+
+def build_records(n):
+    """Dict-per-row loading, as a CSV reader would produce it."""
+    return [{'id': i, 'tags': [i, i + 1]} for i in range(n)]
+
+
+if __name__ == "__main__":
+    for label, func, n in [("10k f-strings", build_items, 10_000),
+                           ("100k RegularPoints", build_points, 100_000),
+                           ("1M RegularPoints", build_points, 1_000_000),
+                           ("500k dict records", build_records, 500_000)]:
+        result = compare_collection_cost(func, n)
+        print(f"=== {label} ===")
+        print(f"Normal:   {result['normal_s']:.3f}s, collections {result['normal_collections']}, "
+              f"GC pauses {result['normal_pause_s'] * 1000:.1f} ms")
+        print(f"gc_quiet: {result['quiet_s']:.3f}s, collections {result['quiet_collections']}, "
+              f"GC pauses {result['quiet_pause_s'] * 1000:.1f} ms")
+        print(f"Time saved: {result['time_saved_s'] * 1000:.1f} ms\n")
+
+    @gc_quiet(freeze=True)
+    def load_reference_data():
+        return build_records(200_000)
+
+    reference = load_reference_data()
+    print(f"Loaded {len(reference):,} records: {load_reference_data.last_stats}")
+    start = time.perf_counter()
+    gc.collect()
+    print(f"Full collection with the data frozen: {(time.perf_counter() - start) * 1000:.1f} ms")
+    gc.unfreeze()
+    start = time.perf_counter()
+    gc.collect()
+    print(f"Full collection after unfreeze: {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,256 @@
+"""Reusable tracemalloc harness: snapshot diffs, JSON reports and memory budgets.
+
+examples.py calls tracemalloc.start(), get_traced_memory() and
+take_snapshot().statistics('lineno') inline. memory_profile wraps that whole
+dance so it can be used as a context manager or a decorator:
+
+    with memory_profile("load orders", budget_mb=50) as prof:
+        orders = load_orders()
+    print(prof.to_json())
+
+    @memory_profile(group_by='traceback', output='profile.json')
+    def build_index():
+        ...
+
+When the block's peak memory goes over the budget, MemoryBudgetExceeded is
+raised after the report is written, so a CI job can gate on it.
+"""
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+GROUP_BY = ('filename', 'lineno', 'traceback')
+
+# Allocations made by the import system and by tracemalloc itself are noise
+# for almost every profile, so they are dropped unless filters=() is passed.
+DEFAULT_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+# Profilers currently inside their block. tracemalloc has a single peak, so
+# a profiler resetting it first folds the peak so far into every open one.
+_active = []
+# Whether tracemalloc is running because a profiler started it. Profilers can
+# overlap without nesting, so the last one to exit stops tracing, not the one
+# that started it.
+_started_tracing = False
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a profiled block's peak memory goes over its budget."""
+
+    def __init__(self, report):
+        self.report = report
+        if report['budget_mb'] is not None and report['peak_mb'] > report['budget_mb']:
+            detail = f"peak {report['peak_mb']:.2f} MB exceeds budget {report['budget_mb']:.2f} MB"
+        else:
+            detail = (f"peak RSS {report['peak_rss_mb']:.2f} MB exceeds "
+                      f"budget {report['rss_budget_mb']:.2f} MB")
+        super().__init__(f"{report['name']}: {detail}")
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes everywhere else
+    if sys.platform == 'darwin':
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+def _fold_peak(peak=None):
+    """Record the traced peak so far in every open profiler, before a reset_peak()."""
+    if peak is None:
+        _, peak = tracemalloc.get_traced_memory()
+    for profiler in _active:
+        profiler._seen_peak = max(profiler._seen_peak, peak)
+
+
+class memory_profile:
+    """Context manager / decorator that profiles the memory of a block."""
+
+    def __init__(self, name=None, group_by='lineno', top=10, budget_mb=None,
+                 rss_budget_mb=None, filters=DEFAULT_FILTERS, frames=None,
+                 output=None, raise_on_budget=True):
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {GROUP_BY}, not {group_by!r}")
+        self.name = name
+        self.group_by = group_by
+        self.top = top
+        self.budget_mb = budget_mb
+        self.rss_budget_mb = rss_budget_mb
+        self.filters = tuple(filters)
+        # Grouping by traceback is pointless with a single frame per trace
+        self.frames = frames or (25 if group_by == 'traceback' else 1)
+        self.output = output
+        self.raise_on_budget = raise_on_budget
+        self.report = None
+
+    def __enter__(self):
+        global _started_tracing
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            _started_tracing = True
+        elif tracemalloc.get_traceback_limit() < self.frames and self.group_by == 'traceback':
+            warnings.warn(
+                f"tracemalloc was started elsewhere with {tracemalloc.get_traceback_limit()} "
+                f"frame(s); group_by='traceback' reports only that many",
+                RuntimeWarning, stacklevel=2)
+        self._before = self._snapshot()
+        self._start_current, _ = tracemalloc.get_traced_memory()
+        _fold_peak()
+        tracemalloc.reset_peak()
+        self._seen_peak = 0
+        _active.append(self)
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _started_tracing
+        elapsed = time.perf_counter() - self._start_time
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+        else:
+            warnings.warn(f"tracemalloc was stopped inside {self.name or 'memory_profile'}; "
+                          f"the report only covers what was traced before that",
+                          RuntimeWarning, stacklevel=2)
+            current, peak = self._start_current, 0
+        _active.remove(self)
+        _fold_peak(peak)
+        peak = max(peak, self._seen_peak)
+        after = self._snapshot()
+        if not _active:
+            if tracing and _started_tracing:
+                tracemalloc.stop()
+            _started_tracing = False
+
+        self.report = self._build_report(after, current, peak, elapsed)
+        self._before = None
+        self._emit()
+
+        # Never mask the block's own exception with a budget failure
+        if exc_type is None and self.raise_on_budget and self.report['over_budget']:
+            raise MemoryBudgetExceeded(self.report)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh profiler per call keeps recursive/concurrent calls apart
+            profiler = memory_profile(
+                self.name or func.__qualname__, self.group_by, self.top,
+                self.budget_mb, self.rss_budget_mb, self.filters, self.frames,
+                self.output, self.raise_on_budget,
+            )
+            try:
+                with profiler:
+                    return func(*args, **kwargs)
+            finally:
+                wrapper.last_report = profiler.report
+        wrapper.last_report = None
+        return wrapper
+
+    def _snapshot(self):
+        if not tracemalloc.is_tracing():  # stopped by someone else
+            return tracemalloc.Snapshot((), tracemalloc.get_traceback_limit())
+        snapshot = tracemalloc.take_snapshot()
+        if self.filters:
+            snapshot = snapshot.filter_traces(self.filters)
+        return snapshot
+
+    def _build_report(self, after, current, peak, elapsed):
+        diff = after.compare_to(self._before, self.group_by)
+        top = []
+        for stat in diff[:self.top]:
+            frames = stat.traceback.format() if self.group_by == 'traceback' else None
+            frame = stat.traceback[0]
+            top.append({
+                'file': frame.filename,
+                'line': frame.lineno if self.group_by != 'filename' else None,
+                'size_diff_kb': stat.size_diff / 1024,
+                'size_kb': stat.size / 1024,
+                'count_diff': stat.count_diff,
+                'count': stat.count,
+                'traceback': frames,
+            })
+
+        peak_mb = (peak - self._start_current) / 1024 / 1024
+        peak_rss_mb = _peak_rss_mb()
+        over_budget = (
+            (self.budget_mb is not None and peak_mb > self.budget_mb) or
+            (self.rss_budget_mb is not None and peak_rss_mb is not None
+             and peak_rss_mb > self.rss_budget_mb)
+        )
+        return {
+            'name': self.name,
+            'group_by': self.group_by,
+            'elapsed_s': elapsed,
+            'current_mb': (current - self._start_current) / 1024 / 1024,
+            'peak_mb': peak_mb,
+            'peak_rss_mb': peak_rss_mb,
+            'budget_mb': self.budget_mb,
+            'rss_budget_mb': self.rss_budget_mb,
+            'over_budget': over_budget,
+            'top': top,
+        }
+
+    def _emit(self):
+        if self.output is None:
+            return
+        if isinstance(self.output, (str, os.PathLike)):
+            with open(self.output, 'w') as file:
+                file.write(self.to_json())
+        else:
+            self.output.write(self.to_json() + "\n")
+
+    def to_json(self, indent=2):
+        return json.dumps(self.report, indent=indent)
+
+    def summary(self):
+        """Human-readable version of the report, like the examples.py prints."""
+        report = self.report
+        lines = [
+            f"{report['name'] or 'memory_profile'}: "
+            f"peak {report['peak_mb']:.2f} MB, retained {report['current_mb']:.2f} MB "
+            f"in {report['elapsed_s']:.3f}s"
+        ]
+        for entry in report['top']:
+            where = entry['file'] if entry['line'] is None else f"{entry['file']}:{entry['line']}"
+            lines.append(f"  {where}: {entry['size_diff_kb']:+.1f} KiB "
+                         f"({entry['count_diff']:+d} blocks)")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    with memory_profile("10k strings", top=3) as prof:
+        data = []
+        for i in range(10000):
+            data.append(f"Item {i}")
+    print(prof.summary())
+
+    @memory_profile(group_by='filename', top=3, budget_mb=1)
+    def get_squares_list(n):
+        return [x**2 for x in range(n)]
+
+    try:
+        get_squares_list(100000)
+    except MemoryBudgetExceeded as e:
+        print(f"\nBudget check failed: {e}")
+
+    print("\nJSON report:")
+    print(json.dumps(get_squares_list.last_report, indent=2)[:400], "...")
@@ -0,0 +1,190 @@
+"""Memory-mapped, multi-process version of process_large_file.
+
+process_large_file in examples.py streams one line at a time through Python
+text I/O: memory-frugal, but single-core. Here the file is split into
+newline-aligned byte ranges and each range is handled by a process-pool
+worker that maps the same file itself, so only (start, end) offsets go over
+the pipe - never the file's contents.
+"""
+import concurrent.futures
+import mmap
+import os
+import time
+from collections import deque
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def process_large_file(filename):
+    """Generator that processes file line by line without loading everything into memory."""
+    with open(filename, 'r') as file:
+        for line in file:
+            # Process each line
+            yield line.strip().upper()
+
+
+def strip_upper(line):
+    """Default per-line transform - the same work process_large_file does."""
+    return line.strip().upper()
+
+
+def split_ranges(filename, chunk_bytes=DEFAULT_CHUNK_BYTES, offset=0):
+    """Return (start, end) byte ranges of about chunk_bytes, each ending on a newline.
+
+    The ranges cover the file from offset (e.g. just past a header line) to its end.
+    """
+    size = os.path.getsize(filename)
+    if size <= offset:
+        return []
+    ranges = []
+    with open(filename, 'rb') as file, \
+         mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = offset
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                newline = mapped.find(b'\n', end - 1)
+                end = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def process_range(filename, start, end, transform=strip_upper, encoding='utf-8',
+                  per_range=None):
+    """Worker: map the file, decode one byte range and transform its lines.
+
+    The transform gets each line without its trailing newline. Ranges always
+    end on b'\\n', so decoding a whole range never splits a multi-byte character.
+    If per_range is given, it is applied to the transformed lines inside the
+    worker and only its (usually much smaller) result is sent back.
+    """
+    with open(filename, 'rb') as file, \
+         mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        text = mapped[start:end].decode(encoding)
+    lines = text.split('\n')
+    if lines and lines[-1] == '':
+        lines.pop()
+    results = [transform(line) for line in lines]
+    if per_range is not None:
+        return [per_range(results)]
+    return results
+
+
+def windowed_results(submit, ranges, window, ordered=True):
+    """Generator of the results of submit(start, end) for each range.
+
+    submit returns a future; at most `window` of them are in flight at once,
+    so memory stays bounded however many ranges there are. Results come back
+    in range order, or as each one finishes with ordered=False.
+    """
+    pending_ranges = iter(ranges)
+
+    def submit_next():
+        for start, end in pending_ranges:
+            return submit(start, end)
+        return None
+
+    if ordered:
+        in_flight = deque()
+        for _ in range(window):
+            future = submit_next()
+            if future is None:
+                break
+            in_flight.append(future)
+        while in_flight:
+            result = in_flight.popleft().result()
+            future = submit_next()
+            if future is not None:
+                in_flight.append(future)
+            yield result
+    else:
+        in_flight = set()
+        for _ in range(window):
+            future = submit_next()
+            if future is None:
+                break
+            in_flight.add(future)
+        while in_flight:
+            done, in_flight = concurrent.futures.wait(
+                in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                next_future = submit_next()
+                if next_future is not None:
+                    in_flight.add(next_future)
+            for future in done:
+                yield future.result()
+
+
+def process_large_file_parallel(filename, transform=strip_upper, workers=None,
+                                chunk_bytes=DEFAULT_CHUNK_BYTES, ordered=True,
+                                encoding='utf-8', per_range=None):
+    """Generator yielding transformed lines, processed by a pool of worker processes.
+
+    transform (and per_range, if given) must be picklable module-level
+    functions. With per_range the generator yields one result per byte range
+    instead of one per line - e.g. per_range=len counts lines without shipping
+    them back to the parent process. With ordered=False results come back
+    range by range as soon as each range finishes. Only about two ranges per
+    worker are in flight at once, so memory stays bounded however large the
+    file is.
+    """
+    ranges = split_ranges(filename, chunk_bytes)
+    if not ranges:
+        return
+    workers = workers or os.cpu_count() or 1
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        submit = lambda start, end: executor.submit(process_range, filename, start, end,
+                                                    transform, encoding, per_range)
+        for lines in windowed_results(submit, ranges, workers * 2, ordered):
+            yield from lines
+
+
+def measure_throughput(label, lines, size_bytes):
+    """Drain a line generator and print how fast it went in MB/s."""
+    start_time = time.perf_counter()
+    count = 0
+    for _ in lines:
+        count += 1
+    elapsed = time.perf_counter() - start_time
+    mb = size_bytes / 1024 / 1024
+    print(f"{label}: {count:,} lines in {elapsed:.2f}s ({mb / elapsed:.1f} MB/s)")
+    return elapsed
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as tmp:
+        for i in range(1_000_000):
+            tmp.write(f"  2024-01-01 12:00:{i % 60:02d} INFO request {i} served in {i % 97}ms  \n")
+        path = tmp.name
+
+    try:
+        size = os.path.getsize(path)
+        print(f"Test file: {size / 1024 / 1024:.1f} MB, {os.cpu_count()} CPU(s)")
+
+        sequential = measure_throughput("process_large_file", process_large_file(path), size)
+        parallel = measure_throughput(
+            "process_large_file_parallel (ordered)",
+            process_large_file_parallel(path, chunk_bytes=8 * 1024 * 1024), size)
+        measure_throughput(
+            "process_large_file_parallel (unordered)",
+            process_large_file_parallel(path, chunk_bytes=8 * 1024 * 1024, ordered=False), size)
+        print(f"Speedup: {sequential / parallel:.1f}x")
+
+        # Sending every line back over a pipe costs more than strip().upper();
+        # reducing inside the workers is where the extra cores pay off
+        start_time = time.perf_counter()
+        total = sum(process_large_file_parallel(path, chunk_bytes=8 * 1024 * 1024,
+                                                per_range=len))
+        elapsed = time.perf_counter() - start_time
+        print(f"Counting lines inside the workers: {total:,} lines in {elapsed:.2f}s "
+              f"({size / 1024 / 1024 / elapsed:.1f} MB/s)")
+
+        assert list(process_large_file(path)) == \
+            list(process_large_file_parallel(path, chunk_bytes=1024 * 1024))
+        print("Parallel output matches the sequential generator")
+    finally:
+        os.remove(path)
@@ -0,0 +1,237 @@
+"""Fixed-capacity ring buffer for numeric streams.
+
+deque beats list.insert(0, ...), but every element of a deque is still a
+boxed Python object. RingBuffer keeps its values in one preallocated
+array.array of C numbers, never reallocates, and exposes its contents as at
+most two contiguous memoryview segments, so windowed statistics (and NumPy,
+via np.frombuffer) can read it without copying.
+"""
+import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy only speeds up the window statistics
+    np = None
+
+
+class RingBuffer:
+    """Bounded double-ended buffer of numbers with O(1) push/pop at both ends.
+
+    When the buffer is full, pushing on one end drops the oldest value from
+    the other end (like deque(maxlen=...)), unless overwrite=False, in which
+    case IndexError is raised.
+    """
+    __slots__ = ['_data', '_capacity', '_head', '_size', 'overwrite']
+
+    def __init__(self, capacity, typecode='d', overwrite=True):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._data = array.array(typecode, bytes(array.array(typecode).itemsize * capacity))
+        self._capacity = capacity
+        self._head = 0  # physical index of the oldest (leftmost) value
+        self._size = 0
+        self.overwrite = overwrite
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def typecode(self):
+        return self._data.typecode
+
+    def __len__(self):
+        return self._size
+
+    def is_full(self):
+        return self._size == self._capacity
+
+    def _check_room(self):
+        if self._size == self._capacity and not self.overwrite:
+            raise IndexError("RingBuffer is full")
+
+    def append(self, value):
+        """Push on the right; drops the leftmost value when full."""
+        self._check_room()
+        tail = (self._head + self._size) % self._capacity
+        self._data[tail] = value
+        if self._size == self._capacity:
+            self._head = (self._head + 1) % self._capacity
+        else:
+            self._size += 1
+
+    def appendleft(self, value):
+        """Push on the left; drops the rightmost value when full."""
+        self._check_room()
+        self._head = (self._head - 1) % self._capacity
+        self._data[self._head] = value
+        if self._size < self._capacity:
+            self._size += 1
+
+    def pop(self):
+        if not self._size:
+            raise IndexError("pop from an empty RingBuffer")
+        self._size -= 1
+        return self._data[(self._head + self._size) % self._capacity]
+
+    def popleft(self):
+        if not self._size:
+            raise IndexError("pop from an empty RingBuffer")
+        value = self._data[self._head]
+        self._head = (self._head + 1) % self._capacity
+        self._size -= 1
+        return value
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def extend(self, values):
+        """Append many values on the right with at most two slice copies.
+
+        Buffers with the same item format (array.array, memoryview, NumPy
+        array) are copied as they are; other buffers and plain iterables of
+        numbers are converted value by value.
+        """
+        typecode = self._data.typecode
+        try:
+            view = memoryview(values)
+        except TypeError:
+            source = memoryview(array.array(typecode, values))
+        else:
+            # Zero-copy only when the items really are this buffer's type;
+            # anything else (other typecodes, raw bytes) is converted by value
+            if view.format == typecode and view.itemsize == self._data.itemsize \
+                    and view.c_contiguous:
+                source = view.cast('B').cast(typecode)
+            else:
+                source = memoryview(array.array(typecode, view.tolist()))
+        count = len(source)
+        if not count:
+            return
+        free = self._capacity - self._size
+        if count > free and not self.overwrite:
+            raise IndexError("RingBuffer is full")
+        if count >= self._capacity:
+            # Only the newest `capacity` values can survive
+            with memoryview(self._data) as target:
+                target[:] = source[count - self._capacity:]
+            self._head = 0
+            self._size = self._capacity
+            return
+
+        tail = (self._head + self._size) % self._capacity
+        first = min(count, self._capacity - tail)
+        with memoryview(self._data) as target:
+            target[tail:tail + first] = source[:first]
+            target[:count - first] = source[first:]
+
+        dropped = max(0, count - free)
+        self._head = (self._head + dropped) % self._capacity
+        self._size += count - dropped
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RingBuffer index out of range")
+        return self._data[(self._head + index) % self._capacity]
+
+    def __iter__(self):
+        for segment in self.segments():
+            yield from segment
+
+    def __repr__(self):
+        return f"RingBuffer({self.to_array().tolist()}, capacity={self._capacity})"
+
+    def segments(self, last=None):
+        """Return the contents (or just the newest `last` values) as memoryviews.
+
+        The result is one or two zero-copy segments, oldest first. They are
+        live views: later pushes that wrap around overwrite what they show.
+        """
+        count = self._size if last is None else max(0, min(last, self._size))
+        if not count:
+            return (memoryview(self._data)[0:0],)
+        start = (self._head + self._size - count) % self._capacity
+        end = start + count
+        view = memoryview(self._data)
+        if end <= self._capacity:
+            return (view[start:end],)
+        return (view[start:], view[:end - self._capacity])
+
+    def to_array(self):
+        """Copy the contents, oldest first, into a new array.array."""
+        result = array.array(self._data.typecode)
+        for segment in self.segments():
+            result.frombytes(segment.tobytes())
+        return result
+
+    def _window(self, last):
+        segments = self.segments(last)
+        if not len(segments[0]):
+            raise ValueError("window statistics of an empty RingBuffer")
+        if np is not None:
+            return [np.frombuffer(segment, dtype=segment.format) for segment in segments]
+        return segments
+
+    def sum(self, last=None):
+        """Sum of the newest `last` values (default: everything), without copying."""
+        if not self._size or last == 0:
+            return 0
+        return sum(segment.sum() if np is not None else sum(segment)
+                   for segment in self._window(last))
+
+    def mean(self, last=None):
+        count = self._size if last is None else min(last, self._size)
+        return self.sum(last) / count if count else 0.0
+
+    def min(self, last=None):
+        return min(segment.min() if np is not None else min(segment)
+                   for segment in self._window(last))
+
+    def max(self, last=None):
+        return max(segment.max() if np is not None else max(segment)
+                   for segment in self._window(last))
+
+
+if __name__ == "__main__":
+    import sys
+    import timeit
+    from collections import deque
+
+    ring = RingBuffer(5, 'i')
+    ring.extend(range(7))            # keeps the newest five: 2..6
+    ring.appendleft(100)             # drops 6 from the right
+    print(ring, ring.segments())
+    print(f"sum={ring.sum()} mean of last 3={ring.mean(3)} min={ring.min()} max={ring.max()}")
+
+    # Timings at 10^6 and 10^7 elements; pass 8 on the command line to add 10^8
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    for exponent in range(6, max_exponent + 1):
+        n = 10 ** exponent
+        print(f"\n=== {n:,} elements ===")
+        values = array.array('d', range(n))
+
+        efficient_deque = deque(maxlen=n)
+        ring = RingBuffer(n, 'd')
+        deque_fill = timeit.timeit(lambda: efficient_deque.extend(values), number=1)
+        ring_fill = timeit.timeit(lambda: ring.extend(values), number=1)
+        print(f"Deque extend: {deque_fill:.4f} seconds")
+        print(f"RingBuffer extend: {ring_fill:.4f} seconds")
+
+        deque_time = timeit.timeit(lambda: efficient_deque.appendleft(1.0), number=1000)
+        ring_time = timeit.timeit(lambda: ring.appendleft(1.0), number=1000)
+        print(f"Deque appendleft: {deque_time:.6f} seconds")
+        print(f"RingBuffer appendleft: {ring_time:.6f} seconds")
+
+        deque_sum = timeit.timeit(lambda: sum(efficient_deque), number=1)
+        ring_sum = timeit.timeit(lambda: ring.sum(), number=1)
+        print(f"Deque sum: {deque_sum:.4f} seconds")
+        print(f"RingBuffer sum: {ring_sum:.4f} seconds")
+
+        deque_mem = sys.getsizeof(efficient_deque) + n * sys.getsizeof(1.0)
+        ring_mem = sys.getsizeof(ring._data)
+        print(f"Deque memory (with boxed floats): {deque_mem / 1024 / 1024:.1f} MB")
+        print(f"RingBuffer memory: {ring_mem / 1024 / 1024:.1f} MB")
+        del efficient_deque, ring, values
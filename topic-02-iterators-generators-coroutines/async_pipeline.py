@@ -0,0 +1,338 @@
+"""Async-generator versions of the read_files / csv_reader / transformer / filter pipeline.
+
+The generators in examples.py block on every read, so one slow file (a
+network share, a cold disk) stalls the whole pipeline, and nothing else can
+run on an event loop while they read. Here every open() and read happens in
+a worker thread via asyncio.to_thread, the next few files are opened and read
+ahead while the current one is being consumed, and stages can be decoupled
+by bounded buffers so parsing overlaps I/O:
+
+    pipeline = compose(csv_reader(*paths), data_transformer,
+                       functools.partial(data_filter, min_price=10.0), buffer=1000)
+    async for record in pipeline:
+        ...
+"""
+import asyncio
+import csv
+from collections import deque
+from itertools import islice
+
+from prefetch import check_missing, report_missing
+
+
+class _Done:
+    """End-of-stream marker for the internal queues."""
+
+
+_DONE = _Done()
+
+
+class _Failure:
+    """Carries an exception from a background task to the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _open_text(filename):
+    return open(filename, 'r', newline='')
+
+
+def _line_chunks(filename, opener, chunk_size):
+    with opener(filename) as file:
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                return
+            yield lines
+
+
+def _row_chunks(filename, opener, chunk_size):
+    with opener(filename) as file:
+        reader = csv.DictReader(file)
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            yield rows
+
+
+async def _pump_file(filename, chunks, queue, missing):
+    """Background task: pull chunks from a blocking generator in a thread."""
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            await queue.put(chunk)
+    except FileNotFoundError as e:
+        try:
+            report_missing(filename, e, missing)
+        except FileNotFoundError:  # missing='raise'
+            await queue.put(_Failure(e))
+            return
+    except Exception as e:
+        await queue.put(_Failure(e))
+        return
+    finally:
+        try:
+            chunks.close()
+        except ValueError:  # still running in a thread after cancellation
+            pass
+    await queue.put(_DONE)
+
+
+async def _read_many(filenames, make_chunks, prefetch_files, missing):
+    """Yield items from many files in order, reading up to prefetch_files ahead."""
+    check_missing(missing)
+    remaining = iter(filenames)
+    active = deque()
+
+    def launch():
+        filename = next(remaining, None)
+        if filename is not None:
+            queue = asyncio.Queue(maxsize=2)  # at most two chunks buffered per file
+            task = asyncio.create_task(_pump_file(filename, make_chunks(filename), queue, missing))
+            active.append((task, queue))
+
+    for _ in range(max(1, prefetch_files)):
+        launch()
+    try:
+        while active:
+            _, queue = active[0]
+            while True:
+                chunk = await queue.get()
+                if chunk is _DONE:
+                    break
+                if isinstance(chunk, _Failure):
+                    raise chunk.error
+                for item in chunk:
+                    yield item
+            active.popleft()
+            launch()
+    finally:
+        for task, _ in active:
+            task.cancel()
+
+
+async def read_files(*filenames, prefetch_files=4, chunk_lines=1000, opener=open,
+                     missing='warn'):
+    """Async generator that reads multiple files, opening and reading ahead in threads.
+
+    missing is 'warn', 'skip', 'raise' or a callable(filename, error), as in
+    readahead.read_files.
+    """
+    make_chunks = lambda filename: _line_chunks(filename, opener, chunk_lines)
+    async for line in _read_many(filenames, make_chunks, prefetch_files, missing):
+        yield line
+
+
+async def csv_reader(*filenames, prefetch_files=4, chunk_rows=1000, opener=_open_text,
+                     missing='warn'):
+    """Async generator of DictReader rows from one or more CSV files.
+
+    Parsing happens in the worker threads too, chunk_rows rows at a time.
+    """
+    make_chunks = lambda filename: _row_chunks(filename, opener, chunk_rows)
+    async for row in _read_many(filenames, make_chunks, prefetch_files, missing):
+        yield row
+
+
+def transform_record(record):
+    """The per-record work of data_transformer."""
+    if 'price' in record:
+        record['price'] = float(record['price'])
+    if 'date' in record:
+        # Simulate date parsing
+        record['processed_date'] = f"parsed_{record['date']}"
+    return record
+
+
+async def amap(func, source, concurrency=4, ordered=True, executor=None):
+    """Async generator applying func to every item, up to `concurrency` at once.
+
+    Coroutine functions run as tasks; plain functions run in `executor`
+    (the loop's default thread pool if None).
+    """
+    loop = asyncio.get_running_loop()
+    is_async = asyncio.iscoroutinefunction(func)
+
+    def start(item):
+        if is_async:
+            return asyncio.ensure_future(func(item))
+        return loop.run_in_executor(executor, func, item)
+
+    pending = deque() if ordered else set()
+    try:
+        async for item in source:
+            if ordered:
+                pending.append(start(item))
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+            else:
+                pending.add(start(item))
+                if len(pending) >= concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        while pending:
+            if ordered:
+                yield await pending.popleft()
+            else:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def data_transformer(data_stream, concurrency=None, executor=None):
+    """Async generator that transforms data as it flows through.
+
+    With concurrency=N, up to N records are transformed at once in
+    `executor` - worth it when the transform itself does blocking work.
+    """
+    if concurrency is None:
+        async for record in data_stream:
+            yield transform_record(record)
+    else:
+        async for record in amap(transform_record, data_stream, concurrency, executor=executor):
+            yield record
+
+
+async def data_filter(data_stream, min_price=0):
+    """Async generator that filters data based on criteria."""
+    async for record in data_stream:
+        if record.get('price', 0) >= min_price:
+            yield record
+
+
+async def prefetch(source, size):
+    """Run source in a background task, keeping up to `size` items buffered."""
+    queue = asyncio.Queue(maxsize=size)
+
+    async def pump():
+        try:
+            async for item in source:
+                await queue.put(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(_Failure(e))
+            return
+        await queue.put(_DONE)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        task.cancel()
+
+
+def compose(source, *stages, buffer=0):
+    """Chain async stages onto source; buffer > 0 puts a prefetch queue before each stage."""
+    stream = source
+    for stage in stages:
+        if buffer:
+            stream = prefetch(stream, buffer)
+        stream = stage(stream)
+    return stream
+
+
+if __name__ == "__main__":
+    import functools
+    import os
+    import random
+    import shutil
+    import tempfile
+    import time
+
+    class LatencyOpener:
+        """Opens files after a delay, like a slow network filesystem would."""
+
+        def __init__(self, slow_files, delay):
+            self.slow_files = set(slow_files)
+            self.delay = delay
+
+        def __call__(self, filename):
+            if filename in self.slow_files:
+                time.sleep(self.delay)
+            return open(filename, 'r', newline='')
+
+    # The examples.py generators, with the same opener for a fair comparison
+    def sync_csv_reader(filenames, opener):
+        for filename in filenames:
+            with opener(filename) as file:
+                yield from csv.DictReader(file)
+
+    def sync_data_transformer(data_stream):
+        for record in data_stream:
+            yield transform_record(record)
+
+    def sync_data_filter(data_stream, min_price=0):
+        for record in data_stream:
+            if record.get('price', 0) >= min_price:
+                yield record
+
+    random.seed(11)
+    folder = tempfile.mkdtemp()
+    paths = []
+    for i in range(60):
+        path = os.path.join(folder, f"orders_{i:02d}.csv")
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'price', 'date'])
+            for j in range(2000):
+                writer.writerow([f"item{j}", f"{random.uniform(1, 50):.2f}", "2023-01-01"])
+        paths.append(path)
+    opener = LatencyOpener(paths[::2], delay=0.05)  # every other file is slow
+
+    try:
+        start = time.perf_counter()
+        kept = sum(1 for _ in sync_data_filter(
+            sync_data_transformer(sync_csv_reader(paths, opener)), 10.0))
+        sync_time = time.perf_counter() - start
+        print(f"Sync generators: {kept:,} rows kept in {sync_time:.2f}s")
+
+        async def run_async(prefetch_files, buffer):
+            lag = 0.0
+            done = asyncio.Event()
+
+            async def heartbeat():
+                # Measures how long the loop is unable to run other tasks
+                nonlocal lag
+                while not done.is_set():
+                    before = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    lag = max(lag, time.perf_counter() - before - 0.005)
+
+            beat = asyncio.create_task(heartbeat())
+            start = time.perf_counter()
+            pipeline = compose(
+                csv_reader(*paths, prefetch_files=prefetch_files, opener=opener),
+                data_transformer,
+                functools.partial(data_filter, min_price=10.0),
+                buffer=buffer,
+            )
+            kept = 0
+            async for _ in pipeline:
+                kept += 1
+            elapsed = time.perf_counter() - start
+            done.set()
+            await beat
+            return kept, elapsed, lag
+
+        for prefetch_files, buffer in [(1, 0), (8, 0), (8, 1000)]:
+            kept, elapsed, lag = asyncio.run(run_async(prefetch_files, buffer))
+            print(f"Async, prefetch_files={prefetch_files}, buffer={buffer}: {kept:,} rows kept "
+                  f"in {elapsed:.2f}s ({sync_time / elapsed:.1f}x), "
+                  f"worst event-loop stall {lag * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,209 @@
+"""Batching database_writer sink: executemany plus one commit per batch.
+
+database_writer in examples.py handles one record per send(). Against a real
+SQLite database, one INSERT plus one commit (and one fsync) per record caps
+ingestion at a few thousand rows per second. This database_writer buffers
+what it is sent and flushes it with a single executemany inside a single
+transaction once batch_size records are waiting or max_delay seconds have
+passed, and flushes whatever is left when it is closed. It is still a plain
+coroutine, so it drops into the logger -> validator chain (or a
+CoroutinePipeline stage) unchanged.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Send this to force a flush without waiting for the size or time threshold
+FLUSH = object()
+
+
+@contextmanager
+def transaction(conn):
+    """Run a block inside BEGIN/COMMIT on an open connection; ROLLBACK on error.
+
+    If the connection already has a transaction open (sqlite3 opens one
+    implicitly with the default isolation level), the block runs in a
+    SAVEPOINT instead and is committed along with the caller's transaction.
+    """
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT batch")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK TO batch")
+            raise
+        finally:
+            conn.execute("RELEASE batch")
+        return
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+@contextmanager
+def database_transaction(db_path):
+    """Context manager for database transactions (the topic-06 version, built on transaction())."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        with transaction(conn):
+            yield conn
+    finally:
+        conn.close()
+
+
+class WriterStats:
+    """Throughput and flush latency of a batching writer."""
+
+    def __init__(self):
+        self.rows_written = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.started = time.perf_counter()
+
+    def record_flush(self, rows, seconds):
+        self.rows_written += rows
+        self.flushes += 1
+        self.flush_seconds += seconds
+        self.last_flush_seconds = seconds
+        self.max_flush_seconds = max(self.max_flush_seconds, seconds)
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows_written / elapsed if elapsed else 0.0
+
+    @property
+    def mean_flush_seconds(self):
+        return self.flush_seconds / self.flushes if self.flushes else 0.0
+
+    def __repr__(self):
+        return (f"WriterStats({self.rows_written:,} rows in {self.flushes} flushes, "
+                f"{self.rows_per_second:,.0f} rows/s, flush mean "
+                f"{self.mean_flush_seconds * 1000:.2f} ms / max {self.max_flush_seconds * 1000:.2f} ms)")
+
+
+def database_writer(database, table='records', columns=('data',), batch_size=500,
+                    max_delay=1.0, to_row=None, stats=None):
+    """Coroutine that writes sent records to SQLite in batches.
+
+    database is an open sqlite3 connection or a path; a path is opened here,
+    inside whichever thread runs the coroutine, and closed on close().
+    to_row turns a record into a tuple matching columns (default: (record,)).
+    The coroutine yields its WriterStats, so priming it with next() returns
+    them. max_delay is checked on each send(); send FLUSH to flush sooner.
+    """
+    owns_connection = not isinstance(database, sqlite3.Connection)
+    conn = sqlite3.connect(database, isolation_level=None) if owns_connection else database
+    to_row = to_row or (lambda record: (record,))
+    stats = stats or WriterStats()
+    insert = (f"INSERT INTO {table} ({', '.join(columns)}) "
+              f"VALUES ({', '.join('?' * len(columns))})")
+    buffer = []
+    oldest = None
+    flush_failed = False
+
+    def flush():
+        nonlocal flush_failed
+        if not buffer:
+            return
+        start = time.perf_counter()
+        try:
+            with transaction(conn):
+                conn.executemany(insert, buffer)
+        except Exception:
+            flush_failed = True
+            raise
+        stats.record_flush(len(buffer), time.perf_counter() - start)
+        buffer.clear()
+
+    try:
+        while True:
+            data = yield stats
+            if data is FLUSH:
+                flush()
+                continue
+            if data is None:
+                continue
+            if not buffer:
+                oldest = time.monotonic()
+            buffer.append(to_row(data))
+            if len(buffer) >= batch_size or time.monotonic() - oldest >= max_delay:
+                flush()
+    finally:
+        # Runs on close() (GeneratorExit) as well as on errors - but a batch
+        # that just failed to flush is not retried here to fail a second time
+        try:
+            if not flush_failed:
+                flush()
+        finally:
+            if owns_connection:
+                conn.close()
+
+
+def autocommit_writer(conn, table='records', columns=('data',), to_row=None):
+    """The one-row-per-send() baseline: INSERT and commit every record."""
+    to_row = to_row or (lambda record: (record,))
+    insert = (f"INSERT INTO {table} ({', '.join(columns)}) "
+              f"VALUES ({', '.join('?' * len(columns))})")
+    while True:
+        data = yield
+        conn.execute(insert, to_row(data))
+
+
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+
+    from coroutine_runner import CoroutinePipeline, Stage, logger, validator
+
+    folder = tempfile.mkdtemp()
+    db_path = os.path.join(folder, "orders.db")
+    with database_transaction(db_path) as conn:
+        conn.execute("CREATE TABLE records (data TEXT)")
+
+    messages = [f"message-{i}" for i in range(20_000)]
+
+    conn = sqlite3.connect(db_path, isolation_level=None)  # autocommit mode
+    baseline = autocommit_writer(conn)
+    next(baseline)
+    start = time.perf_counter()
+    for message in messages[:2000]:
+        baseline.send(message)
+    per_record = 2000 / (time.perf_counter() - start)
+    print(f"Autocommit, one row per send(): {per_record:,.0f} rows/s")
+
+    # The logger -> validator chain from examples.py, with the batching sink
+    db_writer = database_writer(conn, batch_size=1000)
+    stats = next(db_writer)
+    validator_stage = validator(db_writer)
+    next(validator_stage)
+    log_stage = logger(validator_stage)
+    next(log_stage)
+
+    for message in messages:
+        log_stage.send(message)
+    db_writer.close()  # flushes the last partial batch
+    print(f"Batched through logger -> validator: {stats}")
+    print(f"Speedup: {stats.rows_per_second / per_record:.0f}x")
+    conn.close()
+
+    # As the last stage of a threaded pipeline the writer opens its own
+    # connection, because sqlite3 connections belong to the thread that made them
+    pipeline_stats = WriterStats()
+    with CoroutinePipeline([Stage(logger), Stage(validator),
+                            Stage(database_writer, db_path, stats=pipeline_stats)]) as pipeline:
+        for message in messages:
+            pipeline.send(message)
+    print(f"Batched as a CoroutinePipeline stage: {pipeline_stats}")
+
+    with database_transaction(db_path) as conn:
+        total = conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    print(f"Rows in the database: {total:,}")
+    shutil.rmtree(folder)
@@ -0,0 +1,318 @@
+"""Run each stage of a coroutine pipeline on its own thread(s) or process(es).
+
+In examples.py, log_stage.send() runs logger, validator and database_writer
+one after another inside the caller's send(), so a slow database_writer
+stalls ingestion. CoroutinePipeline keeps the same coroutine stages and the
+same send() front-end, but connects the stages with bounded queues:
+
+    logger -> [queue] -> validator -> [queue] -> database_writer x 4
+
+A full queue blocks the stage feeding it, so backpressure travels all the
+way back to the caller instead of memory growing without limit. close()
+drains every queue in order and close()s each coroutine, so items still in
+flight are flushed before it returns.
+
+A worker whose stage can't even be started (the factory or its priming
+raises) reports the error and from then on only drains its queue, so the
+pipeline can't hang on it; the next send() or close() raises StageError.
+"""
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+
+
+class _Shutdown:
+    """Queue marker telling one stage replica to finish."""
+
+
+SHUTDOWN = _Shutdown()
+
+
+class StageError(RuntimeError):
+    """A stage worker could not create its coroutine; `details` is its traceback."""
+
+    def __init__(self, worker, error, details):
+        super().__init__(f"{worker} stopped: {error}")
+        self.worker = worker
+        self.details = details
+
+
+class Stage:
+    """One step of the pipeline.
+
+    factory is a coroutine function; every stage but the last is called as
+    factory(*args, target=..., **kwargs), like logger(target) in examples.py.
+    mode='process' stages need a picklable (module-level) factory.
+    """
+
+    def __init__(self, factory, *args, replicas=1, mode='thread', maxsize=1000,
+                 name=None, **kwargs):
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"mode must be 'thread' or 'process', not {mode!r}")
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        self.replicas = replicas
+        self.mode = mode
+        self.maxsize = maxsize
+        self.name = name or factory.__name__
+
+
+class QueueSink:
+    """Looks like a primed coroutine to the stage before it; send() enqueues."""
+
+    def __init__(self, inbox):
+        self.inbox = inbox
+
+    def send(self, item):
+        self.inbox.put(item)  # blocks while the next stage is behind
+
+    def close(self):
+        pass
+
+
+def _make_coroutine(stage, outbox):
+    kwargs = dict(stage.kwargs)
+    if outbox is not None:
+        kwargs['target'] = QueueSink(outbox)
+    coroutine = stage.factory(*stage.args, **kwargs)
+    next(coroutine)  # Prime the coroutine
+    return coroutine
+
+
+def _report(failures, name, error):
+    """Send the exception being handled to the pipeline, as text: it may not pickle."""
+    failures.put((name, f"{type(error).__name__}: {error}", traceback.format_exc()))
+
+
+def _start(stage, outbox, failures, name):
+    """A primed coroutine for stage, or None once the failure is reported."""
+    try:
+        return _make_coroutine(stage, outbox)
+    except Exception as e:
+        _report(failures, name, e)
+        return None
+
+
+def _run_stage(stage, inbox, outbox, processed, errors, failures, name):
+    """Worker loop shared by thread and process replicas."""
+    coroutine = _start(stage, outbox, failures, name)
+    while True:
+        item = inbox.get()
+        if isinstance(item, _Shutdown):
+            break
+        if coroutine is None:
+            errors.value += 1  # keep draining so the stage before never blocks on us
+        else:
+            try:
+                coroutine.send(item)
+            except StopIteration:
+                coroutine = _start(stage, outbox, failures, name)
+            except Exception:
+                errors.value += 1
+                # A coroutine that raised is finished; start a fresh one
+                coroutine = _start(stage, outbox, failures, name)
+        processed.value += 1
+    if coroutine is not None:
+        try:
+            coroutine.close()  # lets the stage flush anything it buffered
+        except Exception as e:
+            _report(failures, name, e)
+
+
+class CoroutinePipeline:
+    """Coroutine stages connected by bounded queues, each on its own workers."""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        if not self.stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self._inboxes = []
+        self._workers = []
+        self._counters = []
+        self._failures = None
+        self._failure = None  # the first (worker, error, details) reported
+        self._started_at = None
+        self._closed = False
+
+    def _make_queue(self, index):
+        # Anything touching a process stage must be a multiprocessing queue
+        stage = self.stages[index]
+        previous = self.stages[index - 1] if index else None
+        if stage.mode == 'process' or (previous is not None and previous.mode == 'process'):
+            return multiprocessing.Queue(maxsize=stage.maxsize)
+        return queue.Queue(maxsize=stage.maxsize)
+
+    def start(self):
+        self._inboxes = [self._make_queue(i) for i in range(len(self.stages))]
+        if any(stage.mode == 'process' for stage in self.stages):
+            self._failures = multiprocessing.Queue()
+        else:
+            self._failures = queue.Queue()
+        for index, stage in enumerate(self.stages):
+            inbox = self._inboxes[index]
+            outbox = self._inboxes[index + 1] if index + 1 < len(self.stages) else None
+            workers = []
+            counters = []
+            for replica in range(stage.replicas):
+                processed = multiprocessing.RawValue('Q', 0)
+                errors = multiprocessing.RawValue('Q', 0)
+                kind = multiprocessing.Process if stage.mode == 'process' else threading.Thread
+                name = f"{stage.name}-{replica}"
+                worker = kind(target=_run_stage, name=name, daemon=True,
+                              args=(stage, inbox, outbox, processed, errors, self._failures, name))
+                worker.start()
+                workers.append(worker)
+                counters.append((processed, errors))
+            self._workers.append(workers)
+            self._counters.append(counters)
+        self._started_at = time.perf_counter()
+        return self
+
+    def _check(self):
+        """Raise StageError if a worker has reported that its stage stopped."""
+        if self._failure is None:
+            try:
+                self._failure = self._failures.get_nowait()
+            except queue.Empty:
+                return
+        raise StageError(*self._failure)
+
+    def send(self, item):
+        """Feed one item to the first stage; blocks while the pipeline is full.
+
+        Raises StageError once a worker's stage has stopped, rather than
+        feeding a pipeline that can't process the item.
+        """
+        if self._closed:
+            raise RuntimeError("send() on a closed pipeline")
+        self._check()
+        inbox = self._inboxes[0]
+        while True:
+            try:
+                inbox.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                self._check()  # the stage may have stopped while we waited
+
+    def close(self, check=True):
+        """Flush every stage in order and stop all workers.
+
+        Then raises StageError if a worker's stage stopped (unless check=False).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for stage, inbox, workers in zip(self.stages, self._inboxes, self._workers):
+            # Everything upstream has finished, so these markers queue up
+            # behind the last real items for this stage
+            for _ in workers:
+                inbox.put(SHUTDOWN)
+            for worker in workers:
+                worker.join()
+        if check:
+            self._check()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(check=exc_type is None)  # never mask the block's own exception
+        return False
+
+    def stats(self):
+        """Per-stage queue depth, items processed, errors and throughput."""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0
+        result = []
+        for stage, inbox, counters in zip(self.stages, self._inboxes, self._counters):
+            processed = sum(p.value for p, _ in counters)
+            try:
+                depth = inbox.qsize()
+            except NotImplementedError:  # multiprocessing.Queue on macOS
+                depth = None
+            result.append({
+                'stage': stage.name,
+                'mode': stage.mode,
+                'replicas': stage.replicas,
+                'queue_depth': depth,
+                'queue_maxsize': stage.maxsize,
+                'processed': processed,
+                'errors': sum(e.value for _, e in counters),
+                'throughput_per_s': processed / elapsed if elapsed else 0.0,
+            })
+        return result
+
+
+# The examples.py chain, with a database that takes a few milliseconds per write
+
+def logger(target=None, verbose=False):
+    """Coroutine that logs messages and forwards them."""
+    while True:
+        message = yield
+        if verbose:
+            print(f"LOG: {message}")
+        if target:
+            target.send(message)
+
+
+def validator(target=None):
+    """Coroutine that validates data and forwards valid items."""
+    while True:
+        data = yield
+        if data and len(str(data)) > 2:  # Simple validation
+            if target:
+                target.send(data)
+
+
+def database_writer(write_delay=0.005):
+    """Coroutine that simulates writing to database."""
+    while True:
+        data = yield
+        time.sleep(write_delay)
+
+
+if __name__ == "__main__":
+    messages = [f"message-{i}" for i in range(400)] + ["hi"] * 100
+
+    db_writer = database_writer()
+    next(db_writer)
+    validator_stage = validator(db_writer)
+    next(validator_stage)
+    log_stage = logger(validator_stage)
+    next(log_stage)
+
+    start = time.perf_counter()
+    for message in messages:
+        log_stage.send(message)
+    sync_time = time.perf_counter() - start
+    print(f"Synchronous chain: {len(messages)} messages in {sync_time:.2f}s")
+
+    pipeline = CoroutinePipeline([
+        Stage(logger, maxsize=100),
+        Stage(validator, maxsize=100),
+        Stage(database_writer, replicas=8, maxsize=50),
+    ])
+    start = time.perf_counter()
+    with pipeline:
+        for message in messages:
+            pipeline.send(message)
+        in_flight = pipeline.stats()
+    threaded_time = time.perf_counter() - start
+    print(f"Pipeline with 8 database_writer threads: {threaded_time:.2f}s "
+          f"({sync_time / threaded_time:.1f}x faster)")
+
+    print("\nStats just after the last send():")
+    for stage_stats in in_flight:
+        print(f"  {stage_stats}")
+    print("Stats after close():")
+    for stage_stats in pipeline.stats():
+        print(f"  {stage_stats['stage']}: {stage_stats['processed']} processed, "
+              f"depth {stage_stats['queue_depth']}")
+
+    with CoroutinePipeline([Stage(logger), Stage(validator, mode='process'),
+                            Stage(database_writer, replicas=2, mode='process')]) as mixed:
+        for message in messages[:100]:
+            mixed.send(message)
+    print(f"\nThread + process pipeline: {[s['processed'] for s in mixed.stats()]}")
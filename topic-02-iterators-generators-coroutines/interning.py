@@ -0,0 +1,251 @@
+"""Flyweight interning and dictionary encoding for repeated field values.
+
+csv.DictReader creates a brand-new str for every field of every row, so an
+export with a million orders from twenty countries holds a million copies
+of "Germany". InternTable makes equal values share one object (a bounded,
+LRU-evicted version of sys.intern that also works for non-str values -
+1, 1.0 and True stay distinct), and
+DictionaryColumn goes further for low-cardinality fields: one small integer
+code per row plus a lookup table of the distinct values.
+
+intern_rows slots into the examples.py pipeline between reader and transformer:
+
+    data_filter(data_transformer(intern_rows(csv_reader(path), table)))
+"""
+import array
+import csv
+import sys
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def _key(value):
+    """Lookup key that keeps equal values of different types (1, 1.0, True) apart."""
+    return value if type(value) is str else (type(value), value)
+
+
+class InternTable:
+    """Bounded flyweight table: equal values share one object."""
+    __slots__ = ['_table', 'max_size', 'hits', 'misses', 'evictions']
+
+    def __init__(self, max_size=100_000):
+        self._table = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def intern(self, value):
+        """Return the canonical object equal to value, adding it if new.
+
+        Unhashable values (such as the list csv.DictReader puts extra fields
+        in) can't be shared and are returned as they are.
+        """
+        table = self._table
+        key = _key(value)
+        try:
+            existing = table.get(key, _MISSING)
+        except TypeError:
+            return value
+        if existing is not _MISSING:
+            self.hits += 1
+            table.move_to_end(key)
+            return existing
+        self.misses += 1
+        table[key] = value
+        if len(table) > self.max_size:
+            # Least recently used values go first; rows that already hold
+            # them keep working, they just stop sharing with new rows
+            table.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    __call__ = intern
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, value):
+        return _key(value) in self._table
+
+    def clear(self):
+        self._table.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            'size': len(self._table),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate,
+        }
+
+
+def intern_rows(rows, table=None, fields=None, intern_keys=False):
+    """Generator that dedupes field values (and optionally keys) of dict rows.
+
+    fields limits interning to the named columns - leave unique-per-row
+    columns such as ids out, they would only churn the table. DictReader
+    already shares one key object per column across rows; set intern_keys
+    for readers that don't (e.g. json.loads per line).
+    """
+    intern = (table if table is not None else InternTable()).intern
+    for row in rows:
+        if intern_keys:
+            row = {intern(key): value for key, value in row.items()}
+        for key in (row if fields is None else fields):
+            if key is None:
+                continue  # DictReader's restkey: the list of a ragged row's extra fields
+            value = row.get(key, _MISSING)
+            if value is not _MISSING:
+                row[key] = intern(value)
+        yield row
+
+
+def interned_csv_reader(filename, table=None, fields=None):
+    """Generator that reads CSV file line by line, sharing repeated values."""
+    with open(filename, 'r', newline='') as file:
+        yield from intern_rows(csv.DictReader(file), table, fields)
+
+
+class DictionaryColumn:
+    """Low-cardinality column stored as integer codes plus a lookup table.
+
+    Codes start as one byte each and widen to two, then four, bytes only
+    when the number of distinct values needs it.
+    """
+    __slots__ = ['codes', 'values', '_index']
+
+    def __init__(self, values=()):
+        self.codes = array.array('B')
+        self.values = []
+        self._index = {}
+        for value in values:
+            self.append(value)
+
+    def _code_for(self, value):
+        key = _key(value)
+        code = self._index.get(key)
+        if code is None:
+            code = len(self.values)
+            self._index[key] = code
+            self.values.append(value)
+            if code > 255 and self.codes.typecode == 'B':
+                self.codes = array.array('H', self.codes)
+            elif code > 65535 and self.codes.typecode == 'H':
+                self.codes = array.array('I', self.codes)
+        return code
+
+    def append(self, value):
+        code = self._code_for(value)  # may swap self.codes for a wider array
+        self.codes.append(code)
+
+    def code(self, value):
+        """Integer code of value, or None if it never occurs (for fast filters)."""
+        return self._index.get(_key(value))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __iter__(self):
+        values = self.values
+        for code in self.codes:
+            yield values[code]
+
+    @property
+    def cardinality(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        """Approximate bytes held: the codes plus the distinct values and their index."""
+        return (sys.getsizeof(self.codes) + sys.getsizeof(self.values)
+                + sys.getsizeof(self._index) + sum(sys.getsizeof(v) for v in self.values))
+
+
+def encode_columns(rows, dictionary_fields=(), table=None):
+    """Turn dict rows into columns: DictionaryColumn for dictionary_fields,
+    interned lists for everything else.
+
+    Columns are the union of every row's keys; a row without a key gets None.
+    """
+    intern = (table if table is not None else InternTable()).intern
+    columns = {}
+    for count, row in enumerate(rows):
+        for key in row:
+            if key not in columns:
+                # A key first seen now: earlier rows didn't have it
+                if key in dictionary_fields:
+                    columns[key] = DictionaryColumn([None] * count)
+                else:
+                    columns[key] = [None] * count
+        for key, column in columns.items():
+            value = row.get(key)
+            if key in dictionary_fields:
+                column.append(value)
+            else:
+                column.append(intern(value))
+    return columns
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import tracemalloc
+
+    random.seed(7)
+    countries = ["Germany", "France", "Spain", "Italy", "Poland", "Netherlands", "Austria"]
+    statuses = ["pending", "paid", "shipped", "delivered", "cancelled", "refunded"]
+    products = [f"SKU-{i:05d}" for i in range(2000)]
+
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False) as tmp:
+        writer = csv.writer(tmp)
+        writer.writerow(['order_id', 'country', 'status', 'product', 'price'])
+        for i in range(200_000):
+            writer.writerow([i, random.choice(countries), random.choice(statuses),
+                             random.choice(products), f"{random.randint(100, 9999) / 100:.2f}"])
+        path = tmp.name
+
+    def measure(label, load):
+        tracemalloc.start()
+        result = load()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label}: {current / 1024 / 1024:.1f} MB")
+        return result
+
+    try:
+        def plain():
+            with open(path, newline='') as file:
+                return list(csv.DictReader(file))
+
+        table = InternTable(max_size=10_000)
+        measure("Plain DictReader rows", plain)
+        measure("Interned rows", lambda: list(
+            interned_csv_reader(path, table, fields=['country', 'status', 'product', 'price'])))
+        print(f"Intern table: {table.stats()}")
+
+        def columnar():
+            with open(path, newline='') as file:
+                return encode_columns(csv.DictReader(file),
+                                      dictionary_fields={'country', 'status', 'product'})
+
+        columns = measure("Dictionary-encoded columns", columnar)
+        status = columns['status']
+        print(f"status: {status.cardinality} distinct values, "
+              f"{status.codes.itemsize} byte(s) per row, first row {status[0]!r}")
+        shipped = status.code('shipped')
+        print(f"Shipped orders: {sum(1 for code in status.codes if code == shipped):,}")
+    finally:
+        os.remove(path)
@@ -0,0 +1,224 @@
+"""PagedData with zero-copy, lazy and prefetching page modes.
+
+PageIterator in examples.py returns self.data[start:end], which copies
+every page, and it needs len(data), so data must be a sequence that is
+already in memory. PagedData here picks a page mode to fit the data:
+
+- 'view': bytes, bytearray, array.array, mmap or NumPy data is paged
+  through memoryview (or NumPy) slices, which share memory with the data.
+- 'lazy': any iterable (a DB cursor, a generator) is paged with islice,
+  without ever calling len().
+- 'copy': the original slicing behaviour.
+
+prefetch=N adds a background thread that fetches up to N pages ahead, so
+page k+1 is being fetched while the caller is still working on page k.
+The data is then read from that thread, so it must not be tied to the
+thread that created it (a sqlite3 cursor is, unless its connection was
+opened with check_same_thread=False).
+"""
+import sys
+import threading
+from itertools import islice
+
+from prefetch import Handoff
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODES = ('auto', 'copy', 'view', 'lazy')
+
+
+class PageIterator:
+    """The examples.py iterator: copies each page out of a sized sequence."""
+
+    def __init__(self, data, page_size):
+        self.data = data
+        self.page_size = page_size
+        self.current_page = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = self.current_page * self.page_size
+        end = start + self.page_size
+
+        if start >= len(self.data):
+            raise StopIteration
+
+        page = self.data[start:end]
+        self.current_page += 1
+        return page
+
+
+class ViewPageIterator(PageIterator):
+    """Pages are memoryview (or NumPy) slices - no bytes are copied."""
+
+    def __init__(self, data, page_size):
+        if np is not None and isinstance(data, np.ndarray):
+            view = data  # NumPy basic slicing already returns views
+        else:
+            view = memoryview(data)
+            if view.ndim != 1:
+                view = view.cast('B')
+        super().__init__(view, page_size)
+
+
+class LazyPageIterator:
+    """Pages any iterable with islice; never calls len()."""
+
+    def __init__(self, data, page_size):
+        self.source = iter(data)
+        self.page_size = page_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        page = list(islice(self.source, self.page_size))
+        if not page:
+            raise StopIteration
+        return page
+
+
+class PrefetchingPageIterator:
+    """Wraps a page iterator and fetches up to `depth` pages ahead in a thread.
+
+    The pages are pulled from the background thread, so their source must
+    work from any thread; see PagedData.
+    """
+
+    def __init__(self, pages, depth=1):
+        self._handoff = Handoff(depth)
+        self._finished = False
+        self._thread = threading.Thread(target=self._handoff.produce, args=(pages,), daemon=True)
+        self._thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        try:
+            return self._handoff.get()
+        except Exception:  # the end, or the fetch thread's exception
+            self._finished = True
+            raise
+
+    def close(self):
+        """Stop fetching ahead (call this if you stop iterating early)."""
+        self._finished = True
+        self._handoff.stop.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _supports_buffer(data):
+    if np is not None and isinstance(data, np.ndarray):
+        return True
+    try:
+        memoryview(data).release()
+        return True
+    except TypeError:
+        return False
+
+
+def _thread_bound(data):
+    """Whether data is a source known to fail when read from another thread."""
+    sqlite3 = sys.modules.get('sqlite3')  # not imported: data can't be one of its cursors
+    return sqlite3 is not None and isinstance(data, sqlite3.Cursor)
+
+
+class PagedData:
+    """Iterable of fixed-size pages over data, in a mode chosen to avoid copies.
+
+    With prefetch, data is read from a background thread and must be safe
+    to use from there. A sqlite3 cursor is rejected; wrap one in a generator
+    if its connection was opened with check_same_thread=False.
+    """
+
+    def __init__(self, data, page_size=3, mode='auto', prefetch=0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        if prefetch and _thread_bound(data):
+            raise ValueError(f"prefetch reads {type(data).__name__} from another thread, "
+                             f"which it doesn't allow; use prefetch=0")
+        if mode == 'auto':
+            if _supports_buffer(data):
+                mode = 'view'
+            elif hasattr(data, '__len__') and hasattr(data, '__getitem__'):
+                mode = 'copy'
+            else:
+                mode = 'lazy'
+        self.data = data
+        self.page_size = page_size
+        self.mode = mode
+        self.prefetch = prefetch
+
+    def __iter__(self):
+        if self.mode == 'view':
+            pages = ViewPageIterator(self.data, self.page_size)
+        elif self.mode == 'lazy':
+            pages = LazyPageIterator(self.data, self.page_size)
+        else:
+            pages = PageIterator(self.data, self.page_size)
+        if self.prefetch:
+            return self._prefetched(pages)
+        return pages
+
+    def _prefetched(self, pages):
+        # The fetch thread holds a reference to its iterator, so __del__ would
+        # never run; a generator is closed when the caller's loop drops it
+        with PrefetchingPageIterator(pages, self.prefetch) as prefetching:
+            yield from prefetching
+
+
+if __name__ == "__main__":
+    import time
+
+    data = list(range(10))
+    for page in PagedData(data, page_size=3):
+        print(f"Page: {page}")
+
+    def rows_from_cursor(n):
+        """Stands in for a database cursor: no len(), rows only come one way."""
+        for i in range(n):
+            yield (i, f"row-{i}")
+
+    for page in PagedData(rows_from_cursor(7), page_size=3):
+        print(f"Lazy page: {page}")
+
+    blob = bytes(256 * 1024 * 1024)
+    for mode in ('copy', 'view'):
+        start = time.perf_counter()
+        total = 0
+        for page in PagedData(blob, page_size=1024 * 1024, mode=mode):
+            total += len(page)
+        print(f"{mode:>4} mode: {total / 1024 / 1024:.0f} MB in 1 MB pages, "
+              f"{time.perf_counter() - start:.3f}s")
+
+    def slow_result_set(pages, rows_per_page, fetch_delay):
+        """Each page costs a round trip to the database."""
+        for p in range(pages):
+            time.sleep(fetch_delay)
+            yield from ((p * rows_per_page + i, 'x') for i in range(rows_per_page))
+
+    def slow_consumer(paged, work_delay):
+        start = time.perf_counter()
+        for page in paged:
+            time.sleep(work_delay)  # caller processing the page
+        return time.perf_counter() - start
+
+    plain = slow_consumer(PagedData(slow_result_set(20, 100, 0.02), page_size=100), 0.02)
+    prefetched = slow_consumer(
+        PagedData(slow_result_set(20, 100, 0.02), page_size=100, prefetch=2), 0.02)
+    print(f"20 pages, fetch and processing 20 ms each: {plain:.2f}s serial, "
+          f"{prefetched:.2f}s with prefetch=2")
@@ -0,0 +1,81 @@
+"""Scaffolding shared by the modules that read ahead: paging.py, readahead.py
+and async_pipeline.py.
+
+Handoff passes items from a producer thread to the consumer through a
+bounded queue. The producer's exception is re-raised in the consumer, and
+a consumer that stops early (by setting `stop`) never strands the thread
+on a full queue.
+
+The missing-file policy is the same everywhere: 'warn' prints the warning
+examples.py prints, 'skip' says nothing, 'raise' re-raises the
+FileNotFoundError, and a callable is called as callable(filename, error).
+"""
+import queue
+import threading
+
+MISSING = ('warn', 'skip', 'raise')
+
+
+class _Error:
+    """Carries an exception from the producer thread to the consumer."""
+    __slots__ = ['error']
+
+    def __init__(self, error):
+        self.error = error
+
+
+_END = object()
+
+
+class Handoff:
+    """Bounded queue from one producer thread to one consumer that may stop early."""
+
+    def __init__(self, maxsize=1, stop=None):
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self.stop = stop if stop is not None else threading.Event()
+
+    def put(self, item):
+        """Queue item; False if the consumer stopped before there was room."""
+        # Poll so a consumer that stopped early does not strand the thread
+        while not self.stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(self, items):
+        """Producer thread: queue every item, then the end (or the exception raised)."""
+        try:
+            for item in items:
+                if not self.put(item):
+                    return
+        except Exception as e:
+            self.put(_Error(e))
+            return
+        self.put(_END)
+
+    def get(self):
+        """The next item. StopIteration after the last one; the producer's exception if it failed."""
+        item = self._queue.get()
+        if item is _END:
+            raise StopIteration
+        if type(item) is _Error:
+            raise item.error
+        return item
+
+
+def check_missing(missing):
+    if missing not in MISSING and not callable(missing):
+        raise ValueError(f"missing must be 'warn', 'skip', 'raise' or a callable, not {missing!r}")
+
+
+def report_missing(filename, error, missing):
+    """Apply the missing-file policy to a FileNotFoundError for filename."""
+    if missing == 'raise':
+        raise error
+    if missing == 'warn':
+        print(f"Warning: {filename} not found")
+    elif callable(missing):
+        missing(filename, error)
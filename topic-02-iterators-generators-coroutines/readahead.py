@@ -0,0 +1,196 @@
+"""Multi-file reader that opens, reads and decompresses the next K files ahead.
+
+read_files() in examples.py opens one file, reads it through the default
+8 KB text buffer, and only then opens the next one, so every open() and
+first read waits for the one before it. On a network filesystem holding
+thousands of small files that latency is most of the run time. Here a
+thread pool works on the next `prefetch` files at once: each worker opens
+its file with a large buffer, decompresses .gz/.bz2/.xz on the fly (zlib,
+bz2 and lzma release the GIL while they work), splits lines, and hands
+chunks over through a small queue. The caller still sees one ordered stream
+of lines (or raw byte chunks) in filename order.
+"""
+import bz2
+import concurrent.futures
+import contextlib
+import gzip
+import io
+import lzma
+import threading
+from collections import deque
+
+from prefetch import Handoff, check_missing, report_missing
+
+COMPRESSED_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+
+def open_compressed(filename, buffer_size=1 << 20):
+    """Open a file for binary reading, decompressing by extension."""
+    for suffix, opener in COMPRESSED_OPENERS.items():
+        if str(filename).endswith(suffix):
+            return io.BufferedReader(opener(filename, 'rb'), buffer_size)
+    return open(filename, 'rb', buffering=buffer_size)
+
+
+def _read_chunks(filename, opener, mode, chunk_size, encoding, errors):
+    with opener(filename) as raw:
+        if mode == 'bytes':
+            read = lambda: raw.read(chunk_size)
+        else:
+            text = io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+            read = lambda: text.readlines(chunk_size)  # whole lines, ~chunk_size bytes
+        while True:
+            chunk = read()
+            if not chunk:
+                return
+            yield chunk
+
+
+class _FileJob:
+    """One file being read ahead by a pool thread into a bounded queue."""
+
+    def __init__(self, filename, stop):
+        self.filename = filename
+        self.chunks = Handoff(4, stop)
+
+    def run(self, *args):
+        with contextlib.closing(_read_chunks(self.filename, *args)) as chunks:
+            self.chunks.produce(chunks)
+
+
+def read_files(*filenames, prefetch=4, mode='lines', chunk_size=1 << 20, encoding='utf-8',
+               errors='strict', missing='warn', opener=open_compressed, executor=None):
+    """Generator that reads multiple files in order while reading the next ones ahead.
+
+    mode='lines' yields text lines, mode='bytes' yields raw byte chunks of up
+    to chunk_size. missing is 'warn' (print a warning, as examples.py does),
+    'skip', 'raise', or a callable(filename, error), as in async_pipeline.py.
+    opener(filename) must return a binary file.
+    """
+    if mode not in ('lines', 'bytes'):
+        raise ValueError(f"mode must be 'lines' or 'bytes', not {mode!r}")
+    check_missing(missing)
+    prefetch = max(1, prefetch)
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch,
+                                                         thread_name_prefix='readahead')
+    stop = threading.Event()
+    remaining = iter(filenames)
+    active = deque()
+
+    def launch():
+        filename = next(remaining, None)
+        if filename is not None:
+            job = _FileJob(filename, stop)
+            executor.submit(job.run, opener, mode, chunk_size, encoding, errors)
+            active.append(job)
+
+    try:
+        for _ in range(prefetch):
+            launch()
+        while active:
+            job = active.popleft()
+            launch()  # keep `prefetch` files in flight
+            while True:
+                try:
+                    chunk = job.chunks.get()
+                except StopIteration:
+                    break
+                except FileNotFoundError as e:
+                    report_missing(job.filename, e, missing)
+                    break
+                if mode == 'bytes':
+                    yield chunk
+                else:
+                    yield from chunk
+    finally:
+        stop.set()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    import os
+    import shutil
+    import tempfile
+    import time
+
+    class LatencyOpener:
+        """Adds a fixed delay to every open, like a network filesystem would."""
+
+        def __init__(self, delay):
+            self.delay = delay
+
+        def __call__(self, filename, *args, **kwargs):
+            time.sleep(self.delay)
+            return open_compressed(filename)
+
+    def sequential_read_files(*filenames, delay):
+        """The examples.py read_files, with the same latency per open."""
+        for filename in filenames:
+            try:
+                time.sleep(delay)
+                with open(filename, 'r') as file:
+                    yield from file
+            except FileNotFoundError:
+                print(f"Warning: {filename} not found")
+
+    folder = tempfile.mkdtemp()
+    paths = []
+    lines = [f"{i},item{i},{i * 0.5:.2f}\n" for i in range(200)]
+    for i in range(500):
+        path = os.path.join(folder, f"part_{i:04d}.csv")
+        with open(path, 'w') as file:
+            file.writelines(lines)
+        paths.append(path)
+    big_lines = [f"{i},item{i},{i * 0.5:.2f}\n" for i in range(500_000)]
+    compressed = []
+    for suffix, opener in COMPRESSED_OPENERS.items():
+        path = os.path.join(folder, f"big.csv{suffix}")
+        with opener(path, 'wt') as file:
+            file.writelines(big_lines)
+        compressed.append(path)
+
+    try:
+        delay = 0.005
+        print(f"{len(paths)} small files, {delay * 1000:.0f} ms latency per open:")
+        start = time.perf_counter()
+        count = sum(1 for _ in sequential_read_files(*paths, delay=delay))
+        base = time.perf_counter() - start
+        print(f"  examples.py read_files: {count:,} lines in {base:.2f}s")
+        for prefetch in (1, 8, 32):
+            start = time.perf_counter()
+            count = sum(1 for _ in read_files(*paths, prefetch=prefetch,
+                                              opener=LatencyOpener(delay)))
+            elapsed = time.perf_counter() - start
+            print(f"  read_files(prefetch={prefetch}): {count:,} lines in {elapsed:.2f}s "
+                  f"({base / elapsed:.1f}x)")
+
+        print("Three compressed files (.gz, .bz2, .xz), 500,000 lines each:")
+        start = time.perf_counter()
+        count = 0
+        for path in compressed:
+            with COMPRESSED_OPENERS[os.path.splitext(path)[1]](path, 'rt') as file:
+                count += sum(1 for _ in file)
+        base = time.perf_counter() - start
+        print(f"  one after another: {count:,} lines in {base:.2f}s")
+        start = time.perf_counter()
+        count = sum(1 for _ in read_files(*compressed, prefetch=3))
+        elapsed = time.perf_counter() - start
+        print(f"  read_files(prefetch=3): {count:,} lines in {elapsed:.2f}s "
+              f"({base / elapsed:.1f}x, {os.cpu_count()} CPUs)")
+        start = time.perf_counter()
+        total = sum(len(chunk) for chunk in read_files(*compressed, prefetch=3, mode='bytes'))
+        print(f"  mode='bytes': {total / 1024 / 1024:.1f} MB decompressed in "
+              f"{time.perf_counter() - start:.2f}s")
+
+        missing = []
+        list(read_files(paths[0], 'nope.csv', missing=lambda name, error: missing.append(name)))
+        print(f"Missing files reported to a callback: {missing}")
+    finally:
+        shutil.rmtree(folder)
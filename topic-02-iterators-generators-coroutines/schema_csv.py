@@ -0,0 +1,346 @@
+"""Schema-compiled CSV decoding, in one process or split across many.
+
+csv_reader + data_transformer in examples.py build a dict per row with
+DictReader, then test 'price' in record, call float() and build the date
+string - the same decisions, by key lookup, on every row. A Schema declares
+the fields once; compile(header) turns it into one generated function per
+file that reads the columns by position and calls each converter directly:
+
+    def convert(row):
+        return (row[1], c1(row[2]), row[4], c3(row[4]))
+
+Rows come back as plain tuples, or as instances of a generated __slots__
+record class. A row with the wrong number of fields or a value its converter
+rejects is passed to on_reject(line_number, row, error) and skipped instead
+of stopping the file. read_parallel() splits a large file into byte ranges
+ending on newlines and decodes them in worker processes; like
+topic-01/mmap_reader.py it assumes no quoted field contains a newline.
+"""
+import concurrent.futures
+import csv
+import io
+import os
+import sys
+import time
+import uuid
+
+# The byte-range splitting and the bounded window of worker futures are
+# topic-01's mmap_reader's; its folder isn't a package, so put it on the path
+_TOPIC_01 = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                          'topic-01-python-internals-memory-management'))
+if _TOPIC_01 not in sys.path:
+    sys.path.append(_TOPIC_01)
+
+from mmap_reader import split_ranges, windowed_results  # noqa: E402
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+_REQUIRED = object()
+
+
+class Prefixed:
+    """Converter that prepends a fixed prefix (picklable, unlike a lambda)."""
+    __slots__ = ['prefix']
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def __call__(self, value):
+        return self.prefix + value
+
+
+class _WithDefault:
+    """Converter that returns `default` for an empty field."""
+    __slots__ = ['convert', 'default']
+
+    def __init__(self, convert, default):
+        self.convert = convert
+        self.default = default
+
+    def __call__(self, value):
+        return self.convert(value) if value else self.default
+
+
+class Field:
+    """One output field: read column `source` (default: name) through `type`."""
+    __slots__ = ['name', 'type', 'source', 'default']
+
+    def __init__(self, name, type=str, source=None, default=_REQUIRED):
+        self.name = name
+        self.type = type
+        self.source = source or name
+        self.default = default
+
+    def converter(self):
+        """The callable applied to the raw string, or None to keep it as-is."""
+        convert = None if self.type is str else self.type
+        if self.default is not _REQUIRED:
+            return _WithDefault(convert or str, self.default)
+        return convert
+
+
+class ParseStats:
+    """Rows decoded, rows rejected and throughput of one read."""
+
+    def __init__(self):
+        self.rows = 0
+        self.rejected = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return (f"ParseStats({self.rows:,} rows, {self.rejected:,} rejected, "
+                f"{self.bytes / 1024 / 1024:.1f} MB in {self.seconds:.2f}s, "
+                f"{self.rows_per_second:,.0f} rows/s)")
+
+
+def make_record_class(name, field_names):
+    """A class with __slots__ and a positional __init__ for the given fields."""
+    args = ', '.join(field_names)
+    body = '\n'.join(f"        self.{field} = {field}" for field in field_names) or "        pass"
+    source = (f"class {name}:\n"
+              f"    __slots__ = {tuple(field_names)!r}\n"
+              f"    def __init__(self, {args}):\n{body}\n"
+              f"    def __repr__(self):\n"
+              f"        return f\"{name}(" + ', '.join(f"{f}={{self.{f}!r}}" for f in field_names)
+              + ")\"\n"
+              f"    def astuple(self):\n"
+              f"        return ({''.join(f'self.{f}, ' for f in field_names)})\n")
+    namespace = {}
+    exec(source, namespace)
+    return namespace[name]
+
+
+class Schema:
+    """Declared fields, compiled once per file header into a positional converter.
+
+    record=None returns tuples; record='Order' returns instances of a
+    generated slotted class called Order (Schema.record_class).
+    """
+
+    def __init__(self, *fields, record=None):
+        self.fields = fields
+        self.record_class = make_record_class(record, [f.name for f in fields]) if record else None
+        self.token = uuid.uuid4().hex  # identifies this schema to worker processes
+
+    def compile(self, header, as_tuples=False):
+        """Generate convert(row) for a file whose first line was `header`."""
+        positions = {name: i for i, name in enumerate(header)}
+        # dict.fromkeys: several fields can share one source column
+        missing = list(dict.fromkeys(f.source for f in self.fields if f.source not in positions))
+        if missing:
+            raise ValueError(f"CSV header has no column(s) {missing}; it has {list(header)}")
+        namespace = {}
+        parts = []
+        for i, field in enumerate(self.fields):
+            column = f"row[{positions[field.source]}]"
+            convert = field.converter()
+            if convert is None:
+                parts.append(column)
+            else:
+                namespace[f"c{i}"] = convert
+                parts.append(f"c{i}({column})")
+        if self.record_class is None or as_tuples:
+            body = f"({', '.join(parts)},)" if parts else "()"
+        else:
+            namespace['Record'] = self.record_class
+            body = f"Record({', '.join(parts)})"
+        exec(f"def convert(row):\n    return {body}", namespace)
+        convert = namespace['convert']
+        convert.width = len(header)
+        return convert
+
+    def decode(self, rows, convert, on_reject=None, first_line=2, stats=None):
+        """Generator of converted rows; bad rows go to on_reject and are skipped."""
+        width = convert.width
+        rejected = 0
+        count = 0
+        try:
+            for line, row in enumerate(rows, first_line):
+                if len(row) == width:
+                    try:
+                        value = convert(row)
+                    except (ValueError, TypeError, ArithmeticError) as e:
+                        error = e
+                    else:
+                        count += 1
+                        yield value
+                        continue
+                elif not row:
+                    continue  # blank line
+                else:
+                    error = ValueError(f"expected {width} fields, got {len(row)}")
+                rejected += 1
+                if on_reject is not None:
+                    on_reject(line, row, error)
+        finally:
+            if stats is not None:
+                stats.rows += count
+                stats.rejected += rejected
+
+    def read(self, filename, on_reject=None, stats=None, encoding='utf-8'):
+        """Generator of typed rows from one CSV file, decoded in this process."""
+        stats = stats if stats is not None else ParseStats()
+        with open(filename, 'r', newline='', encoding=encoding) as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return
+            convert = self.compile(header)
+            yield from self.decode(reader, convert, on_reject, stats=stats)
+        stats.bytes += os.path.getsize(filename)
+        stats.finished = time.perf_counter()
+
+    def read_parallel(self, filename, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                      on_reject=None, stats=None, encoding='utf-8'):
+        """Generator of typed rows, decoded by worker processes, in file order.
+
+        Field converters must be picklable (module-level functions, classes
+        such as float, or Prefixed). At most two ranges per worker are in flight.
+        """
+        stats = stats if stats is not None else ParseStats()
+        with open(filename, 'rb') as file:
+            header_line = file.readline()
+        # An empty file parses to no row at all (read() sees None), but csv.reader
+        # over the empty string [''] gives []
+        header = next(csv.reader([header_line.decode(encoding)]), None)
+        if not header:
+            return
+        self.compile(header)  # fail fast on a bad header, before starting workers
+        ranges = split_ranges(filename, chunk_bytes, offset=len(header_line))
+        workers = workers or os.cpu_count() or 1
+        make_record = self.record_class
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            submit = lambda start, end: executor.submit(_decode_range, self, header, filename,
+                                                        start, end, encoding)
+            line = 2
+            for rows, rejects, lines, size in windowed_results(submit, ranges, workers * 2):
+                for local_line, row, error in rejects:
+                    if on_reject is not None:
+                        on_reject(line + local_line, row, error)
+                stats.rows += len(rows)
+                stats.rejected += len(rejects)
+                stats.bytes += size
+                line += lines
+                if make_record is None:
+                    yield from rows
+                else:
+                    for values in rows:
+                        yield make_record(*values)
+        stats.finished = time.perf_counter()
+
+    # Workers rebuild the compiled converter; generated functions don't pickle
+    def __getstate__(self):
+        return {'fields': self.fields, 'token': self.token}
+
+    def __setstate__(self, state):
+        self.fields = state['fields']
+        self.token = state['token']
+        self.record_class = None
+
+
+_compiled = {}
+
+
+def _decode_range(schema, header, filename, start, end, encoding):
+    """Worker: decode one byte range into tuples plus (line, row, error) rejects."""
+    key = (schema.token, tuple(header))
+    convert = _compiled.get(key)
+    if convert is None:
+        convert = _compiled[key] = schema.compile(header, as_tuples=True)
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(encoding)
+    # Parsed exactly as read() parses the file: str.splitlines() would also
+    # break lines at \x0c, \x1c, \u2028 and friends inside a field
+    records = list(csv.reader(io.StringIO(text, newline='')))
+    rejects = []
+    rows = list(schema.decode(records, convert, first_line=0,
+                              on_reject=lambda line, row, error: rejects.append((line, row, error))))
+    return rows, rejects, len(records), end - start
+
+
+ORDER_SCHEMA = Schema(
+    Field('name'),
+    Field('price', float),
+    Field('date'),
+    Field('processed_date', Prefixed('parsed_'), source='date'),
+    record='Order',
+)
+
+
+if __name__ == "__main__":
+    import random
+    import shutil
+    import tempfile
+
+    def csv_reader(filename):
+        """The examples.py pipeline: DictReader plus per-row key tests."""
+        with open(filename, 'r') as file:
+            yield from csv.DictReader(file)
+
+    def data_transformer(data_stream):
+        for record in data_stream:
+            if 'price' in record:
+                record['price'] = float(record['price'])
+            if 'date' in record:
+                record['processed_date'] = f"parsed_{record['date']}"
+            yield record
+
+    random.seed(8)
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "orders.csv")
+    n = 1_000_000
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'name', 'price', 'quantity', 'date'])
+        for i in range(n):
+            if i % 100_000 == 99_999:
+                writer.writerow([i, f"item{i}", "N/A", 1, "2023-01-01"])  # bad price
+            elif i % 100_000 == 49_999:
+                writer.writerow([i, f"item{i}", "3.50"])  # truncated row
+            else:
+                writer.writerow([i, f"item{i}", f"{random.uniform(1, 50):.2f}",
+                                 random.randint(1, 9), f"2023-01-{i % 28 + 1:02d}"])
+
+    try:
+        start = time.perf_counter()
+        try:
+            count = sum(1 for _ in data_transformer(csv_reader(path)))
+            print(f"DictReader + data_transformer: {count:,} rows, "
+                  f"{count / (time.perf_counter() - start):,.0f} rows/s")
+        except ValueError as e:
+            print(f"DictReader + data_transformer stopped after "
+                  f"{time.perf_counter() - start:.2f}s: {e!r}")
+
+        rejects = []
+        collect = lambda line, row, error: rejects.append((line, error))
+        for label, schema in [("tuples", Schema(*ORDER_SCHEMA.fields)),
+                              ("slotted Order records", ORDER_SCHEMA)]:
+            stats = ParseStats()
+            rejects.clear()
+            rows = schema.read(path, on_reject=collect, stats=stats)
+            first = next(rows)
+            for _ in rows:
+                pass
+            print(f"Schema.read ({label}): {stats}; first row {first}")
+        print(f"Rejected rows (line, error): {rejects[:2]} ...")
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            stats = ParseStats()
+            rejects.clear()
+            count = sum(1 for _ in ORDER_SCHEMA.read_parallel(path, workers=workers,
+                                                              on_reject=collect, stats=stats))
+            print(f"Schema.read_parallel(workers={workers}): {stats}, "
+                  f"first reject at line {rejects[0][0]}")
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,506 @@
+"""Mergeable streaming statistics: moments, EWMA, sliding windows, quantiles.
+
+running_average() in examples.py keeps a sum and a count, which is enough
+for a mean and nothing else. The accumulators here each keep a fixed amount
+of state no matter how many values they see, take values one at a time
+(add) or in batches (update), and can merge() partial states - so process
+pool workers (like process_data_chunk in topic-07) can each summarise their
+chunk and the parent combines the summaries instead of the raw data.
+
+- Moments: count, mean, variance (Welford / Chan et al.), min, max.
+- EWMA: exponentially weighted mean; merge() means "other came after self".
+- SlidingWindow: Moments over the last `window` seconds, in fixed buckets.
+- TDigest: approximate quantiles (p50, p99, ...) in O(compression) memory.
+"""
+import math
+import time
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - batches are summed in pure Python then
+    np = None
+
+
+def _batch_moments(values):
+    """(count, mean, M2, min, max) of one batch, computed in a single pass."""
+    if np is not None and isinstance(values, np.ndarray):
+        if not values.size:
+            return 0, 0.0, 0.0, math.inf, -math.inf
+        mean = float(values.mean())
+        return (values.size, mean, float(((values - mean) ** 2).sum()),
+                float(values.min()), float(values.max()))
+    values = values if isinstance(values, (list, tuple)) else list(values)
+    if not values:
+        return 0, 0.0, 0.0, math.inf, -math.inf
+    count = len(values)
+    mean = math.fsum(values) / count
+    m2 = math.fsum((x - mean) ** 2 for x in values)
+    return count, mean, m2, min(values), max(values)
+
+
+class Moments:
+    """Count, mean, variance, min and max in O(1) memory."""
+    __slots__ = ['count', 'mean', 'm2', 'min', 'max']
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """Welford's update for one value."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def _combine(self, count, mean, m2, low, high):
+        # Chan et al.'s pairwise formula - exact, and stable for large counts
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def update(self, values):
+        """Add a batch: summarise it in one pass, then combine once."""
+        self._combine(*_batch_moments(values))
+        return self
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (n - 1 in the denominator)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def __repr__(self):
+        return (f"Moments(count={self.count}, mean={self.mean:.6g}, stdev={self.stdev:.6g}, "
+                f"min={self.min:.6g}, max={self.max:.6g})")
+
+
+class EWMA:
+    """Exponentially weighted moving average, bias-corrected from the first value.
+
+    Keeps the decayed sums of values and of weights, so merge(other) is exact
+    when other saw the values that came after this one's.
+    """
+    __slots__ = ['alpha', 'count', 'weighted_sum', 'weight']
+
+    def __init__(self, alpha=None, halflife=None):
+        if (alpha is None) == (halflife is None):
+            raise ValueError("Give exactly one of alpha or halflife")
+        self.alpha = alpha if alpha is not None else 1 - 0.5 ** (1 / halflife)
+        self.count = 0
+        self.weighted_sum = 0.0
+        self.weight = 0.0
+
+    def add(self, value):
+        keep = 1 - self.alpha
+        self.weighted_sum = self.weighted_sum * keep + value
+        self.weight = self.weight * keep + 1
+        self.count += 1
+
+    def update(self, values):
+        keep = 1 - self.alpha
+        weighted_sum, weight = self.weighted_sum, self.weight
+        count = 0
+        for value in values:
+            weighted_sum = weighted_sum * keep + value
+            weight = weight * keep + 1
+            count += 1
+        self.weighted_sum, self.weight = weighted_sum, weight
+        self.count += count
+        return self
+
+    def merge(self, other):
+        """Append other's values after this one's (merging is order-dependent)."""
+        if other.alpha != self.alpha:
+            raise ValueError("Can only merge EWMAs with the same alpha")
+        decay = (1 - self.alpha) ** other.count
+        self.weighted_sum = self.weighted_sum * decay + other.weighted_sum
+        self.weight = self.weight * decay + other.weight
+        self.count += other.count
+        return self
+
+    @property
+    def value(self):
+        return self.weighted_sum / self.weight if self.weight else 0.0
+
+    def __repr__(self):
+        return f"EWMA(alpha={self.alpha:.4g}, value={self.value:.6g}, count={self.count})"
+
+
+class SlidingWindow:
+    """Moments over the last `window` seconds, kept in `buckets` fixed time slots.
+
+    Memory is `buckets` Moments, however many values arrive; the window edge
+    is accurate to one bucket (window / buckets seconds).
+    """
+
+    def __init__(self, window=60.0, buckets=60, clock=time.monotonic):
+        self.window = window
+        self.buckets = buckets
+        self.width = window / buckets
+        self.clock = clock
+        self._slots = [Moments() for _ in range(buckets)]
+        self._slot_ids = [None] * buckets  # which absolute time slot each one holds
+        self._newest = None
+        self.dropped = 0  # late values that were already outside the window
+
+    def _slot(self, now):
+        """The slot for time `now`, or None if `now` is older than the window."""
+        slot_id = int(now // self.width)
+        if self._newest is None or slot_id > self._newest:
+            self._newest = slot_id
+        elif slot_id <= self._newest - self.buckets:
+            # Out of order and too late: its slot may already hold newer data
+            return None
+        index = slot_id % self.buckets
+        if self._slot_ids[index] != slot_id:
+            # Stale slot from a previous lap around the ring: recycle it
+            self._slots[index] = Moments()
+            self._slot_ids[index] = slot_id
+        return self._slots[index]
+
+    def add(self, value, now=None):
+        slot = self._slot(self.clock() if now is None else now)
+        if slot is None:
+            self.dropped += 1
+        else:
+            slot.add(value)
+
+    def update(self, values, now=None):
+        slot = self._slot(self.clock() if now is None else now)
+        if slot is None:
+            self.dropped += len(values) if hasattr(values, '__len__') else sum(1 for _ in values)
+        else:
+            slot.update(values)
+        return self
+
+    def merge(self, other):
+        """Combine slot by slot; both windows must share window and buckets."""
+        if (other.window, other.buckets) != (self.window, self.buckets):
+            raise ValueError("Can only merge windows with the same shape")
+        for index, slot_id in enumerate(other._slot_ids):
+            if slot_id is None:
+                continue
+            if self._slot_ids[index] is None or self._slot_ids[index] < slot_id:
+                self._slots[index] = Moments()
+                self._slot_ids[index] = slot_id
+            if self._slot_ids[index] == slot_id:
+                self._slots[index].merge(other._slots[index])
+        if other._newest is not None and (self._newest is None or other._newest > self._newest):
+            self._newest = other._newest
+        return self
+
+    def stats(self, now=None):
+        """Moments of every value added in the last `window` seconds."""
+        now = self.clock() if now is None else now
+        oldest = int(now // self.width) - self.buckets + 1
+        result = Moments()
+        for slot, slot_id in zip(self._slots, self._slot_ids):
+            if slot_id is not None and slot_id >= oldest:
+                result.merge(slot)
+        return result
+
+
+class TDigest:
+    """Approximate quantiles of an unbounded stream (Dunning's merging t-digest).
+
+    Values are summarised into at most about `compression` weighted centroids,
+    kept small near the tails so p99 and p999 stay accurate. New values go to
+    a buffer that is merged in a sorted pass when it fills.
+    """
+    __slots__ = ['compression', 'means', 'weights', 'total', 'min', 'max', '_buffer',
+                 '_buffer_limit']
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+        self._buffer_limit = 10 * compression
+
+    def add(self, value):
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def update(self, values):
+        if np is not None and isinstance(values, np.ndarray):
+            values = values.tolist()
+        self._buffer.extend(values)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        other._compress()
+        self._compress()
+        self._compress(list(zip(other.means, other.weights)), other.min, other.max)
+        return self
+
+    def _k(self, q):
+        # The k1 scale function: centroids may span 1 unit of k, which is
+        # narrow near q=0 and q=1 and wide around the median
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k):
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self, extra=(), extra_min=math.inf, extra_max=-math.inf):
+        if not self._buffer and not extra:
+            return
+        buffer = self._buffer
+        if buffer:
+            extra_min = min(extra_min, min(buffer))
+            extra_max = max(extra_max, max(buffer))
+        self.min = min(self.min, extra_min)
+        self.max = max(self.max, extra_max)
+
+        items = list(zip(self.means, self.weights))
+        items.extend((value, 1.0) for value in buffer)
+        items.extend(extra)
+        items.sort()
+        self._buffer = []
+        total = math.fsum(weight for _, weight in items)
+
+        means, weights = [], []
+        mean, weight = items[0]
+        weight_before = 0.0
+        limit = total * self._q(self._k(0) + 1)
+        for item_mean, item_weight in items[1:]:
+            if weight_before + weight + item_weight <= limit:
+                weight += item_weight
+                mean += (item_mean - mean) * item_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                weight_before += weight
+                limit = total * self._q(self._k(weight_before / total) + 1)
+                mean, weight = item_mean, item_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights, self.total = means, weights, total
+
+    def quantile(self, q):
+        """Estimated value below which a fraction q of the stream falls."""
+        self._compress()
+        if not self.means:
+            raise ValueError("quantile() of an empty TDigest")
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        target = q * self.total
+        means, weights = self.means, self.weights
+        # Each centroid's mean sits at the middle of its weight
+        center = weights[0] / 2
+        if target < center:
+            return self.min + (means[0] - self.min) * target / center
+        for i in range(1, len(means)):
+            next_center = center + (weights[i - 1] + weights[i]) / 2
+            if target < next_center:
+                fraction = (target - center) / (next_center - center)
+                return means[i - 1] + (means[i] - means[i - 1]) * fraction
+            center = next_center
+        fraction = (target - center) / (self.total - center)
+        return means[-1] + (self.max - means[-1]) * fraction
+
+    def __len__(self):
+        """Number of centroids currently held."""
+        self._compress()
+        return len(self.means)
+
+
+class StreamStats:
+    """Moments, an EWMA and a TDigest for one metric, updated and merged together."""
+    __slots__ = ['moments', 'ewma', 'digest']
+
+    def __init__(self, alpha=0.01, compression=200):
+        self.moments = Moments()
+        self.ewma = EWMA(alpha)
+        self.digest = TDigest(compression)
+
+    def add(self, value):
+        self.moments.add(value)
+        self.ewma.add(value)
+        self.digest.add(value)
+
+    def update(self, values):
+        if not isinstance(values, (list, tuple)) and not (
+                np is not None and isinstance(values, np.ndarray)):
+            values = list(values)
+        self.moments.update(values)
+        self.ewma.update(values)
+        self.digest.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.ewma.merge(other.ewma)
+        self.digest.merge(other.digest)
+        return self
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        result = self._moments_summary()
+        if self.moments.count:
+            for q in quantiles:
+                result[f"p{q * 100:g}"] = self.digest.quantile(q)
+        return result
+
+    def _moments_summary(self):
+        return {
+            'count': self.moments.count,
+            'mean': self.moments.mean,
+            'stdev': self.moments.stdev,
+            'min': self.moments.min,
+            'max': self.moments.max,
+            'ewma': self.ewma.value,
+        }
+
+
+class Summary(Mapping):
+    """StreamStats.summary() that only computes the quantiles when one is read.
+
+    The moments are copied when it is made; the quantiles come from the live
+    digest, so read them before the stats take more values.
+    """
+    __slots__ = ['_values', '_stats', '_quantiles']
+
+    def __init__(self, stats, quantiles=(0.5, 0.9, 0.99)):
+        self._values = stats._moments_summary()
+        self._stats = stats if stats.moments.count else None
+        self._quantiles = quantiles
+
+    def _complete(self):
+        if self._stats is not None:
+            for q in self._quantiles:
+                self._values[f"p{q * 100:g}"] = self._stats.digest.quantile(q)
+            self._stats = None
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._complete()
+        return self._values[key]
+
+    def __iter__(self):
+        self._complete()
+        return iter(self._values)
+
+    def __len__(self):
+        self._complete()
+        return len(self._values)
+
+    def __repr__(self):
+        self._complete()
+        return f"Summary({self._values!r})"
+
+
+def running_stats(alpha=0.01, compression=200):
+    """Generator like running_average, but yields a full summary; send a value or a list.
+
+    Each summary has the moments straight away and computes the quantiles
+    only if one of them is read, so a send() costs an add(), not a digest scan.
+    """
+    stats = StreamStats(alpha, compression)
+
+    while True:
+        value = yield Summary(stats)
+        if isinstance(value, (list, tuple)):
+            stats.update(value)
+        elif value is not None:
+            stats.add(value)
+
+
+def summarise_chunk(chunk_info):
+    """process_data_chunk from topic-07, returning a StreamStats instead of the values."""
+    chunk_id, start_value, size = chunk_info
+    values = [(v ** 2 + math.sin(v) * 100) % 1000 for v in range(start_value, start_value + size)]
+    return chunk_id, StreamStats().update(values)
+
+
+if __name__ == "__main__":
+    import concurrent.futures
+    import pickle
+    import random
+
+    stats_gen = running_stats()
+    next(stats_gen)  # Prime the generator
+    print(stats_gen.send(10)['mean'])  # 10.0
+    print(stats_gen.send(20)['mean'])  # 15.0
+    print(stats_gen.send([30, 40])['mean'])  # 25.0
+    print(stats_gen.send(50))  # the quantiles are computed here, when they are shown
+
+    random.seed(3)
+    n = 1_000_000
+    # Request latencies: mostly fast, with a long tail
+    latencies = [random.lognormvariate(3, 0.6) for _ in range(n)]
+    exact = sorted(latencies)
+
+    start = time.perf_counter()
+    one_by_one = StreamStats()
+    for latency in latencies:
+        one_by_one.add(latency)
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = StreamStats()
+    for i in range(0, n, 10_000):
+        batched.update(latencies[i:i + 10_000])
+    batch_time = time.perf_counter() - start
+    print(f"\n{n:,} values: add() {single_time:.2f}s, update() in batches of 10,000 "
+          f"{batch_time:.2f}s")
+
+    for q in (0.5, 0.9, 0.99, 0.999):
+        estimate = batched.digest.quantile(q)
+        true_value = exact[int(q * (n - 1))]
+        print(f"  p{q * 100:g}: {estimate:8.3f} (exact {true_value:8.3f}, "
+              f"error {abs(estimate - true_value) / true_value:.2%})")
+    print(f"  t-digest: {len(batched.digest)} centroids, "
+          f"{len(pickle.dumps(batched))} bytes pickled vs {len(pickle.dumps(latencies)):,} "
+          f"for the samples")
+    print(f"  mean {batched.moments.mean:.4f} (exact {math.fsum(latencies) / n:.4f}), "
+          f"stdev {batched.moments.stdev:.4f}")
+
+    # Per-worker partial states, merged in the parent
+    chunks = [(i, i * 250_000, 250_000) for i in range(4)]
+    start = time.perf_counter()
+    merged = StreamStats()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=4) as executor:
+        for chunk_id, partial in sorted(executor.map(summarise_chunk, chunks)):
+            merged.merge(partial)  # chunks in order, so the EWMA merge is exact too
+    print(f"\nMerged 4 process-pool summaries in {time.perf_counter() - start:.2f}s: "
+          f"count {merged.moments.count:,}, p50 {merged.digest.quantile(0.5):.1f}, "
+          f"p99 {merged.digest.quantile(0.99):.1f}")
+    single = summarise_chunk((0, 0, 1_000_000))[1]
+    print(f"Single pass over all values: p50 {single.digest.quantile(0.5):.1f}, "
+          f"p99 {single.digest.quantile(0.99):.1f}, mean {single.moments.mean:.3f} "
+          f"(merged mean {merged.moments.mean:.3f}), EWMA {single.ewma.value:.3f} "
+          f"(merged {merged.ewma.value:.3f})")
+
+    window = SlidingWindow(window=10, buckets=10)
+    for second in range(30):
+        window.update([second] * 100, now=second)
+    print(f"\nLast 10 s of a 30 s stream: {window.stats(now=29)}")
@@ -0,0 +1,303 @@
+"""One stack-based traversal engine for binary and n-ary trees.
+
+TreeNode.traverse and flatten in examples.py recurse with yield from: every
+value is passed up through one generator frame per level, so a value at
+depth d costs O(d) to deliver, and a deep enough tree hits the recursion
+limit. TreeIterator uses an explicit stack but only does preorder on binary
+trees. traverse() here walks any tree with an explicit stack or queue in
+O(1) per node, in preorder, postorder, inorder, BFS or level-by-level.
+
+It only needs to know how to get a node's children, so the same engine also
+walks CompactTree, an array-backed layout for large read-mostly trees that
+stores no per-node objects at all.
+"""
+import array
+from collections import deque
+
+ORDERS = ('preorder', 'postorder', 'inorder', 'bfs', 'levels')
+
+
+class BinaryNode:
+    """The binary TreeNode from examples.py."""
+    __slots__ = ['value', 'left', 'right']
+
+    def __init__(self, value, left=None, right=None):
+        self.value = value
+        self.left = left
+        self.right = right
+
+    def __iter__(self):
+        return TreeIterator(self)
+
+    def traverse(self, order='preorder'):
+        return traverse(self, order)
+
+
+class TreeNode:
+    """The n-ary TreeNode from examples.py."""
+    __slots__ = ['value', 'children']
+
+    def __init__(self, value, children=None):
+        self.value = value
+        self.children = children or []
+
+    def __iter__(self):
+        return TreeIterator(self)
+
+    def traverse(self, order='preorder'):
+        """Generator for depth-first (or any other order) traversal, without recursion."""
+        return traverse(self, order)
+
+
+def node_children(node):
+    """Children of a BinaryNode (left, right) or a TreeNode, skipping empty slots."""
+    children = getattr(node, 'children', None)
+    if children is not None:
+        return children
+    return [child for child in (node.left, node.right) if child is not None]
+
+
+def node_split(node):
+    """(before, after) children for inorder: left/right, or first/rest for n-ary nodes."""
+    if hasattr(node, 'left'):
+        return ([node.left] if node.left is not None else [],
+                [node.right] if node.right is not None else [])
+    return node.children[:1], node.children[1:]
+
+
+def _node_value(node):
+    return node.value
+
+
+def traverse(root, order='preorder', children=node_children, value=_node_value,
+             split=node_split):
+    """Iterate over a tree's values in the given order, with no recursion.
+
+    children(node) -> iterable of child nodes, value(node) -> what to yield.
+    split(node) -> (before, after) child lists is only used for inorder.
+    'levels' yields one list of values per depth.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}, not {order!r}")
+    if root is None:
+        return iter(())
+    if order == 'preorder':
+        return _preorder(root, children, value)
+    if order == 'postorder':
+        return _postorder(root, children, value)
+    if order == 'inorder':
+        return _inorder(root, split, value)
+    if order == 'bfs':
+        return _bfs(root, children, value)
+    return _levels(root, children, value)
+
+
+def _preorder(root, children, value):
+    stack = [root]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        node = pop()
+        yield value(node)
+        kids = children(node)
+        if kids:
+            # Right-most child first so the left-most is visited next
+            extend(reversed(kids))
+
+
+def _postorder(root, children, value):
+    # Each node is pushed twice: once to expand it, once (marked) to emit it
+    stack = [(root, False)]
+    pop, append = stack.pop, stack.append
+    while stack:
+        node, expanded = pop()
+        if expanded:
+            yield value(node)
+            continue
+        append((node, True))
+        kids = children(node)
+        if kids:
+            for child in reversed(kids):
+                append((child, False))
+
+
+def _inorder(root, split, value):
+    stack = [(root, False)]
+    pop, append = stack.pop, stack.append
+    while stack:
+        node, expanded = pop()
+        if expanded:
+            yield value(node)
+            continue
+        before, after = split(node)
+        for child in reversed(after):
+            append((child, False))
+        append((node, True))
+        for child in reversed(before):
+            append((child, False))
+
+
+def _bfs(root, children, value):
+    queue = deque([root])
+    popleft, extend = queue.popleft, queue.extend
+    while queue:
+        node = popleft()
+        yield value(node)
+        kids = children(node)
+        if kids:
+            extend(kids)
+
+
+def _levels(root, children, value):
+    level = [root]
+    while level:
+        yield [value(node) for node in level]
+        next_level = []
+        for node in level:
+            kids = children(node)
+            if kids:
+                next_level.extend(kids)
+        level = next_level
+
+
+class TreeIterator:
+    """Iterator over a tree in any order (examples.py's version was preorder-only)."""
+
+    def __init__(self, root, order='preorder'):
+        self._values = traverse(root, order)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._values)
+
+
+def flatten(nested_list):
+    """Flatten nested lists with a stack of iterators instead of recursion."""
+    stack = [iter(nested_list)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
+            yield item
+        else:
+            stack.pop()
+
+
+class CompactTree:
+    """Read-mostly n-ary tree stored as arrays, nodes numbered in BFS order.
+
+    Because of the BFS numbering the children of node i are the contiguous
+    range first_child[i] .. first_child[i + 1], so the whole structure is one
+    list of values plus one array of ints - no node objects at all.
+    """
+    __slots__ = ['values', 'first_child']
+
+    def __init__(self, values, first_child):
+        self.values = values
+        self.first_child = first_child
+
+    @classmethod
+    def from_nodes(cls, root, children=node_children, value=_node_value):
+        values = []
+        first_child = array.array('q')
+        next_index = 1
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            values.append(value(node))
+            first_child.append(next_index)
+            kids = children(node)
+            next_index += len(kids)
+            queue.extend(kids)
+        first_child.append(next_index)
+        return cls(values, first_child)
+
+    def __len__(self):
+        return len(self.values)
+
+    def children(self, index):
+        return range(self.first_child[index], self.first_child[index + 1])
+
+    def split(self, index):
+        kids = self.children(index)
+        return kids[:1], kids[1:]
+
+    def traverse(self, order='preorder'):
+        if not self.values:
+            return iter(())
+        if order == 'bfs':
+            # BFS order is the storage order
+            return iter(self.values)
+        if order == 'preorder':
+            return self._preorder()
+        return traverse(0, order, self.children, self.values.__getitem__, self.split)
+
+    def _preorder(self):
+        # The hot path, inlined: no per-node method calls or range objects
+        values, first_child = self.values, self.first_child
+        stack = [0]
+        pop, extend = stack.pop, stack.extend
+        while stack:
+            index = pop()
+            yield values[index]
+            first, end = first_child[index], first_child[index + 1]
+            if end > first:
+                extend(range(end - 1, first - 1, -1))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    root = BinaryNode(1,
+                      BinaryNode(2, BinaryNode(4), BinaryNode(5)),
+                      BinaryNode(3, BinaryNode(6), BinaryNode(7)))
+    for order in ORDERS:
+        print(f"{order:>9}: {list(root.traverse(order))}")
+
+    nary = TreeNode('A', [
+        TreeNode('B', [TreeNode('D'), TreeNode('E')]),
+        TreeNode('C', [TreeNode('F')])
+    ])
+    print(f"n-ary preorder: {list(nary.traverse())}")  # A, B, D, E, C, F
+    print(f"flatten: {list(flatten([1, [2, 3], [4, [5, 6]], 7]))}")
+
+    # The recursive versions from examples.py, for comparison
+    class RecursiveTreeNode:
+        def __init__(self, value, children=None):
+            self.value = value
+            self.children = children or []
+
+        def traverse(self):
+            yield self.value
+            for child in self.children:
+                yield from child.traverse()
+
+    def build(node_class, depth, width):
+        """A chain `depth` long, each link also carrying `width - 1` leaves."""
+        node = node_class(0)
+        for i in range(1, depth):
+            node = node_class(i, [node] + [node_class(-i) for _ in range(width - 1)])
+        return node
+
+    def timed(label, values):
+        start = time.perf_counter()
+        count = sum(1 for _ in values)
+        print(f"  {label}: {count:,} values in {time.perf_counter() - start:.3f}s")
+
+    for depth, width in [(900, 1), (900, 100), (10, 10_000)]:
+        print(f"\nDepth {depth}, width {width}:")
+        timed("recursive yield from", build(RecursiveTreeNode, depth, width).traverse())
+        tree = build(TreeNode, depth, width)
+        timed("iterative engine", tree.traverse())
+        compact = CompactTree.from_nodes(tree)
+        timed("CompactTree preorder", compact.traverse())
+
+    print(f"\nDepth 100,000 (recursion limit is {sys.getrecursionlimit()}):")
+    try:
+        timed("recursive yield from", build(RecursiveTreeNode, 100_000, 1).traverse())
+    except RecursionError:
+        print("  recursive yield from: RecursionError")
+    timed("iterative engine", build(TreeNode, 100_000, 1).traverse('postorder'))
@@ -0,0 +1,337 @@
+"""Single-flight request coalescing in front of an async TTL/LRU cache.
+
+fetch_data() in example4.py and fetch_url() in example5.py do the whole
+operation on every call, even when the same key is already being fetched.
+A hot key is worse: when its cached copy expires, every caller misses at
+once and the backend sees a thundering herd. This module has:
+
+- SingleFlight: concurrent calls for one key share one underlying await,
+- AsyncCache: an LRU of at most `maxsize` entries, each fresh for `ttl`
+  seconds, then served *stale* for up to `stale_ttl` more seconds while a
+  single background refresh runs (stale-while-revalidate), with errors
+  cached for `error_ttl` seconds (negative caching) so a failing key is not
+  retried by every caller,
+- cached(): the same as a decorator for async functions.
+
+    @cached(ttl=30, stale_ttl=300, key=lambda session, url: url)
+    async def fetch_url(session, url): ...
+
+    fetch_url.cache.stats  # hits, stale hits, misses, coalesced, loads...
+"""
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """At most one in-flight call per key; later callers await the same task."""
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0      # underlying calls started
+        self.coalesced = 0  # callers that joined a call already in flight
+
+    def in_flight(self, key):
+        return key in self._calls
+
+    def start(self, key, factory):
+        """The task for key, starting factory() if none is in flight."""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.ensure_future(factory())
+        self._calls[key] = task
+        self.calls += 1
+        task.add_done_callback(functools.partial(self._finished, key))
+        return task
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here, so nobody awaiting it is not an error
+
+    async def do(self, key, factory):
+        """Await factory() for key, sharing the call with concurrent callers.
+
+        A caller that is cancelled stops waiting but does not cancel the
+        shared call the others are waiting on.
+        """
+        return await asyncio.shield(self.start(key, factory))
+
+
+class CacheStats:
+    """Counters for one AsyncCache."""
+    __slots__ = ['hits', 'stale_hits', 'negative_hits', 'misses', 'coalesced', 'loads',
+                 'load_errors', 'refreshes', 'evictions']
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    @property
+    def lookups(self):
+        return self.hits + self.stale_hits + self.negative_hits + self.misses + self.coalesced
+
+    @property
+    def load_avoided(self):
+        """Share of lookups that did not start a backend call (cached or coalesced)."""
+        lookups = self.lookups
+        return 1 - self.misses / lookups if lookups else 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        counts = ', '.join(f"{name}={getattr(self, name):,}" for name in self.__slots__)
+        return f"CacheStats({counts}, load_avoided={self.load_avoided:.1%})"
+
+
+class _Entry:
+    __slots__ = ['value', 'error', 'expires', 'stale_until']
+
+    def __init__(self, value, error, expires, stale_until):
+        self.value = value
+        self.error = error
+        self.expires = expires
+        self.stale_until = stale_until
+
+
+class AsyncCache:
+    """TTL/LRU cache of awaited results, with coalescing, stale-while-revalidate and negative caching.
+
+    Expired entries stay in the LRU until they are reloaded or evicted.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, stale_ttl=0.0, error_ttl=5.0,
+                 cache_errors=(Exception,), clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.cache_errors = cache_errors
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._flight = SingleFlight()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def _load(self, key, loader):
+        self.stats.loads += 1
+        try:
+            value = await loader()
+        except self.cache_errors as e:
+            self.stats.load_errors += 1
+            now = self.clock()
+            entry = self._entries.get(key)
+            if entry is not None and entry.error is None and now < entry.stale_until:
+                raise  # a failed refresh: keep serving the stale value
+            if self.error_ttl:
+                # The loader's own exception, never a copy: copying rebuilds it
+                # from args, which fails for classes with their own __init__
+                self._store(key, _Entry(None, e, now + self.error_ttl, now + self.error_ttl))
+            raise
+        now = self.clock()
+        self._store(key, _Entry(value, None, now + self.ttl, now + self.ttl + self.stale_ttl))
+        return value
+
+    async def get(self, key, loader):
+        """The cached value for key, awaiting loader() to (re)load it when needed.
+
+        loader is a zero-argument function returning an awaitable. A cached
+        error is raised again until its error_ttl runs out.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = self.clock()
+            if now < entry.expires:
+                self._entries.move_to_end(key)
+                if entry.error is not None:
+                    self.stats.negative_hits += 1
+                    # A plain raise would keep adding every caller's frames to
+                    # the shared exception's traceback; start it afresh each time
+                    raise entry.error.with_traceback(None)
+                self.stats.hits += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stats.stale_hits += 1
+                if not self._flight.in_flight(key):
+                    self.stats.refreshes += 1
+                    self._flight.start(key, lambda: self._load(key, loader))
+                return entry.value
+        if self._flight.in_flight(key):
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+        return await self._flight.do(key, lambda: self._load(key, loader))
+
+    def invalidate(self, key=None):
+        """Drop key, or every entry; calls already in flight still store their result."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+_KWARGS = object()  # separates args from kwargs in a key, like functools._make_key
+
+
+def _default_key(*args, **kwargs):
+    return (*args, _KWARGS, *sorted(kwargs.items())) if kwargs else args
+
+
+def cached(key=None, cache=None, **options):
+    """Decorator caching an async function in an AsyncCache (AsyncCache(**options) by default).
+
+    key(*args, **kwargs) picks the cache key - needed when an argument such
+    as a session should not be part of it. The cache is the wrapper's .cache.
+    """
+    cache = cache if cache is not None else AsyncCache(**options)
+    make_key = key or _default_key
+
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await cache.get(make_key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorate
+
+
+if __name__ == "__main__":
+    import random
+
+    class Backend:
+        """example4.py's fetch_data, counting calls and how many run at once."""
+
+        def __init__(self, delay=0.05, failing=()):
+            self.delay = delay
+            self.failing = set(failing)
+            self.calls = 0
+            self.in_flight = 0
+            self.peak = 0
+
+        async def fetch_data(self, source, delay=None):
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay if delay is None else delay)
+                if source in self.failing:
+                    raise ConnectionError(f"{source} is down")
+                return f"Data from {source}"
+            finally:
+                self.in_flight -= 1
+
+    def p99_ms(latencies):
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000
+
+    class NaiveTTLCache:
+        """What a dict with expiry times does: every caller that misses fetches."""
+
+        def __init__(self, ttl):
+            self.ttl = ttl
+            self.entries = {}
+
+        async def get(self, key, loader):
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                return entry[0]
+            value = await loader()
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            return value
+
+    async def burst():
+        backend = Backend()
+        fetch = cached(ttl=60)(backend.fetch_data)
+        keys = [f"API-{i % 10}" for i in range(1000)]
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(key) for key in keys))
+        elapsed = time.perf_counter() - start
+        print(f"1,000 concurrent fetch_data() calls for 10 keys: {backend.calls} backend calls "
+              f"in {elapsed * 1000:.0f} ms\n  {fetch.cache.stats}")
+
+    async def hot_key(label, cache, clients=200, seconds=2.0):
+        """`clients` callers hammer one key whose entry expires every 0.25 s."""
+        backend = Backend(delay=0.05)
+        latencies = []
+        stop_at = time.monotonic() + seconds
+
+        async def client():
+            while time.monotonic() < stop_at:
+                start = time.perf_counter()
+                await cache.get("hot", lambda: backend.fetch_data("hot"))
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(random.uniform(0.005, 0.015))
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+        print(f"  {label}:\n    {backend.calls:,} backend calls, at most {backend.peak} at once; "
+              f"{len(latencies):,} lookups, p99 {p99_ms(latencies):.1f} ms")
+
+    async def negative():
+        backend = Backend(delay=0.01, failing={"API-down"})
+        fetch = cached(ttl=60, error_ttl=0.2)(backend.fetch_data)
+        errors = 0
+        start = time.monotonic()
+        while time.monotonic() - start < 1.0:
+            results = await asyncio.gather(*(fetch("API-down") for _ in range(20)),
+                                           return_exceptions=True)
+            errors += sum(isinstance(r, ConnectionError) for r in results)
+            await asyncio.sleep(0.01)
+        print(f"A failing key, 20 callers every ~20 ms for 1 s, error_ttl=0.2 s: {errors:,} errors "
+              f"raised, {backend.calls} backend calls\n  {fetch.cache.stats}")
+
+    async def http():
+        try:
+            import aiohttp
+
+            from fetch_engine import fetch_url
+            from local_server import run_server
+        except ImportError:
+            print("\naiohttp is not installed; skipping the fetch_url() run")
+            return
+        async with run_server(latency=0.02, payload_bytes=2048) as (base_urls, stats):
+            urls = [f"{base_urls[0]}/data/{i % 20}" for i in range(2000)]
+            cached_fetch = cached(ttl=30, key=lambda session, url, **_: url)(fetch_url)
+            async with aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=100)) as session:
+                start = time.perf_counter()
+                await asyncio.gather(*(cached_fetch(session, url) for url in urls))
+                elapsed = time.perf_counter() - start
+            print(f"\nfetch_url() against the local server, 2,000 calls for 20 URLs: "
+                  f"{stats.requests} HTTP requests in {elapsed * 1000:.0f} ms\n"
+                  f"  {cached_fetch.cache.stats}")
+
+    async def main():
+        random.seed(3)
+        await burst()
+        print("\n200 clients reading one hot key for 2 s; it expires every 0.25 s, "
+              "the backend takes 50 ms:")
+        await hot_key("dict with expiry times (no coalescing)", NaiveTTLCache(ttl=0.25))
+        cache = AsyncCache(ttl=0.25)
+        await hot_key("AsyncCache(ttl=0.25): single-flight", cache)
+        print(f"    {cache.stats}")
+        cache = AsyncCache(ttl=0.25, stale_ttl=5)
+        await hot_key("AsyncCache(ttl=0.25, stale_ttl=5): single-flight + stale-while-revalidate",
+                      cache)
+        print(f"    {cache.stats}")
+        print()
+        await negative()
+        await http()
+
+    asyncio.run(main())
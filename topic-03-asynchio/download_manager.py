@@ -0,0 +1,313 @@
+"""Streaming, resumable downloads with an async progress stream.
+
+download_file() in example5.py sleeps instead of downloading, and
+download_with_progress() prints as each file completes. DownloadManager
+keeps that shape - start many downloads, hear about each one as it
+progresses and completes - but really downloads:
+
+- bodies are streamed chunk by chunk into `<path>.part`, so memory use is
+  one chunk per download however large the file is,
+- a `.part` file left by an interrupted run is resumed with a Range
+  request, and a dropped connection is retried from where it stopped;
+  the ETag (or Last-Modified) the download started with is kept next to
+  it in `<path>.part.validator` and sent as If-Range, so a file that
+  changed on the server is downloaded again instead of spliced,
+- at most `concurrency` downloads run at once, however many are queued,
+  and files that already finished in an earlier run are skipped,
+- progress comes back as an async stream of DownloadEvents carrying
+  per-file and aggregate MB/s, instead of prints:
+
+    async for event in manager.run(jobs):
+        print(event)
+"""
+import asyncio
+import os
+import time
+
+import aiohttp
+
+MB = 1024 * 1024
+
+
+class DownloadEvent:
+    """One progress report: started, resumed, progress, retrying, completed, skipped or failed."""
+    __slots__ = ['kind', 'url', 'path', 'bytes_done', 'total', 'file_mbps', 'aggregate_mbps',
+                 'error']
+
+    def __init__(self, kind, url, path, bytes_done, total, file_mbps, aggregate_mbps, error=None):
+        self.kind = kind
+        self.url = url
+        self.path = path
+        self.bytes_done = bytes_done
+        self.total = total
+        self.file_mbps = file_mbps
+        self.aggregate_mbps = aggregate_mbps
+        self.error = error
+
+    @property
+    def fraction(self):
+        return self.bytes_done / self.total if self.total else 0.0
+
+    def __repr__(self):
+        size = f"{self.bytes_done / MB:.1f}/{self.total / MB:.1f} MB" if self.total else \
+            f"{self.bytes_done / MB:.1f} MB"
+        extra = f", {self.error}" if self.error else ""
+        return (f"DownloadEvent({self.kind} {os.path.basename(self.path)}: {size}, "
+                f"{self.file_mbps:.1f} MB/s, all files {self.aggregate_mbps:.1f} MB/s{extra})")
+
+
+class _Done:
+    """A worker has run out of jobs."""
+
+
+def _read_validator(path):
+    try:
+        with open(path) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_validator(path, validator):
+    if validator is None:
+        _remove(path)
+    else:
+        with open(path, 'w') as file:
+            file.write(validator)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _content_range_total(content_range):
+    """The complete length in a Content-Range header, or None for '*' or a malformed one."""
+    size = content_range.rpartition('/')[2].strip()
+    return int(size) if size.isdigit() else None
+
+
+class DownloadManager:
+    """Downloads (url, path) jobs, `concurrency` at a time, resuming partial files.
+
+    bytes_received and the aggregate rate belong to the current run, so a
+    manager runs one batch of jobs at a time; start a second manager to
+    run another batch concurrently.
+    """
+
+    def __init__(self, concurrency=4, chunk_bytes=MB, retries=3, timeout=60.0,
+                 progress_interval=0.5, overwrite=False, session=None):
+        self.concurrency = concurrency
+        self.chunk_bytes = chunk_bytes
+        self.retries = retries
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_read=timeout, sock_connect=timeout)
+        self.progress_interval = progress_interval
+        self.overwrite = overwrite
+        self.session = session
+        self.bytes_received = 0
+        self._started = None
+        self._running = False
+
+    def _aggregate_mbps(self):
+        elapsed = time.perf_counter() - self._started
+        return self.bytes_received / MB / elapsed if elapsed else 0.0
+
+    async def _download(self, url, path, events):
+        """Stream url into path + '.part', resuming and retrying; rename when complete."""
+        part = path + '.part'
+        validator_path = part + '.validator'
+        started = time.perf_counter()
+        received = 0  # this run, for the per-file rate
+        total = None
+
+        def event(kind, done, error=None):
+            elapsed = time.perf_counter() - started
+            rate = received / MB / elapsed if elapsed else 0.0
+            events.put_nowait(DownloadEvent(kind, url, path, done, total, rate,
+                                            self._aggregate_mbps(), error))
+
+        if not self.overwrite and os.path.exists(path) and not os.path.exists(part):
+            total = os.path.getsize(path)
+            event('skipped', total)
+            return
+
+        attempt = 0
+        while True:
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            received_before = received
+            headers = {}
+            if offset:
+                headers['Range'] = f"bytes={offset}-"
+                validator = await asyncio.to_thread(_read_validator, validator_path)
+                if validator is not None:
+                    # Only resume the same version of the file; otherwise 200, all of it
+                    headers['If-Range'] = validator
+            try:
+                async with self.session.get(url, headers=headers, timeout=self.timeout) as response:
+                    if response.status == 416:
+                        total = _content_range_total(response.headers.get('Content-Range', ''))
+                        if total == offset:  # nothing left to fetch: .part is complete
+                            break
+                        if total is None:
+                            event('failed', offset, f"416 for bytes {offset}- without the "
+                                                    f"file's length; can't tell if .part is whole")
+                            return
+                        # .part is longer than the file: not a prefix of it, start over
+                        await asyncio.to_thread(_remove, part)
+                        continue
+                    response.raise_for_status()
+                    if response.status == 206:
+                        content_range = response.headers.get('Content-Range', '')
+                        span = content_range.removeprefix('bytes ').partition('/')[0]
+                        if span.partition('-')[0] != str(offset):
+                            # Appending any other range would corrupt the .part file
+                            event('failed', offset, f"asked for bytes {offset}- but got "
+                                                    f"Content-Range {content_range!r}")
+                            return
+                        total = _content_range_total(content_range)
+                        mode = 'ab'
+                    else:  # the server ignored Range, or the file changed: start over
+                        total = response.content_length
+                        offset, mode = 0, 'wb'
+                        await asyncio.to_thread(
+                            _write_validator, validator_path,
+                            response.headers.get('ETag') or response.headers.get('Last-Modified'))
+                    event('resumed' if offset else 'started', offset)
+                    file = await asyncio.to_thread(open, part, mode)
+                    try:
+                        last_report = time.perf_counter()
+                        async for chunk in response.content.iter_chunked(self.chunk_bytes):
+                            await asyncio.to_thread(file.write, chunk)
+                            offset += len(chunk)
+                            received += len(chunk)
+                            self.bytes_received += len(chunk)
+                            now = time.perf_counter()
+                            if now - last_report >= self.progress_interval:
+                                last_report = now
+                                event('progress', offset)
+                    finally:
+                        await asyncio.to_thread(file.close)
+                if total is None or offset >= total:
+                    break
+                raise aiohttp.ClientPayloadError(f"connection closed at {offset} of {total} bytes")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if received > received_before:
+                    attempt = 0  # this attempt made progress: only count consecutive failures
+                attempt += 1
+                if attempt > self.retries or getattr(e, 'status', 500) < 500:
+                    event('failed', offset, f"{type(e).__name__}: {e}")
+                    return
+                event('retrying', offset, f"{type(e).__name__}: {e}")
+                await asyncio.sleep(min(2 ** attempt * 0.1, 5))
+        await asyncio.to_thread(os.replace, part, path)
+        await asyncio.to_thread(_remove, validator_path)
+        event('completed', total or offset)
+
+    async def _worker(self, jobs, events):
+        try:
+            while jobs:
+                url, path = jobs.pop()
+                await self._download(url, path, events)
+        finally:
+            events.put_nowait(_Done())
+
+    async def run(self, jobs):
+        """Async generator of DownloadEvents while every (url, path) job downloads.
+
+        Closing the generator early cancels the downloads; their .part files
+        stay behind and are resumed by the next run. Raises RuntimeError if
+        this manager is already running.
+        """
+        if self._running:
+            raise RuntimeError("DownloadManager.run() is already running; "
+                               "use another DownloadManager for a concurrent batch")
+        pending = list(reversed(list(jobs)))  # workers pop() from the end
+        self._running = True
+        own_session = self.session is None
+        if own_session:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency))
+        self._started = time.perf_counter()
+        self.bytes_received = 0
+        events = asyncio.Queue()
+        workers = [asyncio.create_task(self._worker(pending, events))
+                   for _ in range(min(self.concurrency, len(pending)) or 1)]
+        running = len(workers)
+        try:
+            while running:
+                event = await events.get()
+                if isinstance(event, _Done):
+                    running -= 1
+                else:
+                    yield event
+            for worker in workers:
+                await worker  # surfaces unexpected errors from a worker
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if own_session:
+                await self.session.close()
+                self.session = None
+            self._running = False
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import tracemalloc
+
+    from local_server import payload, run_server
+
+    sizes = [256 * MB, 128 * MB, 64 * MB, 64 * MB, 32 * MB, 32 * MB]
+
+    def check(path, size):
+        with open(path, 'rb') as file:
+            for offset in range(0, size, 16 * MB):
+                if file.read(16 * MB) != payload(min(16 * MB, size - offset), offset):
+                    return False
+        return os.path.getsize(path) == size
+
+    async def main(folder):
+        async with run_server(latency=0.01, chunk_bytes=256 * 1024) as (base_urls, _):
+            jobs = [(f"{base_urls[0]}/files/f{i}?size={size}", os.path.join(folder, f"f{i}.bin"))
+                    for i, size in enumerate(sizes)]
+            manager = DownloadManager(concurrency=3, progress_interval=1.0)
+
+            print(f"Downloading {len(jobs)} files ({sum(sizes) / MB:.0f} MB), 3 at a time; "
+                  f"interrupting after 150 MB")
+            stream = manager.run(jobs)
+            async for event in stream:
+                if event.kind != 'progress':
+                    print(f"  {event}")
+                if manager.bytes_received >= 150 * MB:
+                    break
+            await stream.aclose()
+            partial = [name for name in os.listdir(folder) if name.endswith('.part')]
+            print(f"  interrupted; partial files left: {sorted(partial)}")
+
+            print("Second run resumes them:")
+            tracemalloc.start()
+            start = time.perf_counter()
+            async for event in manager.run(jobs):
+                if event.kind in ('resumed', 'completed', 'skipped', 'failed'):
+                    print(f"  {event}")
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {manager.bytes_received / MB:.0f} MB fetched in {elapsed:.1f}s, "
+                  f"peak traced memory {peak / MB:.1f} MB")
+            intact = all(check(path, size) for (_, path), size in zip(jobs, sizes))
+            print(f"All files complete and byte-for-byte correct: {intact}")
+
+            async for event in manager.run([(f"{base_urls[0]}/data/x?status=404",
+                                             os.path.join(folder, "missing.bin"))]):
+                print(f"  {event}")
+
+    folder = tempfile.mkdtemp()
+    try:
+        asyncio.run(main(folder))
+    finally:
+        shutil.rmtree(folder)
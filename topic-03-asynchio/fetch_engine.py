@@ -0,0 +1,260 @@
+"""Bounded-concurrency HTTP fetching over one pooled aiohttp session.
+
+fetch_url() in example5.py ignores its session and only sleeps, and
+gather_example() starts every request at once. With 10,000 URLs that means
+10,000 tasks fighting over the connection pool, so the last requests wait
+for all the others and tail latency explodes. FetchEngine:
+
+- shares one ClientSession (one connection pool, keep-alive, DNS cache),
+- caps requests in flight globally and per host (scheme://host:port),
+- streams each body in chunks instead of buffering it whole (keep_body=False
+  keeps only the byte count, or pass on_chunk to consume the data),
+- applies a timeout to each request - measured from when it gets a slot,
+  not from when it was queued,
+- yields results in input order or as they complete, never keeping more
+  than a small window of tasks alive.
+
+Failures come back as FetchResult.error instead of exceptions, so one bad
+URL does not cancel a batch.
+"""
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+from yarl import URL
+
+
+class FetchResult:
+    """Outcome of one request: status, size, timings and error (None if it completed)."""
+    __slots__ = ['index', 'url', 'status', 'nbytes', 'body', 'queued', 'elapsed', 'error']
+
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.status = None
+        self.nbytes = 0
+        self.body = None
+        self.queued = 0.0   # seconds spent waiting for a concurrency slot
+        self.elapsed = 0.0  # seconds from getting a slot to the last byte
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and self.status < 400
+
+    def __repr__(self):
+        outcome = self.error or f"{self.status}, {self.nbytes:,} bytes"
+        return f"FetchResult({self.url}: {outcome}, {self.elapsed * 1000:.1f} ms)"
+
+
+def host_key(url):
+    """The scheme://host:port a per-host limit applies to."""
+    parsed = URL(url)
+    return f"{parsed.scheme}://{parsed.host}:{parsed.port}"
+
+
+class _HostSlot:
+    """One host's semaphore and the requests using or waiting for it."""
+    __slots__ = ['semaphore', 'users']
+
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class FetchEngine:
+    """Async context manager owning one session and the concurrency limits."""
+
+    def __init__(self, concurrency=100, per_host=20, timeout=10.0, chunk_bytes=64 * 1024,
+                 keep_body=True, session=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.chunk_bytes = chunk_bytes
+        self.keep_body = keep_body
+        self.session = session
+        self._owns_session = session is None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._host_slots = {}  # host_key -> _HostSlot, only while the host has requests
+
+    async def __aenter__(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                             ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._owns_session:
+            await self.session.close()
+        return False
+
+    async def fetch(self, url, index=None, timeout=None, on_chunk=None):
+        """Fetch one URL within the limits; never raises for HTTP or network errors.
+
+        on_chunk(bytes) is called (and awaited, if it returns an awaitable)
+        for every chunk as it arrives.
+        """
+        result = FetchResult(index, url)
+        timeout = aiohttp.ClientTimeout(total=self.timeout if timeout is None else timeout)
+        queued_at = time.perf_counter()
+        key = host_key(url)
+        host = self._host_slots.get(key)
+        if host is None:
+            host = self._host_slots[key] = _HostSlot(self.per_host)
+        host.users += 1
+        try:
+            # Per host first: a request queued behind its host's limit must
+            # not hold one of the global slots other hosts could use
+            async with host.semaphore, self._slots:
+                started = time.perf_counter()
+                result.queued = started - queued_at
+                await self._get(url, timeout, on_chunk, result)
+                result.elapsed = time.perf_counter() - started
+        finally:
+            host.users -= 1
+            if not host.users:  # idle: don't keep a semaphore per host ever seen
+                del self._host_slots[key]
+        return result
+
+    async def _get(self, url, timeout, on_chunk, result):
+        try:
+            async with self.session.get(url, timeout=timeout) as response:
+                result.status = response.status
+                chunks = [] if self.keep_body else None
+                async for chunk in response.content.iter_chunked(self.chunk_bytes):
+                    result.nbytes += len(chunk)
+                    if chunks is not None:
+                        chunks.append(chunk)
+                    if on_chunk is not None:
+                        outcome = on_chunk(chunk)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+                if chunks is not None:
+                    result.body = b''.join(chunks)
+        except asyncio.TimeoutError:
+            result.error = 'timeout'
+        except aiohttp.ClientError as e:
+            result.error = f"{type(e).__name__}: {e}"
+
+    async def fetch_all(self, urls, ordered=True, window=None, timeout=None):
+        """Async generator of FetchResults for urls, in order or as they complete.
+
+        At most `window` requests (default 2 x concurrency) exist as tasks at once.
+        """
+        window = window or self.concurrency * 2
+        pending = deque() if ordered else set()
+        try:
+            for index, url in enumerate(urls):
+                task = asyncio.ensure_future(self.fetch(url, index, timeout))
+                if ordered:
+                    pending.append(task)
+                    if len(pending) >= window:
+                        yield await pending.popleft()
+                else:
+                    pending.add(task)
+                    if len(pending) >= window:
+                        done, pending = await asyncio.wait(
+                            pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            yield task.result()
+            while pending:
+                if ordered:
+                    yield await pending.popleft()
+                else:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def fetch_url(session, url, timeout=10.0):
+    """Fetch one URL with a shared session and return its text (example5.py's signature, for real)."""
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        response.raise_for_status()
+        return await response.text()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def latency_summary(results, wall_seconds):
+    """Requests/s and latency percentiles (ms) for a list of FetchResults."""
+    latencies = sorted(r.queued + r.elapsed for r in results)
+    return {
+        'requests': len(results),
+        'ok': sum(1 for r in results if r.ok),
+        'errors': sum(1 for r in results if r.error),
+        'rps': len(results) / wall_seconds if wall_seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from local_server import run_server
+
+    n_urls = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    def show(label, summary):
+        print(f"{label}:\n  {summary['requests']:,} requests ({summary['errors']} errors) "
+              f"{summary['rps']:,.0f} req/s, latency p50 {summary['p50_ms']:.0f} ms, "
+              f"p95 {summary['p95_ms']:.0f} ms, p99 {summary['p99_ms']:.0f} ms, "
+              f"max {summary['max_ms']:.0f} ms")
+
+    async def main():
+        async with run_server(ports=(0, 0), latency=0.02, jitter=0.03,
+                              payload_bytes=2048) as (base_urls, stats):
+            urls = [f"{base_urls[i % 2]}/data/{i}" for i in range(n_urls)]
+            print(f"{n_urls:,} URLs over 2 local 'hosts', 20-50 ms latency, 2 KB bodies\n")
+
+            # gather_example's approach: one task per URL, all started at once
+            async with aiohttp.ClientSession() as session:
+                async def timed(index, url):
+                    result = FetchResult(index, url)
+                    started = time.perf_counter()
+                    try:
+                        body = await fetch_url(session, url, timeout=30)
+                        result.status, result.nbytes = 200, len(body)
+                    except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                        result.error = repr(e)
+                    result.elapsed = time.perf_counter() - started
+                    return result
+
+                start = time.perf_counter()
+                results = await asyncio.gather(*(timed(i, url) for i, url in enumerate(urls)))
+                show("asyncio.gather, every URL at once", latency_summary(
+                    results, time.perf_counter() - start))
+
+            for concurrency, per_host, ordered in [(100, 50, True), (200, 100, False)]:
+                stats.peak_per_port.clear()
+                async with FetchEngine(concurrency=concurrency, per_host=per_host, timeout=5,
+                                       keep_body=False) as engine:
+                    start = time.perf_counter()
+                    results = [r async for r in engine.fetch_all(urls, ordered=ordered)]
+                    wall = time.perf_counter() - start
+                summary = latency_summary(results, wall)
+                service = sorted(r.elapsed for r in results)
+                show(f"FetchEngine(concurrency={concurrency}, per_host={per_host}), "
+                     f"{'ordered' if ordered else 'as completed'}", summary)
+                print(f"  time on the wire only: p50 {percentile(service, 0.5) * 1000:.0f} ms, "
+                      f"p99 {percentile(service, 0.99) * 1000:.0f} ms; server saw at most "
+                      f"{max(peak for _, peak in stats.peak_per_port.values())} "
+                      f"concurrent requests per host")
+
+            async with FetchEngine(timeout=0.1) as engine:
+                slow = await engine.fetch(f"{base_urls[0]}/data/slow?latency=1")
+                missing = await engine.fetch("http://127.0.0.1:9/nothing-listens-here")
+                print(f"\nPer-request timeout: {slow}\nConnection error: {missing}")
+
+    asyncio.run(main())
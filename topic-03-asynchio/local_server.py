@@ -0,0 +1,187 @@
+"""A local aiohttp server that stands in for slow remote APIs in benchmarks.
+
+Every response waits `latency` seconds (plus up to `jitter` more) before
+answering with `payload_bytes` of data, so fetch code can be benchmarked
+with tens of thousands of requests without touching the network. Query
+parameters override the defaults per request:
+
+    GET /data/42?latency=0.2&size=65536&status=503
+
+/files/{name}?size=N serves N deterministic bytes and honours Range
+headers, for resumable-download tests. Its ETag changes with ?version=,
+and a Range whose If-Range doesn't match gets the whole file, the way a
+server answers once the file has changed.
+
+With `capacity` set, the server works on at most that many requests at
+once and queues the rest, so latency grows under overload; once
+`max_queue` requests are waiting it sheds load with immediate 503s, the
+way a real backend does when it is pushed too hard.
+"""
+import asyncio
+import random
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+
+PATTERN = bytes(32 + i % 95 for i in range(64 * 1024))  # printable ASCII, 64 KB
+
+
+def payload(size, offset=0):
+    """`size` bytes of the repeating PATTERN, starting `offset` bytes in."""
+    start = offset % len(PATTERN)
+    repeats = (start + size) // len(PATTERN) + 1
+    return (PATTERN * repeats)[start:start + size]
+
+
+class ServerStats:
+    """What the server saw: requests, bytes sent and peak concurrency."""
+
+    def __init__(self):
+        self.requests = 0
+        self.rejected = 0  # 503s from a full queue (capacity/max_queue)
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.peak_per_port = {}
+
+
+# web.AppKey (aiohttp 3.9+) types the key and avoids NotAppKeyWarning
+STATS = web.AppKey('stats', ServerStats) if hasattr(web, 'AppKey') else 'stats'
+
+
+def make_app(latency=0.05, jitter=0.0, payload_bytes=1024, chunk_bytes=64 * 1024,
+             error_rate=0.0, capacity=None, max_queue=None, stats=None):
+    """Build the aiohttp Application with the given defaults."""
+    stats = stats or ServerStats()
+    workers = asyncio.Semaphore(capacity) if capacity else None
+    waiting = 0
+    app = web.Application()
+    app[STATS] = stats
+
+    async def delay(request):
+        wait = float(request.query.get('latency', latency))
+        if jitter:
+            wait += random.uniform(0, jitter)
+        await asyncio.sleep(wait)
+
+    async def stream(request, size, offset=0, status=200, headers=None):
+        response = web.StreamResponse(status=status, headers=headers)
+        response.content_length = size
+        sent = 0
+        try:
+            await response.prepare(request)
+            while sent < size:
+                block = payload(min(chunk_bytes, size - sent), offset + sent)
+                await response.write(block)
+                sent += len(block)
+            await response.write_eof()
+        except ConnectionError:
+            pass  # the client gave up (a timeout, or a download being interrupted)
+        stats.bytes_sent += sent
+        return response
+
+    @web.middleware
+    async def track(request, handler):
+        port = request.transport.get_extra_info('sockname')[1]
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        per_port = stats.peak_per_port.setdefault(port, [0, 0])
+        per_port[0] += 1
+        per_port[1] = max(per_port[1], per_port[0])
+        try:
+            return await handler(request)
+        finally:
+            stats.in_flight -= 1
+            per_port[0] -= 1
+
+    async def data(request):
+        await delay(request)
+        status = int(request.query.get('status', 200))
+        if status == 200 and error_rate and random.random() < error_rate:
+            status = 503
+        if status != 200:
+            return web.Response(status=status, text=f"status {status}")
+        size = int(request.query.get('size', payload_bytes))
+        return await stream(request, size)
+
+    async def files(request):
+        await delay(request)
+        size = int(request.query.get('size', payload_bytes))
+        etag = f'"{request.match_info["name"]}-{size}-{request.query.get("version", 0)}"'
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if not range_header or (if_range is not None and if_range != etag):
+            return await stream(request, size, headers={'Accept-Ranges': 'bytes', 'ETag': etag})
+        # Only the single "bytes=start-" / "bytes=start-end" form
+        start_text, _, end_text = range_header.removeprefix('bytes=').partition('-')
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if start >= size:
+            return web.Response(status=416, headers={'Content-Range': f"bytes */{size}"})
+        end = min(end, size - 1)
+        return await stream(request, end - start + 1, offset=start, status=206, headers={
+            'Accept-Ranges': 'bytes', 'ETag': etag, 'Content-Range': f"bytes {start}-{end}/{size}"})
+
+    @web.middleware
+    async def limit(request, handler):
+        nonlocal waiting
+        if workers.locked() and max_queue is not None and waiting >= max_queue:
+            stats.rejected += 1
+            return web.Response(status=503, text="overloaded")
+        waiting += 1
+        try:
+            await workers.acquire()
+        finally:
+            waiting -= 1
+        try:
+            return await handler(request)
+        finally:
+            workers.release()
+
+    app.middlewares.append(track)
+    if workers is not None:
+        app.middlewares.append(limit)
+    app.router.add_get('/data/{id}', data)
+    app.router.add_get('/files/{name}', files)
+    return app
+
+
+@asynccontextmanager
+async def run_server(host='127.0.0.1', ports=(0,), **options):
+    """Serve make_app(**options) on one or more ports; yields (base_urls, stats).
+
+    Port 0 picks a free port. Several ports look like several hosts to a
+    client's per-host connection limits.
+    """
+    app = make_app(**options)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    base_urls = []
+    try:
+        for port in ports:
+            site = web.TCPSite(runner, host, port, backlog=4096)
+            await site.start()
+            bound_port = site._server.sockets[0].getsockname()[1]
+            base_urls.append(f"http://{host}:{bound_port}")
+        yield base_urls, app[STATS]
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    import sys
+
+    async def serve_forever(port):
+        async with run_server(ports=(port,)) as (base_urls, stats):
+            print(f"Serving on {base_urls[0]} - try {base_urls[0]}/data/1?latency=0.5&size=10")
+            try:
+                while True:
+                    await asyncio.sleep(3600)
+            finally:
+                print(f"{stats.requests} requests, {stats.bytes_sent:,} bytes sent")
+
+    try:
+        asyncio.run(serve_forever(int(sys.argv[1]) if len(sys.argv) > 1 else 8080))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,282 @@
+"""Instrumentation for a running event loop: task latencies and loop blocking.
+
+The topic-03 examples time a whole run with time.time(), which says nothing
+about why it was slow. LoopMonitor installs on a running loop and records:
+
+- scheduling delay: from create_task() until the task first runs,
+- task lifetime: from create_task() until the task is done,
+- loop lag: how late a heartbeat callback runs, which is how long the loop
+  was busy with something else,
+- blocking episodes: when the loop is stuck for longer than `threshold`, a
+  watchdog thread samples the loop thread's stack *while it is blocked*, so
+  the report shows which line did it (a time.sleep(), a CPU-bound loop...).
+
+All timings go into log-scale Histograms that export() returns as plain
+dicts (and prometheus_text() as Prometheus exposition text). Nothing here
+touches loop internals, so it works the same on uvloop; use_uvloop() swaps
+the policy when uvloop is installed so the two loops can be compared.
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class Histogram:
+    """Counts of observations (in seconds) in log-scale buckets, 50 us to ~100 s."""
+
+    def __init__(self, name, start=50e-6, factor=2.0, buckets=22):
+        self.name = name
+        self.bounds = [start * factor ** i for i in range(buckets)]
+        self.counts = [0] * (buckets + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        bounds = self.bounds
+        # Linear scan beats bisect here: most observations land in the first few buckets
+        while index < len(bounds) and seconds > bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [self.max], self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def export(self):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'count': self.count, 'sum': self.total, 'max': self.max, 'buckets': buckets}
+
+    def render(self, width=40):
+        """Text bar chart of the non-empty buckets, in milliseconds."""
+        if not self.count:
+            return f"{self.name}: no observations"
+        lines = [f"{self.name}: n={self.count:,}, mean {self.total / self.count * 1000:.2f} ms, "
+                 f"p50 <= {self.quantile(0.5) * 1000:.2f} ms, "
+                 f"p99 <= {self.quantile(0.99) * 1000:.2f} ms, max {self.max * 1000:.2f} ms"]
+        peak = max(self.counts)
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            if count:
+                label = f"<= {bound * 1000:9.2f} ms" if bound != float('inf') else "      > last"
+                lines.append(f"  {label} {'#' * max(1, count * width // peak)} {count:,}")
+        return "\n".join(lines)
+
+
+class BlockingEpisode:
+    """The loop was unresponsive for `duration` seconds; `stack` was sampled during it."""
+    __slots__ = ['started', 'duration', 'stack']
+
+    def __init__(self, started, duration, stack):
+        self.started = started
+        self.duration = duration
+        self.stack = stack
+
+    def __repr__(self):
+        where = self.stack[-1].strip().splitlines()[0] if self.stack else 'unknown'
+        return f"BlockingEpisode({self.duration * 1000:.0f} ms at {where})"
+
+
+class LoopMonitor:
+    """Installs a task factory, a heartbeat and a watchdog thread on one loop.
+
+        async with LoopMonitor(threshold=0.05) as monitor:
+            ...
+        print(monitor.report())
+    """
+
+    def __init__(self, threshold=0.05, interval=0.01, max_episodes=100):
+        self.threshold = threshold
+        self.interval = interval
+        self.scheduling_delay = Histogram('task scheduling delay')
+        self.task_lifetime = Histogram('task creation to completion')
+        self.loop_lag = Histogram('loop lag (heartbeat lateness)')
+        self.episodes = deque(maxlen=max_episodes)
+        self.loop = None
+        self._previous_factory = None
+        self._heartbeat = None
+        self._last_beat = 0.0
+        self._stall_stack = None
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    # Tasks
+
+    def _task_factory(self, loop, coro, **kwargs):
+        created = time.perf_counter()
+        # The ready queue is FIFO, so a callback queued just before the task
+        # runs right as its first step starts - no need to wrap the coroutine,
+        # which would change get_coro(), stacks and cancel-before-start
+        loop.call_soon(self._first_step, created)
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        task.add_done_callback(lambda _: self.task_lifetime.observe(time.perf_counter() - created))
+        return task
+
+    def _first_step(self, created):
+        self.scheduling_delay.observe(time.perf_counter() - created)
+
+    # Heartbeat (on the loop) and watchdog (in a thread)
+
+    def _beat(self, expected):
+        now = time.perf_counter()
+        lag = max(0.0, now - expected)
+        self.loop_lag.observe(lag)
+        if lag >= self.threshold:
+            self.episodes.append(BlockingEpisode(expected, lag, self._stall_stack))
+        self._stall_stack = None
+        self._last_beat = now
+        self._heartbeat = self.loop.call_later(self.interval, self._beat, now + self.interval)
+
+    def _watch(self):
+        sampled_for = None
+        while not self._stop.wait(self.threshold / 4):
+            silent = time.perf_counter() - self._last_beat
+            if silent < self.threshold + self.interval or sampled_for == self._last_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._stall_stack = traceback.format_stack(frame)
+                sampled_for = self._last_beat  # one sample per stall
+
+    def install(self, loop=None):
+        """Start monitoring `loop` (default: the running loop). Call from the loop's thread."""
+        self.loop = loop or asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._previous_factory = self.loop.get_task_factory()
+        self.loop.set_task_factory(self._task_factory)
+        self._last_beat = time.perf_counter()
+        self._heartbeat = self.loop.call_later(self.interval, self._beat,
+                                               self._last_beat + self.interval)
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+        return self
+
+    def uninstall(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        if self.loop is not None:
+            self.loop.set_task_factory(self._previous_factory)
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def __aenter__(self):
+        return self.install()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.uninstall()
+        return False
+
+    # Export
+
+    def histograms(self):
+        return [self.scheduling_delay, self.task_lifetime, self.loop_lag]
+
+    def export(self):
+        return {
+            'histograms': {h.name: h.export() for h in self.histograms()},
+            'blocking_episodes': [{'duration': e.duration, 'stack': e.stack} for e in self.episodes],
+        }
+
+    def prometheus_text(self, prefix='asyncio'):
+        lines = []
+        for histogram in self.histograms():
+            metric = f"{prefix}_{histogram.name.split(' (')[0].replace(' ', '_')}_seconds"
+            exported = histogram.export()
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in exported['buckets'].items():
+                le = '+Inf' if bound == float('inf') else f"{bound:.6g}"
+                lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+            lines.append(f"{metric}_sum {exported['sum']:.6f}")
+            lines.append(f"{metric}_count {exported['count']}")
+        return "\n".join(lines)
+
+    def report(self, stack_lines=2, longest=5):
+        """Histograms, then the `longest` blocking episodes with the end of their stacks."""
+        parts = [h.render() for h in self.histograms()]
+        parts.append(f"blocking episodes over {self.threshold * 1000:.0f} ms: {len(self.episodes)}")
+        for episode in sorted(self.episodes, key=lambda e: e.duration, reverse=True)[:longest]:
+            parts.append(f"  {episode.duration * 1000:.0f} ms, sampled stack:")
+            for frame in (episode.stack or ['  (not sampled)\n'])[-stack_lines:]:
+                parts.append("    " + frame.rstrip().replace("\n", "\n    "))
+        return "\n".join(parts)
+
+
+def use_uvloop():
+    """Switch to uvloop's event loop policy if it is installed; return whether it was."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+if __name__ == "__main__":
+    import random
+
+    async def fetch_data(source, delay):
+        """example4.py's fetch_data, without the prints."""
+        await asyncio.sleep(delay)
+        return f"Data from {source}"
+
+    def parse_response(payload):
+        """A CPU-bound step someone forgot to move off the loop."""
+        return sum(i * i for i in range(len(payload) * 100_000))
+
+    async def handle_request(i):
+        data = await fetch_data(f"API-{i}", random.uniform(0.001, 0.02))
+        if i % 500 == 0:
+            time.sleep(0.12)  # a blocking call inside a coroutine
+        if i % 700 == 0:
+            parse_response(data)
+        return data
+
+    async def workload():
+        async with LoopMonitor(threshold=0.05) as monitor:
+            start = time.perf_counter()
+            for _ in range(5):
+                await asyncio.gather(*(asyncio.create_task(handle_request(i))
+                                       for i in range(2000)))
+            elapsed = time.perf_counter() - start
+        return monitor, elapsed
+
+    def run(label):
+        random.seed(1)
+        monitor, elapsed = asyncio.run(workload())
+        print(f"=== {label}: 10,000 tasks in {elapsed:.2f}s ===")
+        print(monitor.report())
+        return monitor
+
+    monitor = run("asyncio")
+    print("\nPrometheus export (first lines):")
+    print("\n".join(monitor.prometheus_text().splitlines()[:5]))
+    if use_uvloop():
+        print()
+        run("uvloop")
+        asyncio.set_event_loop_policy(None)
+    else:
+        print("\nuvloop is not installed; pip install uvloop to compare the two loops")
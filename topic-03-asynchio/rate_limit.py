@@ -0,0 +1,342 @@
+"""Async rate limiting: a token bucket and an adaptive (AIMD) concurrency limit.
+
+The asyncio examples start every coroutine at once, and web_requests.py in
+topic-07 fixes max_workers=3. Neither looks at how the backend is coping:
+too low wastes capacity, too high queues requests on the server until they
+time out or get 503s. This module has two limiters:
+
+- TokenBucket(rate, burst): at most `rate` calls per second on average,
+  with bursts of up to `burst`, callers waiting their turn in FIFO order,
+- AIMDLimiter: caps calls in flight at `limit`, which grows by one per
+  window of good responses (additive increase) and is cut to
+  `limit * decrease` when a call fails or its latency exceeds the target
+  (multiplicative decrease) - the way TCP finds a link's capacity.
+
+Both are async context managers and decorators, and report their current
+limit and how long callers have waited for it:
+
+    limiter = AIMDLimiter(initial=10, maximum=500)
+
+    @limiter
+    async def fetch_data(source, delay): ...
+
+    async with limiter:
+        text = await fetch_url(session, url)
+    print(limiter.limit, limiter.queue_wait)
+"""
+import asyncio
+import functools
+import time
+import weakref
+from collections import deque
+
+
+class WaitStats:
+    """How long callers waited for a limiter."""
+    __slots__ = ['acquired', 'waited', 'total_wait', 'max_wait']
+
+    def __init__(self):
+        self.acquired = 0
+        self.waited = 0  # callers that waited longer than 0.1 ms
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, seconds):
+        self.acquired += 1
+        if seconds > 1e-4:
+            self.waited += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    @property
+    def mean_wait(self):
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def __repr__(self):
+        return (f"WaitStats({self.acquired:,} acquired, {self.waited:,} waited, "
+                f"mean {self.mean_wait * 1000:.1f} ms, max {self.max_wait * 1000:.1f} ms)")
+
+
+class _Limiter:
+    """async with limiter / @limiter, on top of acquire() and release()."""
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release(exc_value)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with self:
+                return await func(*args, **kwargs)
+
+        wrapper.limiter = self
+        return wrapper
+
+    @property
+    def queue_wait(self):
+        return self.stats.mean_wait
+
+
+class TokenBucket(_Limiter):
+    """`rate` tokens per second, holding at most `burst`; each call takes one."""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, not {rate}")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate / 10)
+        if self.burst <= 0:
+            raise ValueError(f"burst must be positive, not {self.burst}")
+        self.clock = clock
+        self.tokens = self.burst
+        self.stats = WaitStats()
+        self._updated = clock()
+        self._lock = asyncio.Lock()  # FIFO, so waiters are served in arrival order
+
+    @property
+    def limit(self):
+        return self.rate
+
+    def set_rate(self, rate):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, not {rate}")
+        self._refill()
+        self.rate = rate
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        if tokens > self.burst:
+            raise ValueError(f"{tokens} tokens can never be available with burst={self.burst}")
+        started = self.clock()
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+        self.stats.add(self.clock() - started)
+
+    def release(self, error=None):
+        pass  # tokens are spent, not returned
+
+
+class AIMDLimiter(_Limiter):
+    """Concurrency limit that grows additively and shrinks multiplicatively.
+
+    A call counts as congestion when it raises one of `errors` or takes
+    longer than `latency_target`. With no fixed target, the target is
+    `tolerance` x the baseline latency: a slowly rising minimum of recent
+    calls, so it tracks the backend's unloaded latency. After a cut, calls
+    that started before it are not counted again, so one overload episode
+    cuts the limit once, not once per request caught in it.
+    """
+
+    def __init__(self, initial=10, minimum=1, maximum=1000, increase=1.0, decrease=0.5,
+                 latency_target=None, tolerance=2.0, errors=(Exception,),
+                 clock=time.perf_counter):
+        self._limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.tolerance = tolerance
+        self.errors = errors
+        self.clock = clock
+        self.baseline = None
+        self.in_flight = 0
+        self.stats = WaitStats()
+        self.cuts = 0
+        self.history = []  # (time, limit) after every change
+        self._last_cut = -float('inf')
+        self._waiters = deque()
+        # task -> stack of (start time, whether the limit was saturated), one
+        # per acquire() not yet released, so nested `async with limiter:` in
+        # one task pairs each release() with its own acquire(); weak, so an
+        # entry left by a release() from another task doesn't keep its task alive
+        self._started = weakref.WeakKeyDictionary()
+
+    @property
+    def limit(self):
+        return max(self.minimum, int(self._limit))
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def _target(self):
+        if self.latency_target is not None:
+            return self.latency_target
+        return self.baseline * self.tolerance if self.baseline is not None else float('inf')
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self):
+        started = self.clock()
+        saturated = self.in_flight + 1 >= self.limit
+        if self._waiters or self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self.in_flight -= 1  # granted just as we were cancelled: hand it on
+                    self._wake()
+                raise
+            saturated = True
+        else:
+            self.in_flight += 1
+        now = self.clock()
+        self.stats.add(now - started)
+        task = asyncio.current_task()
+        stack = self._started.get(task)
+        if stack is None:
+            stack = self._started[task] = []
+        stack.append((now, saturated))
+
+    def release(self, error=None):
+        now = self.clock()
+        task = asyncio.current_task()
+        stack = self._started.get(task)
+        start = stack.pop() if stack else None
+        if stack is not None and not stack:
+            del self._started[task]
+        self.in_flight -= 1
+        # Released from another task than acquire(): the slot is freed, but
+        # with no start time there is no latency to learn from
+        if start is not None and (error is None or isinstance(error, self.errors)):
+            started, saturated = start
+            self._observe(now - started, error is not None, started, saturated, now)
+        self._wake()
+
+    def _observe(self, latency, failed, started, saturated, now):
+        if not failed:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:  # drift up slowly, so a backend that got slower for good is followed
+                self.baseline += (latency - self.baseline) * 0.001
+        if failed or latency > self._target():
+            if started >= self._last_cut:
+                self._limit = max(self.minimum, self._limit * self.decrease)
+                self._last_cut = now
+                self.cuts += 1
+                self.history.append((now, self.limit))
+        elif saturated and self._limit < self.maximum:
+            # +increase per limit's worth of good calls, i.e. per round trip at full use
+            before = self.limit
+            self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+            if self.limit != before:
+                self.history.append((now, self.limit))
+
+    def __repr__(self):
+        return (f"AIMDLimiter(limit={self.limit}, in_flight={self.in_flight}, "
+                f"queued={self.queued}, cuts={self.cuts})")
+
+
+class FixedLimiter(_Limiter):
+    """A plain semaphore with the same interface, for comparison."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.stats = WaitStats()
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self):
+        started = time.perf_counter()
+        await self._semaphore.acquire()
+        self.stats.add(time.perf_counter() - started)
+
+    def release(self, error=None):
+        self._semaphore.release()
+
+
+if __name__ == "__main__":
+    import aiohttp
+
+    from fetch_engine import fetch_url, percentile
+    from local_server import run_server
+
+    async def fetch_data(source, delay):
+        """example4.py's fetch_data, without the prints."""
+        await asyncio.sleep(delay)
+        return f"Data from {source}"
+
+    async def pacing():
+        bucket = TokenBucket(rate=200, burst=20)
+        paced = bucket(fetch_data)
+        start = time.perf_counter()
+        await asyncio.gather(*(paced(f"API-{i}", 0.01) for i in range(200)))
+        elapsed = time.perf_counter() - start
+        print(f"TokenBucket(rate=200/s, burst=20) around fetch_data, 200 calls at once: "
+              f"{elapsed:.2f}s (ideal {(200 - 20) / 200:.2f}s)\n  {bucket.stats}\n")
+
+    async def load_test(label, session, urls, limiter=None):
+        latencies, statuses = [], {}
+
+        async def one(url):
+            start = time.perf_counter()
+            try:
+                if limiter is None:
+                    await fetch_url(session, url, timeout=10)
+                else:
+                    async with limiter:
+                        await fetch_url(session, url, timeout=10)
+                status = 200
+            except aiohttp.ClientResponseError as e:
+                status = e.status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(url) for url in urls))
+        wall = time.perf_counter() - start
+        latencies.sort()
+        ok = statuses.get(200, 0)
+        print(f"{label}:\n  {ok:,} ok, {len(urls) - ok:,} failed {statuses}; {ok / wall:,.0f} ok/s, "
+              f"latency including the wait for the limiter: p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms")
+        if limiter is not None:
+            print(f"  limit {limiter.limit}, queue wait {limiter.stats}")
+
+    async def main():
+        await pacing()
+        capacity, latency, n = 16, 0.05, 2000
+        async with run_server(latency=latency, capacity=capacity, max_queue=32,
+                              payload_bytes=1024) as (base_urls, stats):
+            urls = [f"{base_urls[0]}/data/{i}" for i in range(n)]
+            print(f"{n:,} fetch_url() calls; the server handles {capacity} at a time in "
+                  f"{latency * 1000:.0f} ms ({capacity / latency:.0f} req/s at best), queues 32 "
+                  f"more and answers 503 beyond that\n")
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+                await load_test("Everything at once (gather_example)", session, urls)
+                await load_test("Fixed concurrency 3 (max_workers=3)", session, urls,
+                                FixedLimiter(3))
+                await load_test("Fixed concurrency 100", session, urls, FixedLimiter(100))
+                await load_test(f"TokenBucket(rate={capacity / latency * 0.9:.0f}/s)",
+                                session, urls, TokenBucket(rate=capacity / latency * 0.9))
+                aimd = AIMDLimiter(initial=2, maximum=200)
+                await load_test("AIMDLimiter(initial=2), latency target 2x baseline",
+                                session, urls, aimd)
+                trace = ', '.join(str(limit) for _, limit in aimd.history[:40])
+                print(f"  {aimd.cuts} cuts; baseline {aimd.baseline * 1000:.0f} ms; "
+                      f"limit over time: {trace}{', ...' if len(aimd.history) > 40 else ''}")
+            print(f"\nServer: {stats.requests:,} requests, {stats.rejected:,} shed with 503")
+
+    asyncio.run(main())
@@ -0,0 +1,266 @@
+"""Deadline-aware scheduling of coroutine tasks: priorities, quorums and hedging.
+
+gather_with_exceptions() in example5.py chooses between failing fast and
+return_exceptions=True; either way gather() waits for the slowest task, so
+one slow backend sets the latency of the whole fan-out. Scheduler.run()
+takes TaskSpecs and bounds that tail:
+
+- priority: with a concurrency limit, higher-priority tasks start first,
+- timeout (per task) and deadline (whole batch, in seconds),
+- quorum=N: once N tasks have succeeded the stragglers are cancelled,
+- hedge=True: if a task is still running after the p95 latency seen so far
+  for that kind of task, a duplicate is launched and whichever succeeds
+  first wins (hedge=0.05 uses a fixed delay instead of the p95).
+
+Every task ends as an Outcome with status 'ok', 'failed', 'timed_out' or
+'cancelled' - run() itself never raises for a task's failure.
+"""
+import asyncio
+import itertools
+import math
+import time
+from collections import deque
+
+OK = 'ok'
+FAILED = 'failed'
+TIMED_OUT = 'timed_out'
+CANCELLED = 'cancelled'
+
+
+class TaskSpec:
+    """A coroutine function plus arguments, so the scheduler can start (or hedge) it."""
+    __slots__ = ['factory', 'args', 'kwargs', 'name', 'key', 'priority', 'timeout', 'hedge']
+
+    def __init__(self, factory, *args, name=None, key=None, priority=0, timeout=None,
+                 hedge=None, **kwargs):
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name or factory.__name__
+        self.key = key or factory.__qualname__  # tasks sharing a latency history
+        self.priority = priority
+        self.timeout = timeout
+        self.hedge = hedge
+
+    def start(self):
+        return asyncio.ensure_future(self.factory(*self.args, **self.kwargs))
+
+
+class Outcome:
+    """How one task ended."""
+    __slots__ = ['name', 'status', 'value', 'error', 'elapsed', 'hedged', 'hedge_won']
+
+    def __init__(self, name, status=CANCELLED):
+        self.name = name
+        self.status = status
+        self.value = None
+        self.error = None
+        self.elapsed = 0.0
+        self.hedged = False     # a duplicate was launched
+        self.hedge_won = False  # ...and finished first
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def __repr__(self):
+        detail = repr(self.value) if self.ok else repr(self.error) if self.error else ''
+        hedge = ', hedged' + (' (hedge won)' if self.hedge_won else '') if self.hedged else ''
+        return f"Outcome({self.name}: {self.status} {detail}, {self.elapsed * 1000:.0f} ms{hedge})"
+
+
+class Scheduler:
+    """Runs batches of TaskSpecs; remembers latencies per task key for hedging."""
+
+    def __init__(self, concurrency=None, hedge_quantile=0.95, hedge_min_samples=20,
+                 history=1000):
+        self.concurrency = concurrency
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = {}
+        self._history = history
+
+    def record_latency(self, key, seconds):
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self._history)
+        samples.append(seconds)
+
+    def hedge_delay(self, spec):
+        """Seconds to wait before hedging spec, or None for no hedge."""
+        if spec.hedge is None or spec.hedge is False:
+            return None
+        if spec.hedge is not True:
+            return float(spec.hedge)
+        samples = self._latencies.get(spec.key)
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None  # no p95 to go on yet
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, math.ceil(self.hedge_quantile * len(ordered)) - 1)]
+
+    async def execute(self, spec, outcome=None):
+        """Run one spec to an Outcome, applying its timeout and hedge."""
+        outcome = outcome or Outcome(spec.name)
+        started = time.perf_counter()
+        timeout_at = started + spec.timeout if spec.timeout is not None else math.inf
+        hedge_delay = self.hedge_delay(spec)
+        primary = spec.start()
+        attempts = {primary}
+        try:
+            while attempts:
+                now = time.perf_counter()
+                wake_at = timeout_at
+                if hedge_delay is not None and not outcome.hedged:
+                    wake_at = min(wake_at, started + hedge_delay)
+                wait = None if wake_at == math.inf else max(0.0, wake_at - now)
+                done, attempts = await asyncio.wait(attempts, timeout=wait,
+                                                    return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        outcome.status, outcome.value = OK, attempt.result()
+                        outcome.hedge_won = attempt is not primary
+                        # If the hedge won, the primary took at least this long;
+                        # recording it keeps slow primaries from vanishing from the p95
+                        self.record_latency(spec.key, time.perf_counter() - started)
+                        return outcome
+                    outcome.status, outcome.error = FAILED, attempt.exception()
+                if done:
+                    continue  # a failed attempt; keep waiting for any other one
+                now = time.perf_counter()
+                if now >= timeout_at:
+                    outcome.status = TIMED_OUT
+                    outcome.error = asyncio.TimeoutError(f"{spec.name} exceeded {spec.timeout}s")
+                    # It took at least the timeout; leaving it out would bias the p95 low
+                    self.record_latency(spec.key, spec.timeout)
+                    return outcome
+                if hedge_delay is not None and not outcome.hedged and now >= started + hedge_delay:
+                    outcome.hedged = True
+                    attempts.add(spec.start())
+                # Otherwise the wait returned early: go round and wait again
+            return outcome
+        finally:
+            outcome.elapsed = time.perf_counter() - started
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def run(self, specs, deadline=None, quorum=None):
+        """Run specs; return their Outcomes in input order.
+
+        deadline: seconds for the whole batch - anything unfinished then is
+        timed out (or cancelled, if it never started). quorum: stop and cancel
+        the rest once this many tasks are ok.
+        """
+        specs = list(specs)
+        outcomes = [Outcome(spec.name) for spec in specs]
+        queue = asyncio.PriorityQueue()
+        order = itertools.count()
+        for index, spec in enumerate(specs):
+            queue.put_nowait((-spec.priority, next(order), index))
+        started, finished = set(), set()
+        quorum_reached = asyncio.Event()
+        ok_count = 0
+
+        async def worker():
+            nonlocal ok_count
+            while not queue.empty():
+                _, _, index = queue.get_nowait()
+                started.add(index)
+                outcome = await self.execute(specs[index], outcomes[index])
+                finished.add(index)
+                if outcome.ok:
+                    ok_count += 1
+                    if quorum is not None and ok_count >= quorum:
+                        quorum_reached.set()
+
+        workers = [asyncio.create_task(worker())
+                   for _ in range(min(self.concurrency or len(specs), len(specs)))]
+        all_done = asyncio.ensure_future(asyncio.gather(*workers))
+        quorum_wait = asyncio.create_task(quorum_reached.wait())
+        try:
+            await asyncio.wait({all_done, quorum_wait}, timeout=deadline,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (*workers, quorum_wait):
+                task.cancel()
+            await asyncio.gather(all_done, quorum_wait, return_exceptions=True)
+
+        # Started but unfinished tasks were cut off by the quorum or the
+        # deadline; tasks that never started keep the default CANCELLED
+        stopped_by = CANCELLED if quorum_reached.is_set() else TIMED_OUT
+        for index in started - finished:
+            outcomes[index].status = stopped_by
+        return outcomes
+
+
+if __name__ == "__main__":
+    import random
+    from collections import Counter
+
+    async def backend(name, slow_rate=0.05):
+        """A backend that usually answers in 10-30 ms but sometimes takes 10x longer."""
+        latency = random.uniform(0.01, 0.03)
+        if random.random() < slow_rate:
+            latency *= 10
+        await asyncio.sleep(latency)
+        if random.random() < 0.01:
+            raise ConnectionError(f"{name} reset the connection")
+        return f"Data from {name}"
+
+    def p(values, q):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    async def main():
+        random.seed(4)
+        scheduler = Scheduler()
+        rounds, fan_out = 200, 10
+
+        async def measure(label, run_round):
+            latencies, statuses = [], Counter()
+            for _ in range(rounds):
+                start = time.perf_counter()
+                outcomes = await run_round()
+                latencies.append(time.perf_counter() - start)
+                statuses.update(o.status for o in outcomes)
+            print(f"{label}:\n  p50 {p(latencies, 0.5):.0f} ms, p99 {p(latencies, 0.99):.0f} ms, "
+                  f"max {p(latencies, 1):.0f} ms; outcomes {dict(statuses)}")
+
+        def batch(**options):
+            return [TaskSpec(backend, f"API-{i}", name=f"API-{i}", **options)
+                    for i in range(fan_out)]
+
+        print(f"{rounds} rounds of a {fan_out}-way fan-out (5% of calls are 10x slow)\n")
+        for _ in range(5):  # warm up the latency history the hedge delay comes from
+            await scheduler.run(batch())
+
+        async def gather_round():
+            results = await asyncio.gather(*(backend(f"API-{i}") for i in range(fan_out)),
+                                           return_exceptions=True)
+            return [Outcome('', FAILED if isinstance(r, Exception) else OK) for r in results]
+
+        await measure("asyncio.gather(return_exceptions=True)", gather_round)
+        await measure("Scheduler, hedge=True (p95 of earlier calls)",
+                      lambda: scheduler.run(batch(hedge=True)))
+        await measure("Scheduler, quorum=8 of 10",
+                      lambda: scheduler.run(batch(), quorum=8))
+        await measure("Scheduler, per-task timeout=60 ms, deadline=80 ms",
+                      lambda: scheduler.run(batch(timeout=0.06), deadline=0.08))
+        print(f"  hedge delay learned for backend(): "
+              f"{scheduler.hedge_delay(TaskSpec(backend, hedge=True)) * 1000:.1f} ms")
+
+        started = []
+
+        async def job(name, seconds):
+            started.append(name)
+            await asyncio.sleep(seconds)
+            return name
+
+        specs = [TaskSpec(job, f"low-{i}", 0.01, name=f"low-{i}") for i in range(3)]
+        specs += [TaskSpec(job, "urgent", 0.01, name="urgent", priority=10),
+                  TaskSpec(job, "stuck", 5, name="stuck", priority=5, timeout=0.05)]
+        outcomes = await Scheduler(concurrency=2).run(specs)
+        print(f"\nconcurrency=2, start order by priority: {started}")
+        for outcome in outcomes:
+            print(f"  {outcome}")
+
+    asyncio.run(main())
@@ -62,4 +62,5 @@ def compare_sequential_vs_multiprocess():
     return sequential_results, multiprocess_results
 
 # Run the comparison
-sequential_results, process_results = compare_sequential_vs_multiprocess()
+if __name__ == "__main__":
+    sequential_results, process_results = compare_sequential_vs_multiprocess()